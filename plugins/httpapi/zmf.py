@@ -0,0 +1,193 @@
+# Copyright (c) IBM Corporation 2021
+# Apache License, Version 2.0 (see https://opensource.org/licenses/Apache-2.0)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+author:
+    - Yang Cao (@zosmf-Young)
+name: zmf
+short_description: HttpApi plugin for the IBM z/OSMF REST services
+description:
+    - >
+      This HttpApi plugin keeps an authenticated connection to z/OSMF in the
+      persistent connection daemon for the whole play. The modules
+      M(zmf_workflow), M(zmf_sca) and M(zmf_authenticate) send their requests
+      through it when the task runs with C(ansible_connection=ansible.netcommon.httpapi)
+      and C(ansible_network_os=ibm.ibm_zosmf.zmf), so the play logs in once and
+      reuses one TLS connection to each z/OSMF server.
+    - >
+      The z/OSMF server is C(ansible_host) and C(ansible_httpapi_port). With
+      C(ansible_user) and C(ansible_password), the LTPA2 and JWT tokens returned by
+      the z/OSMF authentication service are used for the following requests, and
+      renewed once when a request is rejected with HTTP 401.
+    - >
+      The modules keep their own session when I(zmf_host) names another server
+      than C(ansible_host).
+    - >
+      The roles calling z/OSMF through the builtin M(ansible.builtin.uri) module,
+      such as the cloud provisioning roles, do not use this plugin.
+    - This plugin requires the C(ansible.netcommon) collection.
+version_added: "1.3.0"
+options:
+    zmf_crt:
+        description:
+            - Location of the PEM-formatted certificate chain file to be used for HTTPS client authentication.
+        type: str
+        vars:
+            - name: ansible_httpapi_zmf_crt
+    zmf_key:
+        description:
+            - Location of the PEM-formatted file with your private key to be used for HTTPS client authentication.
+        type: str
+        vars:
+            - name: ansible_httpapi_zmf_key
+'''
+
+import base64
+import json
+import re
+import socket
+import ssl
+
+from ansible.errors import AnsibleAuthenticationFailure, AnsibleConnectionFailure
+from ansible.module_utils.six.moves import http_client
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.plugins.httpapi import HttpApiBase
+
+AUTH_PATH = '/zosmf/services/authenticate'
+TOKEN_COOKIES = ('LtpaToken2', 'jwtToken')
+
+
+class HttpApi(HttpApiBase):
+
+    def __init__(self, connection):
+        super(HttpApi, self).__init__(connection)
+        self._http = None
+        self._tokens = {}
+        self._login_headers = []
+        self._stats = dict(connections=0, requests=0, logins=0, reconnects=0)
+
+    def _new_http_connection(self):
+        context = ssl.create_default_context()
+        if not self.connection.get_option('validate_certs'):
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        crt = self.get_option('zmf_crt')
+        key = self.get_option('zmf_key')
+        if crt and key:
+            context.load_cert_chain(crt, key)
+        port = self.connection.get_option('port') or 443
+        timeout = self.connection.get_option('persistent_command_timeout')
+        self._stats['connections'] += 1
+        return http_client.HTTPSConnection(self.connection.get_option('host'), port,
+                                           context=context, timeout=timeout)
+
+    def _request(self, method, path, data, headers):
+        """
+        Send the request on the kept-alive connection, and reconnect once
+        when the server has closed it meanwhile.
+        """
+        for attempt in (0, 1):
+            reused = self._http is not None
+            if self._http is None:
+                self._http = self._new_http_connection()
+            try:
+                self._http.request(method, path, body=to_bytes(data) if data is not None else None,
+                                   headers=headers)
+                response = self._http.getresponse()
+                body = response.read()
+            except (http_client.HTTPException, socket.error) as ex:
+                self._http.close()
+                self._http = None
+                if attempt == 0 and reused and isinstance(ex, (http_client.BadStatusLine, socket.error)):
+                    # an idle connection closed by z/OSMF fails on its first reuse
+                    self._stats['reconnects'] += 1
+                    continue
+                raise AnsibleConnectionFailure('Failed to send the request to z/OSMF: ' + repr(ex))
+            if response.getheader('Connection', '').lower() == 'close':
+                self._http.close()
+                self._http = None
+            self._stats['requests'] += 1
+            return response.status, response.reason, response.getheaders(), body
+
+    def _store_tokens(self, headers):
+        for name, value in headers:
+            if name.lower() != 'set-cookie':
+                continue
+            for cookie in TOKEN_COOKIES:
+                found = re.findall(cookie + '=(.+?);', value + ';')
+                if found:
+                    self._tokens[cookie] = found[0]
+
+    def _headers(self, headers):
+        headers = dict(headers or {})
+        headers.setdefault('X-CSRF-ZOSMF-HEADER', 'ZOSMF')
+        if self._tokens:
+            headers['Cookie'] = '; '.join(k + '=' + v for k, v in self._tokens.items())
+        return headers
+
+    def login(self, username, password):
+        """
+        Get the LTPA2 and JWT tokens from the z/OSMF authentication service.
+        """
+        credentials = to_text(base64.b64encode(to_bytes('%s:%s' % (username, password))))
+        headers = {'Authorization': 'Basic ' + credentials,
+                   'Content-Type': 'application/x-www-form-urlencoded',
+                   'X-CSRF-ZOSMF-HEADER': 'ZOSMF'}
+        self._tokens = {}
+        status, reason, response_headers, body = self._request('POST', AUTH_PATH, None, headers)
+        if status != 200:
+            raise AnsibleAuthenticationFailure('Failed to authenticate with z/OSMF server ---- HTTP %s %s'
+                                               % (status, reason))
+        self._store_tokens(response_headers)
+        self._login_headers = [[k, v] for k, v in response_headers if k.lower() == 'set-cookie']
+        self._stats['logins'] += 1
+        self.connection._auth = {'Cookie': '; '.join(k + '=' + v for k, v in self._tokens.items())}
+
+    def logout(self):
+        if self._tokens:
+            try:
+                self._request('DELETE', AUTH_PATH, None, self._headers(None))
+            except AnsibleConnectionFailure:
+                pass
+            self._tokens = {}
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+
+    def _can_login(self):
+        return bool(self.connection.get_option('remote_user') and self.connection.get_option('password'))
+
+    def send_request(self, method, path, data=None, headers=None):
+        """
+        Send a request to z/OSMF and return its status, reason, headers and
+        body as a dict, which the modules turn back into a response.
+        :param str method: the method of HTTP request
+        :param str path: the path and query of HTTP request
+        :param str data: the body of HTTP request
+        :param dict headers: the header of HTTP request
+        :rtype: dict
+        """
+        if method == 'POST' and path == AUTH_PATH and self._login_headers:
+            # zmf_authenticate gets the tokens of the login of the play
+            return dict(status=200, reason='OK', headers=self._login_headers, body='')
+        if not self._tokens and self._can_login() and path != AUTH_PATH:
+            self.login(self.connection.get_option('remote_user'), self.connection.get_option('password'))
+        status, reason, response_headers, body = self._request(method, path, data, self._headers(headers))
+        if status == 401 and self._tokens and self._can_login():
+            # the tokens expired, log in again and resend the request once
+            self.login(self.connection.get_option('remote_user'), self.connection.get_option('password'))
+            status, reason, response_headers, body = self._request(method, path, data, self._headers(headers))
+        self._store_tokens(response_headers)
+        return dict(status=status, reason=reason, headers=[[k, v] for k, v in response_headers],
+                    body=to_text(body, errors='surrogate_or_replace'))
+
+    def get_stats(self):
+        """
+        Return the connections, requests and logins done by this connection.
+        :rtype: dict
+        """
+        return json.loads(json.dumps(self._stats))
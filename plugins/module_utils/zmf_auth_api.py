@@ -9,12 +9,18 @@ from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import \
 import re
 
 
+# the API table is built on first use and reused for the rest of the module run
+__auth_apis = {}
+
+
 def __get_auth_apis():
     """
     Return the details of all z/OSMF authentication APIs.
     :rtype: dict[str, dict]
     """
-    return dict(
+    if __auth_apis:
+        return __auth_apis
+    __auth_apis.update(dict(
         # get the authentication tokens on user login for z/OSMF server
         getAuth=dict(
             method='post',
@@ -23,7 +29,8 @@ def __get_auth_apis():
             args={},
             ok_rcode=200
         )
-    )
+    ))
+    return __auth_apis
 
 
 def __get_auth_api_argument_spec(api):
@@ -0,0 +1,288 @@
+# Copyright (c) IBM Corporation 2021
+# Apache License, Version 2.0 (see https://opensource.org/licenses/Apache-2.0)
+
+"""
+Record and replay the HTTP requests sent to z/OSMF.
+
+Set ZMF_FIXTURE_RECORD to a directory to append every request and response
+sent by handle_request and handle_request_raw to <dir>/fixtures.jsonl, with
+the credentials and tokens scrubbed, and the values of the workflow
+variables whose name looks like a credential or which are marked sensitive
+or private. Set ZMF_FIXTURE_REPLAY to a directory
+of recorded fixtures to answer the requests from the files instead of z/OSMF.
+The recorded latency is reproduced when replaying, multiplied by
+ZMF_FIXTURE_LATENCY_SCALE (default 1.0, 0 disables it).
+
+The responses recorded for the same method, path and query are replayed in
+order. The position of each sequence is kept in <dir>/.replay_cursor.json,
+so that the module processes of a playbook run continue where the previous
+one stopped, and the last response is repeated once a sequence is exhausted.
+Delete the cursor file, or call reset_replay(), to replay from the start.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import fcntl
+import io
+import json
+import os
+import re
+import time
+from ansible.module_utils.six.moves.urllib.error import HTTPError, URLError
+from ansible.module_utils.six.moves.urllib.parse import urlsplit, parse_qsl
+from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import (
+    ZmfResponse,
+    build_headers
+)
+
+FIXTURE_FILE = 'fixtures.jsonl'
+CURSOR_FILE = '.replay_cursor.json'
+SCRUBBED = 'SCRUBBED'
+
+__sensitive_keys = re.compile(r'pass(word|phrase)?|token|secret|credential', re.IGNORECASE)
+__sensitive_headers = ('authorization', 'proxy-authorization', 'cookie', 'set-cookie')
+# the fixtures loaded by this process: {dir: (mtime, size, {key: [fixture]})}
+__fixture_cache = {}
+
+
+def fixture_key(method, url):
+    """
+    Return the key matching a request with its recorded responses. The host
+    and the body are ignored, so the fixtures recorded on one system can be
+    replayed against any zmf_host.
+    :param str method: the method of HTTP request
+    :param str url: the URL of HTTP request
+    :rtype: str
+    """
+    parts = urlsplit(url)
+    query = sorted(parse_qsl(parts.query, keep_blank_values=True))
+    key = method.upper() + ' ' + parts.path
+    if query:
+        key += '?' + '&'.join(k + '=' + v for k, v in query)
+    return key
+
+
+def __scrub_cookie(value):
+    # keep the cookie names and attributes, drop the values of the cookies
+    parts = []
+    for part in value.split(';'):
+        name, sep, cookie = part.partition('=')
+        if sep and name.strip().lower() not in ('path', 'domain', 'expires', 'max-age', 'samesite'):
+            cookie = SCRUBBED
+        parts.append(name + sep + cookie)
+    return ';'.join(parts)
+
+
+def __scrub_headers(headers):
+    scrubbed = []
+    for name, value in headers:
+        if name.lower() in ('cookie', 'set-cookie'):
+            value = __scrub_cookie(value)
+        elif name.lower() in __sensitive_headers:
+            value = SCRUBBED
+        scrubbed.append([name, value])
+    return scrubbed
+
+
+def __is_sensitive_variable(content):
+    """
+    Return whether the dict is a workflow variable, a name and value pair,
+    whose name is sensitive or which is marked sensitive or private.
+    """
+    if 'name' not in content or not ('value' in content or 'default' in content):
+        return False
+    return bool(__sensitive_keys.search(str(content['name'])) or content.get('sensitive') in (True, 'true')
+                or str(content.get('visibility') or '').lower() == 'private')
+
+
+def __scrub_json(content):
+    if isinstance(content, dict):
+        variable = __is_sensitive_variable(content)
+        for k, v in content.items():
+            if __sensitive_keys.search(k) and isinstance(v, (str, bytes, type(u''))):
+                content[k] = SCRUBBED
+            elif variable and k in ('value', 'default') and v is not None and not isinstance(v, (dict, list)):
+                content[k] = SCRUBBED
+            else:
+                __scrub_json(v)
+    elif isinstance(content, list):
+        for v in content:
+            __scrub_json(v)
+    return content
+
+
+def __scrub_body(body):
+    """
+    Return the body as text, with the values of the sensitive JSON keys
+    scrubbed.
+    """
+    if body is None:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', 'replace')
+    try:
+        content = json.loads(body)
+    except ValueError:
+        return body
+    return json.dumps(__scrub_json(content))
+
+
+def __header_items(headers):
+    if headers is None:
+        return []
+    if hasattr(headers, 'items'):
+        # HTTPMessage in python3 keeps the repeated headers in items()
+        return [[k, v] for k, v in headers.items()]
+    return [[k, v] for k, v in headers]
+
+
+def __append_fixture(path, fixture):
+    with open(os.path.join(path, FIXTURE_FILE), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.write(json.dumps(fixture, sort_keys=True) + '\n')
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def record_request(path, session, method, url, data, headers, timeout):
+    """
+    Send the request and append the scrubbed request and response to the
+    fixtures in path.
+    :param str path: the directory of the fixtures
+    :param Request session: the current connection session
+    :param str method: the method of HTTP request
+    :param str url: the URL of HTTP request
+    :param str data: the body of HTTP request
+    :param dict headers: the headers of HTTP request
+    :param int timeout: the timeout of HTTP request
+    :rtype: ZmfResponse
+    """
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    fixture = dict(key=fixture_key(method, url), method=method.upper(), url=urlsplit(url).path,
+                   request_headers=__scrub_headers(sorted(headers.items())),
+                   request_body=__scrub_body(data), recorded=time.time())
+    start = time.time()
+    try:
+        response = session.open(method.upper(), url, data=data, headers=headers,
+                                validate_certs=False, timeout=timeout)
+        body = response.read()
+    except HTTPError as ex:
+        body = ex.read()
+        fixture.update(elapsed=time.time() - start, status=ex.code, reason=ex.reason,
+                       headers=__scrub_headers(__header_items(ex.headers)),
+                       body=__scrub_body(body))
+        __append_fixture(path, fixture)
+        raise HTTPError(url, ex.code, ex.reason, ex.headers, io.BytesIO(body))
+    except Exception as ex:
+        fixture.update(elapsed=time.time() - start, error=repr(ex))
+        __append_fixture(path, fixture)
+        raise
+    status = response.status if 'status' in dir(response) else response.code
+    headers = __header_items(response.headers if 'status' in dir(response) else response.info())
+    fixture.update(elapsed=time.time() - start, status=status,
+                   reason=getattr(response, 'reason', ''),
+                   headers=__scrub_headers(headers), body=__scrub_body(body))
+    __append_fixture(path, fixture)
+    return ZmfResponse(url, status, fixture['reason'], headers, body)
+
+
+def load_fixtures(path):
+    """
+    Return the fixtures in path, grouped by key in the recorded order.
+    :param str path: the directory of the fixtures
+    :rtype: dict
+    """
+    filename = os.path.join(path, FIXTURE_FILE)
+    stat = os.stat(filename)
+    cached = __fixture_cache.get(path)
+    if cached is not None and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+        return cached[2]
+    fixtures = {}
+    with open(filename) as f:
+        for line in f:
+            if line.strip():
+                fixture = json.loads(line)
+                fixtures.setdefault(fixture['key'], []).append(fixture)
+    __fixture_cache[path] = (stat.st_mtime, stat.st_size, fixtures)
+    return fixtures
+
+
+def __next_position(path, key, count):
+    """
+    Return the position of the next response of key, and advance the cursor
+    shared by the processes replaying from path.
+    """
+    with open(os.path.join(path, CURSOR_FILE), 'a+') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.seek(0)
+            content = f.read()
+            cursor = json.loads(content) if content else {}
+            position = cursor.get(key, 0)
+            cursor[key] = position + 1
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(cursor, sort_keys=True))
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+    return min(position, count - 1)
+
+
+def replay_request(path, method, url, latency_scale=1.0):
+    """
+    Return the recorded response of the request, or raise the recorded error.
+    :param str path: the directory of the fixtures
+    :param str method: the method of HTTP request
+    :param str url: the URL of HTTP request
+    :param float latency_scale: the factor applied to the recorded latency
+    :rtype: ZmfResponse
+    """
+    key = fixture_key(method, url)
+    recorded = load_fixtures(path).get(key)
+    if not recorded:
+        raise URLError('No fixture recorded for ' + key)
+    fixture = recorded[__next_position(path, key, len(recorded))]
+    if latency_scale > 0 and fixture.get('elapsed'):
+        time.sleep(fixture['elapsed'] * latency_scale)
+    if 'error' in fixture:
+        raise URLError(fixture['error'])
+    body = (fixture.get('body') or '').encode('utf-8')
+    if fixture['status'] >= 400:
+        raise HTTPError(url, fixture['status'], fixture.get('reason', ''),
+                        build_headers(fixture.get('headers')), io.BytesIO(body))
+    return ZmfResponse(url, fixture['status'], fixture.get('reason', ''),
+                       fixture.get('headers'), body)
+
+
+def reset_replay(path):
+    """
+    Replay the fixtures in path from the start.
+    :param str path: the directory of the fixtures
+    """
+    try:
+        os.remove(os.path.join(path, CURSOR_FILE))
+    except OSError:
+        pass
+
+
+def open_with_fixtures(session, method, url, data, headers, timeout):
+    """
+    Send the request through the fixtures selected by ZMF_FIXTURE_REPLAY or
+    ZMF_FIXTURE_RECORD.
+    :param Request session: the current connection session
+    :param str method: the method of HTTP request
+    :param str url: the URL of HTTP request
+    :param str data: the body of HTTP request
+    :param dict headers: the headers of HTTP request
+    :param int timeout: the timeout of HTTP request
+    :rtype: ZmfResponse
+    """
+    replay = os.environ.get('ZMF_FIXTURE_REPLAY')
+    if replay:
+        scale = float(os.environ.get('ZMF_FIXTURE_LATENCY_SCALE') or 1.0)
+        return replay_request(replay, method, url, scale)
+    return record_request(os.environ['ZMF_FIXTURE_RECORD'], session, method, url,
+                          data, headers, timeout)
@@ -18,11 +18,17 @@ def __get_api_version():
     return 'v1'
 
 
+# the API table is built on first use and reused for the rest of the module run
+__sca_apis = {}
+
+
 def __get_sca_apis():
     """
     Return the details of all z/OSMF workflow services APIs.
     :rtype: dict[str, dict]
     """
+    if __sca_apis:
+        return __sca_apis
     version = __get_api_version()
     resource_dict = dict(
         serviceId=dict(
@@ -67,7 +73,7 @@ def __get_sca_apis():
             )
         )
     )
-    return dict(
+    __sca_apis.update(dict(
         # validate descriptor
         validateDescriptor=dict(
             method='post',
@@ -108,7 +114,8 @@ def __get_sca_apis():
             args=resource_dict,
             ok_rcode=200
         )
-    )
+    ))
+    return __sca_apis
 
 
 def __get_sca_api_argument_spec(api):
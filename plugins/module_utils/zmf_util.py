@@ -4,9 +4,25 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import copy
+import io
 import json
-from ansible.module_utils.urls import Request
-import ansible.module_utils.six.moves.http_cookiejar as cookiejar
+import os
+import threading
+
+# the cookies of the z/OSMF tokens, sent in place of the user and password
+TOKEN_COOKIES = ('LtpaToken2', 'jwtToken')
+# the path of the z/OSMF authentication service
+AUTH_PATH = '/zosmf/services/authenticate'
+# the z/OSMF messages answering a request with an expired or revoked token
+AUTH_ERROR_MESSAGES = ('IZUG846W',)
+# the ansible_network_os of the httpapi connections the requests are sent through
+HTTPAPI_NETWORK_OS = 'ibm.ibm_zosmf.zmf'
+# the credential renewed during the module run, returned by exit_module and
+# by fail_json once return_renewed_credential is called
+__renewed_credential = {}
+# guards the auth state of the sessions shared by the threads of run_in_parallel
+__auth_lock = threading.RLock()
 
 
 def get_auth_argument_spec():
@@ -16,7 +32,8 @@ def get_auth_argument_spec():
     :rtype: dict[str, dict]
     """
     return dict(
-        zmf_host=dict(required=True, type='str'),
+        zmf_host=dict(required=False, type='str'),
+        zmf_hosts=dict(required=False, type='list', elements='str'),
         zmf_port=dict(required=False, type='int'),
         zmf_user=dict(required=False, type='str', no_log=True),
         zmf_password=dict(required=False, type='str', no_log=True),
@@ -32,6 +49,7 @@ def get_connect_argument_spec():
     """
     return dict(
         zmf_host=dict(required=False, type='str'),
+        zmf_endpoints=dict(required=False, type='list', elements='str'),
         zmf_port=dict(required=False, type='int'),
         zmf_user=dict(required=False, type='str', no_log=True),
         zmf_password=dict(required=False, type='str', no_log=True),
@@ -41,12 +59,355 @@ def get_connect_argument_spec():
     )
 
 
+def parse_zmf_endpoint(entry, port=None):
+    """
+    Split a z/OSMF server given as host or host:port into its hostname and
+    port number. The given port is used when the entry has none. An IPv6
+    address is given as [address]:port, or as a bare address without port.
+    :param str entry: the z/OSMF server, e.g. plex1.ibm.com:10443
+    :param int port: the default port number
+    :rtype: tuple(str, int)
+    """
+    entry = entry.strip()
+    if entry.startswith('['):
+        host, sep, rest = entry[1:].partition(']')
+        if sep and rest[1:].isdigit() and rest.startswith(':'):
+            return host, int(rest[1:])
+        return host, port
+    if entry.count(':') > 1:
+        # a bare IPv6 address
+        return entry, port
+    host, sep, entry_port = entry.rpartition(':')
+    if sep and entry_port.isdigit():
+        return host, int(entry_port)
+    return entry, port
+
+
+def format_zmf_host(host):
+    """
+    Return the hostname as written in a URL, an IPv6 address in brackets.
+    :param str host: the hostname or IP address
+    :rtype: str
+    """
+    if ':' in host and not host.startswith('['):
+        return '[' + host + ']'
+    return host
+
+
+class HostFailure(Exception):
+    """
+    Raised by HostModule.fail_json with the result of the failed host.
+    :param dict result: the result passed to fail_json
+    """
+
+    def __init__(self, result):
+        super(HostFailure, self).__init__(result.get('msg', ''))
+        self.result = result
+
+
+class HostModule(object):
+    """
+    The module seen by the requests sent to one of several z/OSMF servers,
+    with its own copy of the module arguments. fail_json raises HostFailure
+    instead of exiting, so that a failed host does not stop the others.
+    :param AnsibleModule module: the ansible module
+    :param params: the module arguments replaced for this host, e.g. zmf_host
+    """
+
+    def __init__(self, module, **params):
+        self._module = module
+        self.params = dict(module.params)
+        self.params.update(params)
+
+    def fail_json(self, **kwargs):
+        kwargs['failed'] = True
+        raise HostFailure(kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+
+def run_in_parallel(func, items, max_workers=8, max_rate=None):
+    """
+    Call func with every item on a pool of at most max_workers threads, and
+    return the results in the order of the items. The exception raised by a
+    call is returned as the result of its item.
+    :param function func: the function called with every item
+    :param list items: the items
+    :param int max_workers: the maximum number of concurrent calls
+    :param float max_rate: the maximum number of calls started per second,
+                           no limit when None or 0
+    :rtype: list
+    """
+    import threading
+    import time
+    results = [None] * len(items)
+    pending = list(enumerate(items))
+    lock = threading.Lock()
+    # the time the next call may start at when the rate is limited
+    next_start = [time.time()]
+
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                index, item = pending.pop(0)
+                delay = 0
+                if max_rate:
+                    now = time.time()
+                    delay = next_start[0] - now
+                    next_start[0] = max(next_start[0], now) + 1.0 / max_rate
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                results[index] = func(item)
+            except Exception as ex:
+                results[index] = ex
+
+    threads = [threading.Thread(target=worker) for i in range(max(1, min(max_workers, len(items))))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class ZmfResponse(object):
+    """
+    A response read in full, with the attributes of HTTPResponse used by
+    handle_request. It stands for the responses replayed from fixtures or
+    received through the persistent connection.
+    :param str url: the URL of HTTP request
+    :param int status: the status code of HTTP response
+    :param str reason: the reason phrase of HTTP response
+    :param list headers: the [name, value] pairs of HTTP response headers
+    :param bytes body: the content of HTTP response
+    """
+
+    def __init__(self, url, status, reason, headers, body):
+        self.url = url
+        self.status = status
+        self.code = status
+        self.reason = reason
+        self.headers = build_headers(headers)
+        self.msg = self.headers
+        self._body = io.BytesIO(body)
+
+    def read(self, amt=None):
+        return self._body.read() if amt is None else self._body.read(amt)
+
+    def info(self):
+        return self.headers
+
+    def getcode(self):
+        return self.status
+
+    def geturl(self):
+        return self.url
+
+    def close(self):
+        self._body.close()
+
+
+def build_headers(headers):
+    """
+    Return the [name, value] pairs as a message, which keeps the repeated
+    headers like HTTPMessage.
+    :param list headers: the [name, value] pairs of HTTP headers
+    :rtype: email.message.Message
+    """
+    import email.message
+    message = email.message.Message()
+    for name, value in headers or []:
+        message[name] = value
+    return message
+
+
+class PersistentSession(object):
+    """
+    A session sending the requests through the zmf httpapi connection of the
+    play, which holds the login tokens and a kept-alive TLS connection to
+    z/OSMF in the persistent connection daemon.
+    :param Connection connection: the connection to the persistent
+        connection daemon
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def open(self, method, url, data=None, headers=None, **kwargs):
+        from ansible.module_utils.six.moves.urllib.error import HTTPError
+        from ansible.module_utils.six.moves.urllib.parse import urlsplit
+        parts = urlsplit(url)
+        path = parts.path + ('?' + parts.query if parts.query else '')
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        response = self.connection.send_request(method.upper(), path, data, headers)
+        body = (response['body'] or '').encode('utf-8')
+        if response['status'] >= 400:
+            raise HTTPError(url, response['status'], response['reason'],
+                            build_headers(response['headers']), io.BytesIO(body))
+        return ZmfResponse(url, response['status'], response['reason'],
+                           response['headers'], body)
+
+
+def __get_persistent_session(module):
+    """
+    Return the session through the zmf httpapi connection when the task
+    runs with one to the same z/OSMF, or None. The persistent connections of
+    other network OSes, whose httpapi plugins do not talk to z/OSMF, are not
+    used.
+    :param AnsibleModule module: the ansible module
+    :rtype: PersistentSession
+    """
+    socket_path = getattr(module, '_socket_path', None)
+    if not socket_path:
+        return None
+    from ansible.module_utils.connection import Connection, ConnectionError
+    connection = Connection(socket_path)
+    try:
+        network_os = connection.get_option('network_os')
+    except ConnectionError:
+        return None
+    if network_os != HTTPAPI_NETWORK_OS:
+        return None
+    host = connection.get_option('host')
+    zmf_host = module.params.get('zmf_host')
+    if zmf_host is not None and zmf_host.strip() != '' and zmf_host.strip() != host:
+        return None
+    module.params['zmf_host'] = host
+    module.params['zmf_port'] = connection.get_option('port')
+    return PersistentSession(connection)
+
+
+# the SSL contexts built by this process: {(crt, key, ca): SSLContext}
+__ssl_contexts = {}
+# the TLS handshakes done through the SSL contexts of this process
+__tls_stats = dict(handshakes=0, resumed=0, handshake_seconds=0.0)
+
+
+def get_tls_stats():
+    """
+    Return the number of TLS handshakes done by this process, how many of
+    them resumed a previous session, and the seconds spent in them.
+    :rtype: dict
+    """
+    return dict(__tls_stats, contexts=len(__ssl_contexts))
+
+
+def reset_tls_stats():
+    """
+    Reset the TLS handshake counters, and forget the cached sessions.
+    """
+    __tls_stats.update(handshakes=0, resumed=0, handshake_seconds=0.0)
+    for context in __ssl_contexts.values():
+        context.zmf_sessions.clear()
+
+
+def __new_ssl_context(crt, key, ca):
+    """
+    Return an SSL context with the client certificate loaded, which resumes
+    the TLS session of the previous connection to the same server.
+    """
+    import ssl
+    import time
+
+    class ResumingSSLSocket(ssl.SSLSocket):
+        def zmf_keep_session(self):
+            try:
+                if self.session is not None and getattr(self, 'zmf_peer', None) is not None:
+                    self.context.zmf_sessions[self.zmf_peer] = self.session
+            except (AttributeError, ValueError):
+                pass
+
+        def unwrap(self):
+            self.zmf_keep_session()
+            return super(ResumingSSLSocket, self).unwrap()
+
+        def close(self):
+            # the TLS 1.3 tickets arrive after the handshake, keep the session
+            # again once the connection is done with
+            self.zmf_keep_session()
+            super(ResumingSSLSocket, self).close()
+
+    class ResumingSSLContext(ssl.SSLContext):
+        def wrap_socket(self, sock, *args, **kwargs):
+            try:
+                peer = (kwargs.get('server_hostname'),) + tuple(sock.getpeername()[:2])
+            except (OSError, TypeError):
+                peer = None
+            if peer is not None and kwargs.get('session') is None:
+                kwargs['session'] = self.zmf_sessions.get(peer)
+            # the server does a full handshake when it does not accept the
+            # cached session any more
+            start = time.time()
+            ssl_sock = super(ResumingSSLContext, self).wrap_socket(sock, *args, **kwargs)
+            self.zmf_stats['handshakes'] += 1
+            self.zmf_stats['handshake_seconds'] += time.time() - start
+            if ssl_sock.session_reused:
+                self.zmf_stats['resumed'] += 1
+            ssl_sock.zmf_peer = peer
+            # the TLS 1.2 session is known once the handshake is done
+            ssl_sock.zmf_keep_session()
+            return ssl_sock
+
+    context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    if ca is not None:
+        context.load_verify_locations(ca)
+    else:
+        # keep the validate_certs=False of the requests sent by handle_request
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    if crt is not None and key is not None:
+        context.load_cert_chain(crt, key)
+        if hasattr(context, 'post_handshake_auth'):
+            context.post_handshake_auth = True
+    context.sslsocket_class = ResumingSSLSocket
+    context.zmf_sessions = {}
+    context.zmf_stats = __tls_stats
+    return context
+
+
+def get_ssl_context(crt=None, key=None, ca=None):
+    """
+    Return the SSL context for the client certificate and CA bundle. The
+    context is built once per process, so the certificate chain is loaded
+    once and the later connections to the same z/OSMF resume the TLS session
+    instead of doing a full handshake.
+    :param str crt: the PEM-formatted certificate chain file
+    :param str key: the PEM-formatted private key file
+    :param str ca: the CA bundle to verify z/OSMF, or None not to verify it
+    :rtype: ssl.SSLContext
+    """
+    cache_key = (crt, key, ca)
+    if cache_key not in __ssl_contexts:
+        __ssl_contexts[cache_key] = __new_ssl_context(crt, key, ca)
+    return __ssl_contexts[cache_key]
+
+
 def get_connect_session(module):
     """
     Return the connection Request.
+    When zmf_endpoints is supplied, the requests of the session are sent to
+    the fastest healthy member of the sysplex, see __route_session.
     :param AnsibleModule module: the ansible module
     :rtype: Request
     """
+    session = __get_persistent_session(module)
+    if session is not None:
+        return session
+    session = __new_session(module)
+    if module.params.get('zmf_endpoints'):
+        __route_session(module, session)
+    return session
+
+
+def __new_session(module):
+    # ansible.module_utils.urls pulls in the http, ssl and email packages,
+    # import it when a session is needed rather than at module startup
+    from ansible.module_utils.urls import Request
     session = Request()
     crt = module.params['zmf_crt']
     key = module.params['zmf_key']
@@ -58,14 +419,18 @@ def get_connect_session(module):
     if auth is not None and ('ltpa_token_2' in auth or 'jwt_token' in auth):
         # use ltpa_token_2 or jwt_token to authenticate
         if 'ltpa_token_2' in auth:
-            cookie = cookiejar.Cookie(0, 'LtpaToken2', auth['ltpa_token_2'], None, False, auth['zmf_host'],
-                                      True, True, '/', True, False, None, None, None, None, None)
+            __set_token_cookie(session, 'LtpaToken2', auth['ltpa_token_2'], auth['zmf_host'])
         else:
-            cookie = cookiejar.Cookie(0, 'jwtToken', auth['jwt_token'], None, False, auth['zmf_host'],
-                                      True, True, '/', True, False, None, None, None, None, None)
-        cookies = cookiejar.CookieJar()
-        cookies.set_cookie(cookie)
-        session.cookies = cookies
+            __set_token_cookie(session, 'jwtToken', auth['jwt_token'], auth['zmf_host'])
+        session.context = get_ssl_context()
+        # the user and password, or the client cert and key, supplied together
+        # with the credential are used to get a new token once it expires
+        if ((crt is not None and crt.strip() != '')
+                and (key is not None and key.strip() != '')):
+            session.zmf_login = dict(zmf_crt=crt.strip(), zmf_key=key.strip())
+        elif ((user is not None and user.strip() != '')
+                and (pw is not None and pw.strip() != '')):
+            session.zmf_login = dict(zmf_user=user.strip(), zmf_password=pw.strip())
         module.params['zmf_host'] = auth['zmf_host']
         module.params['zmf_port'] = auth['zmf_port']
         return session
@@ -74,13 +439,18 @@ def get_connect_session(module):
         # use client cert and key to authenticate
         session.client_cert = crt.strip()
         session.client_key = key.strip()
+        # Request of ansible-core 2.14 and later uses the context instead of
+        # loading the cert and key, and doing a full handshake, per request
+        session.context = get_ssl_context(session.client_cert, session.client_key)
         return session
     elif ((user is not None and user.strip() != '')
             and (pw is not None and pw.strip() != '')):
-        # use username and password to authenticate
+        # use username and password to authenticate, until z/OSMF returns a
+        # token in a cookie of the session
         session.url_username = user.strip()
         session.url_password = pw.strip()
         session.force_basic_auth = True
+        session.context = get_ssl_context()
         return session
     else:
         # fail the module since auth is must for zosmf connection
@@ -88,6 +458,268 @@ def get_connect_session(module):
                          + ' or zmf_crt/zmf_key are required.')
 
 
+# the health of the z/OSMF endpoints probed or called by this process:
+# {host:port: dict(healthy, latency, probed)}
+__endpoint_health = {}
+__endpoint_lock = threading.Lock()
+# the timeout of the probe of an endpoint of zmf_endpoints, in seconds
+ENDPOINT_PROBE_TIMEOUT = 5
+
+
+def __get_endpoint_cache_file():
+    cache_dir = os.environ.get('ZMF_INFO_CACHE_DIR') \
+        or os.path.join(os.path.expanduser('~'), '.ansible', 'cache', 'ibm_zosmf')
+    return os.path.join(cache_dir, 'zosmf_endpoints.json')
+
+
+def __read_endpoint_cache():
+    """
+    Return the health of the endpoints probed by the module runs of the last
+    ZMF_ENDPOINT_CACHE_TTL seconds (default 60).
+    :rtype: dict[str, dict]
+    """
+    import time
+    ttl = float(os.environ.get('ZMF_ENDPOINT_CACHE_TTL') or 60)
+    if ttl <= 0:
+        return {}
+    try:
+        with open(__get_endpoint_cache_file()) as f:
+            cached = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    if not isinstance(cached, dict):
+        return {}
+    now = time.time()
+    return dict((k, v) for k, v in cached.items()
+                if isinstance(v, dict) and now - v.get('probed', 0) <= ttl)
+
+
+def __write_endpoint_cache():
+    import tempfile
+    filename = __get_endpoint_cache_file()
+    try:
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        cached = __read_endpoint_cache()
+        cached.update(__endpoint_health)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(filename), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(cached, f)
+        os.rename(tmp, filename)
+    except (IOError, OSError):
+        # the cache only saves the probes of the next module runs
+        pass
+
+
+def __set_endpoint_health(netloc, healthy, latency=None):
+    import time
+    with __endpoint_lock:
+        __endpoint_health[netloc] = dict(healthy=healthy, latency=latency, probed=time.time())
+        __write_endpoint_cache()
+
+
+def get_endpoint_health():
+    """
+    Return the health and latency, in seconds, of the z/OSMF endpoints
+    probed or called by this process, keyed by host:port.
+    :rtype: dict[str, dict]
+    """
+    with __endpoint_lock:
+        return json.loads(json.dumps(__endpoint_health))
+
+
+def __route_session(module, session):
+    """
+    Send the requests of the session to the members of zmf_endpoints, which
+    are equivalent z/OSMF servers of a sysplex sharing the same workflow
+    repository. The members are probed concurrently with GET /zosmf/info,
+    and the requests go to the fastest healthy one, see __open.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the current connection session
+    """
+    from ansible.module_utils.six.moves.urllib.parse import urlsplit
+    endpoints = []
+    for entry in module.params['zmf_endpoints']:
+        host, port = parse_zmf_endpoint(entry, module.params['zmf_port'])
+        netloc = format_zmf_host(host) + (':' + str(port) if port else '')
+        if host and netloc not in endpoints:
+            endpoints.append(netloc)
+    if not endpoints:
+        module.fail_json(msg='HTTP setup error: zmf_endpoints has no z/OSMF server.')
+    session.zmf_endpoints = endpoints
+    # a token of zmf_credential is accepted by every member of the sysplex
+    for cookie in __get_token_cookies(session):
+        for netloc in endpoints:
+            __set_token_cookie(session, cookie.name, cookie.value, urlsplit('//' + netloc).hostname)
+    __probe_endpoints(session)
+    __order_endpoints(session)
+    parts = urlsplit('//' + session.zmf_endpoints[0])
+    module.params['zmf_host'] = format_zmf_host(parts.hostname)
+    module.params['zmf_port'] = parts.port
+
+
+def __probe_endpoints(session):
+    """
+    Probe the members of the session not probed within ZMF_ENDPOINT_CACHE_TTL
+    seconds, and wait until one of them answers, or all of them fail. The
+    other probes go on in the background and reorder the members for the
+    later requests, so a slow or dead member does not delay the module.
+    :param Request session: the current connection session
+    """
+    import time
+    if os.environ.get('ZMF_FIXTURE_REPLAY'):
+        return
+    from ansible.module_utils.urls import Request
+    with __endpoint_lock:
+        for netloc, health in __read_endpoint_cache().items():
+            __endpoint_health.setdefault(netloc, health)
+        stale = [e for e in session.zmf_endpoints if e not in __endpoint_health]
+        known_healthy = any(__endpoint_health.get(e, {}).get('healthy') for e in session.zmf_endpoints)
+    if not stale:
+        return
+    answered = threading.Event()
+    pending = [len(stale)]
+    probe_session = Request()
+    probe_session.context = getattr(session, 'context', None)
+    probe_session.client_cert = getattr(session, 'client_cert', None)
+    probe_session.client_key = getattr(session, 'client_key', None)
+
+    def probe(netloc):
+        start = time.time()
+        info = None
+        try:
+            response = probe_session.open('GET', 'https://' + netloc + '/zosmf/info',
+                                          headers=__get_request_headers(), validate_certs=False,
+                                          timeout=ENDPOINT_PROBE_TIMEOUT)
+            info = json_loads(response.read())
+        except Exception:
+            pass
+        healthy = isinstance(info, dict)
+        __set_endpoint_health(netloc, healthy, time.time() - start if healthy else None)
+        if healthy:
+            # the probe also answers get_zosmf_info of the member
+            host, port = parse_zmf_endpoint(netloc)
+            __write_zosmf_info_cache(host, str(port or ''), info)
+        with __endpoint_lock:
+            pending[0] -= 1
+            if healthy or pending[0] == 0:
+                answered.set()
+
+    for netloc in stale:
+        thread = threading.Thread(target=probe, args=(netloc,))
+        thread.daemon = True
+        thread.start()
+    if not known_healthy:
+        answered.wait(ENDPOINT_PROBE_TIMEOUT + 1)
+
+
+def __order_endpoints(session):
+    """
+    Sort the members of the session: the healthy ones by latency, then the
+    ones not probed yet, then the failed ones, which are still tried last.
+    :param Request session: the current connection session
+    """
+    with __endpoint_lock:
+        health = dict((e, __endpoint_health.get(e)) for e in session.zmf_endpoints)
+    rank = dict((e, i) for i, e in enumerate(session.zmf_endpoints))
+
+    def key(netloc):
+        if health[netloc] is None:
+            return (1, 0, rank[netloc])
+        if not health[netloc]['healthy']:
+            return (2, 0, rank[netloc])
+        return (0, health[netloc]['latency'] or 0, rank[netloc])
+
+    session.zmf_endpoints = sorted(session.zmf_endpoints, key=key)
+
+
+def __can_fail_over(method, ex):
+    """
+    Return whether the request failed with the given error can be sent to
+    another member. A GET is always sent again. The other requests change
+    the shared workflow repository, e.g. create or start a workflow, so they
+    are sent again only when the connection could not be set up, and never
+    once the member may have run them.
+    :param str method: the method of HTTP request
+    :param Exception ex: the error of the request
+    :rtype: bool
+    """
+    from ansible.module_utils.six.moves.urllib.error import URLError
+    return method == 'get' or isinstance(ex, URLError)
+
+
+# the JSON library used for request and response bodies, selected on first use
+__json_backend = {}
+
+
+def get_json_backend():
+    """
+    Return the name of the JSON library used for request and response bodies.
+    orjson or ujson is used when installed, unless ZMF_JSON_BACKEND selects
+    another one; json of the standard library is used otherwise.
+    :rtype: str
+    """
+    if __json_backend:
+        return __json_backend['name']
+    wanted = (os.environ.get('ZMF_JSON_BACKEND') or 'auto').strip().lower()
+    candidates = ['orjson', 'ujson'] if wanted == 'auto' else [wanted]
+    __json_backend.update(name='json', loads=None, dumps=None)
+    for name in candidates:
+        try:
+            if name == 'orjson':
+                import orjson
+                __json_backend.update(name=name, loads=orjson.loads, dumps=orjson.dumps)
+            elif name == 'ujson':
+                import ujson
+                __json_backend.update(name=name, loads=ujson.loads,
+                                      dumps=lambda obj: ujson.dumps(obj, ensure_ascii=True,
+                                                                    escape_forward_slashes=False))
+            else:
+                continue
+            break
+        except ImportError:
+            continue
+    return __json_backend['name']
+
+
+def json_loads(content):
+    """
+    Return the object decoded from the JSON content.
+    The content the fast library rejects, such as NaN or integers over 64
+    bits, is decoded by json of the standard library.
+    :param bytes content: the JSON content
+    :rtype: dict or list
+    """
+    get_json_backend()
+    if __json_backend['loads'] is not None:
+        try:
+            return __json_backend['loads'](content)
+        except Exception:
+            pass
+    return json.loads(content)
+
+
+def json_dumps(obj):
+    """
+    Return the JSON content of the object.
+    The fast library is only used when its output is plain ASCII, so that
+    the non-ASCII characters are escaped as json of the standard library
+    does.
+    :param dict obj: the object to be encoded
+    :rtype: str or bytes
+    """
+    get_json_backend()
+    if __json_backend['dumps'] is not None:
+        try:
+            content = __json_backend['dumps'](obj)
+            if isinstance(content, bytes):
+                content.decode('ascii')
+            return content
+        except Exception:
+            pass
+    return json.dumps(obj)
+
+
 def __get_request_headers():
     """
     Return the request headers for calling z/OSMF APIs.
@@ -96,6 +728,366 @@ def __get_request_headers():
     return {'X-CSRF-ZOSMF-HEADER': 'ZOSMF'}
 
 
+def __send_request(session, method, url, params=None, header=None,
+                   timeout=30, body=None):
+    """
+    Send the HTTP request and return the response.
+    The request is recorded to or replayed from fixture files when
+    ZMF_FIXTURE_RECORD or ZMF_FIXTURE_REPLAY is set.
+    :param Request session: the current connection session
+    :param str method: the method of HTTP request
+    :param str url: the URL of HTTP request
+    :param dict params: the params of HTTP request
+    :param dict header: the header of HTTP request
+    :param int timeout: the timeout of HTTP request
+    :param str body: the body of HTTP request
+    :rtype: HTTPResponse
+    """
+    headers = __get_request_headers()
+    if header is not None:
+        headers.update(header)
+    data = None
+    if method == 'get':
+        # convert params dict to string and append it to the URL
+        url = url + '?' + "&".join(["=".join([key, str(val)]) for key, val in params.items()])
+    elif method == 'put' or method == 'post':
+        if body is not None:
+            data = body
+        else:
+            data = json_dumps(params)
+    from ansible.module_utils.six.moves.urllib.error import HTTPError
+    # the request is sent with a copy of the session taken under the lock, so
+    # another thread switching or renewing the auth of the session cannot
+    # change it half way; the copy shares the cookie jar of the session
+    sent, generation = __snapshot_session(session)
+    try:
+        response = __open(sent, method, url, data, headers, timeout)
+    except HTTPError as ex:
+        ex = __check_auth_error(ex)
+        if ex.code != 401:
+            raise ex
+        with __auth_lock:
+            # another thread may have switched or renewed the auth meanwhile
+            if getattr(session, 'zmf_auth_generation', 0) == generation \
+                    and not (__use_basic_auth(session) or __renew_token(session, url, timeout)):
+                raise ex
+            sent, generation = __snapshot_session(session)
+        # the token is expired or revoked, send the request again with the
+        # user and password, or with the token just renewed
+        response = __open(sent, method, url, data, headers, timeout)
+    with __auth_lock:
+        __use_token_auth(session)
+    return response
+
+
+def __snapshot_session(session):
+    """
+    Return a copy of the session to send one request with, and the count of
+    auth changes of the session it was taken at.
+    :param Request session: the current connection session
+    :rtype: (Request, int)
+    """
+    with __auth_lock:
+        return copy.copy(session), getattr(session, 'zmf_auth_generation', 0)
+
+
+def __bump_auth_generation(session):
+    """
+    Record a change of the auth of the session, made under the auth lock.
+    :param Request session: the current connection session
+    """
+    session.zmf_auth_generation = getattr(session, 'zmf_auth_generation', 0) + 1
+
+
+def __open(session, method, url, data, headers, timeout):
+    """
+    Open the URL, on the fastest healthy member of zmf_endpoints when the
+    session has some, and fail over to the next member on connection errors.
+    """
+    import socket
+    from ansible.module_utils.six.moves.urllib.error import HTTPError, URLError
+    from ansible.module_utils.six.moves.urllib.parse import urlsplit, urlunsplit
+    if not getattr(session, 'zmf_endpoints', None):
+        return __open_url(session, method, url, data, headers, timeout)
+    parts = urlsplit(url)
+    __order_endpoints(session)
+    endpoints = list(session.zmf_endpoints)
+    for netloc in endpoints:
+        session.zmf_endpoint = netloc
+        try:
+            endpoint_url = urlunsplit((parts.scheme, netloc, parts.path, parts.query, parts.fragment))
+            return __open_url(session, method, endpoint_url, data, headers, timeout)
+        except HTTPError:
+            # the member is up and answered
+            raise
+        except (URLError, socket.error) as ex:
+            __set_endpoint_health(netloc, False)
+            if netloc == endpoints[-1] or not __can_fail_over(method, ex):
+                raise
+
+
+def __open_url(session, method, url, data, headers, timeout):
+    if os.environ.get('ZMF_FIXTURE_REPLAY') or os.environ.get('ZMF_FIXTURE_RECORD'):
+        from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_fixture import \
+            open_with_fixtures
+        return open_with_fixtures(session, method, url, data, headers, timeout)
+    return session.open(method.upper(), url, data=data, headers=headers,
+                        validate_certs=False, timeout=timeout)
+
+
+def __check_auth_error(ex):
+    """
+    Return the HTTP error, as a 401 one when its body is a z/OSMF
+    authentication error.
+    :param HTTPError ex: the HTTP error
+    :rtype: HTTPError
+    """
+    if ex.code == 401 or ex.code < 400:
+        return ex
+    from ansible.module_utils.six.moves.urllib.error import HTTPError
+    content = ex.read()
+    code = ex.code
+    try:
+        response_content = json_loads(content) if content else {}
+    except Exception:
+        response_content = {}
+    if isinstance(response_content, dict) and response_content.get('messageID') in AUTH_ERROR_MESSAGES:
+        code = 401
+    return HTTPError(ex.geturl(), code, ex.reason, ex.headers, io.BytesIO(content))
+
+
+def __set_token_cookie(session, name, value, host):
+    """
+    Put the token in the cookie jar of the session.
+    :param Request session: the current connection session
+    :param str name: the name of the token cookie
+    :param str value: the value of the token
+    :param str host: the hostname of the z/OSMF server
+    """
+    import ansible.module_utils.six.moves.http_cookiejar as cookiejar
+    if not isinstance(getattr(session, 'cookies', None), cookiejar.CookieJar):
+        session.cookies = cookiejar.CookieJar()
+    session.cookies.set_cookie(cookiejar.Cookie(0, name, value, None, False, host,
+                                                True, True, '/', True, False, None, None, None, None, None))
+
+
+def __renew_token(session, url, timeout):
+    """
+    Log in to z/OSMF again with the user and password, or the client cert
+    and key, supplied together with zmf_credential, and replace the expired
+    token of the session. This is done once per session, under the auth
+    lock, so the threads sharing the session wait for it.
+    :param Request session: the current connection session
+    :param str url: the URL of the rejected HTTP request
+    :param int timeout: the timeout of HTTP request
+    :rtype: bool
+    """
+    login = getattr(session, 'zmf_login', None)
+    if not login:
+        return False
+    session.zmf_login = None
+    from ansible.module_utils.six.moves.urllib.error import HTTPError, URLError
+    from ansible.module_utils.six.moves.urllib.parse import urlsplit
+    from ansible.module_utils.urls import Request
+    parts = urlsplit(url)
+    login_session = Request()
+    login_session.zmf_endpoints = getattr(session, 'zmf_endpoints', None)
+    if 'zmf_crt' in login:
+        login_session.client_cert = login['zmf_crt']
+        login_session.client_key = login['zmf_key']
+        login_session.context = get_ssl_context(login['zmf_crt'], login['zmf_key'])
+    else:
+        login_session.url_username = login['zmf_user']
+        login_session.url_password = login['zmf_password']
+        login_session.force_basic_auth = True
+        login_session.context = get_ssl_context()
+    headers = __get_request_headers()
+    headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    try:
+        response = __open(login_session, 'post', parts.scheme + '://' + parts.netloc + AUTH_PATH,
+                          None, headers, timeout)
+    except (HTTPError, URLError):
+        return False
+    credential = {}
+    for value in response.headers.get_all('Set-Cookie') or []:
+        for name, key in (('LtpaToken2', 'ltpa_token_2'), ('jwtToken', 'jwt_token')):
+            if value.strip().startswith(name + '='):
+                credential[key] = value.strip()[len(name) + 1:].split(';')[0]
+    if not credential:
+        return False
+    for cookie in __get_token_cookies(session):
+        session.cookies.clear(cookie.domain, cookie.path, cookie.name)
+    if login_session.zmf_endpoints:
+        parts = urlsplit('//' + login_session.zmf_endpoint)
+        hosts = [urlsplit('//' + netloc).hostname for netloc in login_session.zmf_endpoints]
+    else:
+        hosts = [parts.hostname]
+    for host in hosts:
+        if 'ltpa_token_2' in credential:
+            __set_token_cookie(session, 'LtpaToken2', credential['ltpa_token_2'], host)
+        else:
+            __set_token_cookie(session, 'jwtToken', credential['jwt_token'], host)
+    __bump_auth_generation(session)
+    credential['zmf_host'] = parts.hostname
+    credential['zmf_port'] = parts.port
+    __renewed_credential.clear()
+    __renewed_credential.update(credential)
+    return True
+
+
+def get_renewed_credential():
+    """
+    Return the credential obtained when the token of zmf_credential expired
+    during the module run, in the format returned by zmf_authenticate, or
+    None.
+    :rtype: dict
+    """
+    if __renewed_credential:
+        return dict(__renewed_credential)
+    return None
+
+
+def exit_module(module, **kwargs):
+    """
+    Exit the module with the result, and the renewed zmf_credential when the
+    token of the supplied one expired during the module run, so the later
+    tasks can use it.
+    :param AnsibleModule module: the ansible module
+    """
+    credential = get_renewed_credential()
+    if credential is not None:
+        kwargs['zmf_credential'] = credential
+    module.exit_json(**kwargs)
+
+
+def return_renewed_credential(module):
+    """
+    Make the module fail with the renewed zmf_credential too, when the token
+    of the supplied one expired during the module run, so the later tasks,
+    such as the rescue ones, can use it.
+    :param AnsibleModule module: the ansible module
+    """
+    fail_json = module.fail_json
+
+    def fail_with_credential(**kwargs):
+        credential = get_renewed_credential()
+        if credential is not None:
+            kwargs['zmf_credential'] = credential
+        fail_json(**kwargs)
+
+    module.fail_json = fail_with_credential
+
+
+def get_result_argument_spec():
+    """
+    Return the arguments of ansible module used to choose the detail of the
+    module result.
+    :rtype: dict[str, dict]
+    """
+    return dict(
+        result_detail=dict(required=False, type='str', default='normal',
+                           choices=['minimal', 'normal', 'full']),
+        result_file=dict(required=False, type='str')
+    )
+
+
+def apply_result_detail(module, result, minimal_keys, full_keys=(),
+                        minimal_item_keys=None):
+    """
+    Return the module result with the detail chosen by result_detail.
+    With full, the result is returned as it is. With normal, the keys only
+    returned with full are removed. With minimal, only changed, failed, msg
+    and the minimal keys are kept, and the dicts in the lists named in
+    minimal_item_keys only keep the given keys. The full result is written
+    to result_file in JSON first, when it is supplied, and its location is
+    returned as result_file.
+    :param AnsibleModule module: the ansible module
+    :param dict result: the full result of the module
+    :param tuple minimal_keys: the keys kept with result_detail=minimal
+    :param tuple full_keys: the keys only returned with result_detail=full
+    :param dict[str, tuple] minimal_item_keys: the keys kept in the dicts of
+        the given lists with result_detail=minimal
+    :rtype: dict
+    """
+    detail = module.params.get('result_detail') or 'normal'
+    if detail == 'full':
+        return result
+    if detail == 'normal':
+        return dict((k, v) for k, v in result.items() if k not in full_keys)
+    result_file = module.params.get('result_file')
+    if result_file is not None and result_file.strip() != '':
+        import tempfile
+        result_file = os.path.abspath(os.path.expanduser(result_file.strip()))
+        try:
+            if not os.path.isdir(os.path.dirname(result_file)):
+                os.makedirs(os.path.dirname(result_file))
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(result_file), suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(result, f)
+            os.rename(tmp, result_file)
+        except (IOError, OSError) as ex:
+            module.fail_json(msg='Failed to write the result file: ' + result_file + ' ---- ' + str(ex))
+    else:
+        result_file = None
+    kept = ('changed', 'failed', 'msg') + tuple(minimal_keys)
+    minimal = dict((k, v) for k, v in result.items() if k in kept)
+    for k, item_keys in (minimal_item_keys or {}).items():
+        if isinstance(minimal.get(k), list):
+            minimal[k] = [dict((i, item[i]) for i in item_keys if i in item) if isinstance(item, dict) else item
+                          for item in minimal[k]]
+    if result_file is not None:
+        minimal['result_file'] = result_file
+    return minimal
+
+
+def __get_token_cookies(session):
+    """
+    Return the LTPA2 and JWT token cookies held by the session.
+    :param Request session: the current connection session
+    :rtype: list[Cookie]
+    """
+    cookies = getattr(session, 'cookies', None)
+    if cookies is None:
+        return []
+    return [cookie for cookie in cookies if cookie.name in TOKEN_COOKIES]
+
+
+def __use_token_auth(session):
+    """
+    Stop sending the user and password once z/OSMF has returned a token, so
+    the later requests are not authenticated against the security product
+    again. The user and password are kept in case the token is rejected.
+    :param Request session: the current connection session
+    """
+    if not getattr(session, 'force_basic_auth', False) or not session.url_username:
+        return
+    if __get_token_cookies(session):
+        session.zmf_basic_auth = (session.url_username, session.url_password)
+        session.url_username = None
+        session.url_password = None
+        session.force_basic_auth = False
+        __bump_auth_generation(session)
+
+
+def __use_basic_auth(session):
+    """
+    Drop the token cookies and send the user and password again, if the
+    session switched from them to a token.
+    :param Request session: the current connection session
+    :rtype: bool
+    """
+    basic_auth = getattr(session, 'zmf_basic_auth', None)
+    if basic_auth is None:
+        return False
+    for cookie in __get_token_cookies(session):
+        session.cookies.clear(cookie.domain, cookie.path, cookie.name)
+    session.url_username, session.url_password = basic_auth
+    session.force_basic_auth = True
+    session.zmf_basic_auth = None
+    __bump_auth_generation(session)
+    return True
+
+
 def handle_request(module, session, method, url, params=None, rcode=200,
                    header=None, timeout=30, body=None):
     """
@@ -111,33 +1103,9 @@ def handle_request(module, session, method, url, params=None, rcode=200,
     :param str body: the body of HTTP request
     :rtype: dict or str
     """
-    headers = __get_request_headers()
-    if header is not None:
-        headers.update(header)
     try:
-        if method == 'get':
-            # convert params dict to string and append it to the URL
-            response = session.get(url + '?' + "&".join(["=".join([key, str(val)]) for key, val in params.items()]),
-                                   headers=headers, validate_certs=False, timeout=timeout)
-        elif method == 'put':
-            if body is not None:
-                response = session.put(url, data=body, headers=headers,
-                                       validate_certs=False, timeout=timeout)
-            else:
-                response = session.put(url, data=json.dumps(params),
-                                       headers=headers, validate_certs=False,
-                                       timeout=timeout)
-        elif method == 'post':
-            if body is not None:
-                response = session.post(url, data=body, headers=headers,
-                                        validate_certs=False, timeout=timeout)
-            else:
-                response = session.post(url, data=json.dumps(params),
-                                        headers=headers, validate_certs=False,
-                                        timeout=timeout)
-        elif method == 'delete':
-            response = session.delete(url, headers=headers, validate_certs=False,
-                                      timeout=timeout)
+        response = __send_request(session, method, url, params, header,
+                                  timeout, body)
     except Exception as ex:
         if 'status' in dir(ex) and ex.status is not None:
             # In v2r3, response content is a string which will cause error in json.loads.
@@ -146,7 +1114,7 @@ def handle_request(module, session, method, url, params=None, rcode=200,
 
             content = ex.read()
             if content:
-                response_content = json.loads(content)
+                response_content = json_loads(content)
                 if 'messageText' in response_content:
                     return 'HTTP request error: ' + str(ex.status) + ' : ' \
                            + response_content['messageText']
@@ -182,7 +1150,7 @@ def handle_request(module, session, method, url, params=None, rcode=200,
         content = response.read()
 
         if content:
-            response_content = json.loads(content)
+            response_content = json_loads(content)
         else:
             response_content = {}
 
@@ -204,38 +1172,136 @@ def handle_request(module, session, method, url, params=None, rcode=200,
 
 def handle_request_raw(module, session, method, url, params=None, header=None,
                        body=None, timeout=30):
-    headers = __get_request_headers()
-    if header is not None:
-        headers.update(header)
+    """
+    Return the raw content of the response of HTTP request.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the current connection session
+    :param str method: the method of HTTP request
+    :param str url: the URL of HTTP request
+    :param dict params: the params of HTTP request
+    :param dict header: the header of HTTP request
+    :param str body: the body of HTTP request
+    :param int timeout: the timeout of HTTP request
+    :rtype: bytes
+    """
     try:
-        if method == 'get':
-            response = session.get(url + '?' + "&".join(["=".join([key, str(val)]) for key, val in params.items()]),
-                                   headers=headers, validate_certs=False, timeout=timeout)
-        elif method == 'put':
-            if body is not None:
-                response = session.put(url, data=body, headers=headers,
-                                       validate_certs=False, timeout=timeout)
-            else:
-                response = session.put(url, data=json.dumps(params),
-                                       headers=headers, validate_certs=False,
-                                       timeout=timeout)
-        elif method == 'post':
-            if body is not None:
-                response = session.post(url, data=body, headers=headers,
-                                        validate_certs=False, timeout=timeout)
-            else:
-                response = session.post(url, data=json.dumps(params),
-                                        headers=headers, validate_certs=False,
-                                        timeout=timeout)
-        elif method == 'delete':
-            response = session.delete(url, headers=headers, validate_certs=False,
-                                      timeout=timeout)
+        response = __send_request(session, method, url, params, header,
+                                  timeout, body)
     except Exception as ex:
         module.fail_json(msg='HTTP request error: ' + repr(ex))
     else:
         return response.read()
 
 
+# the z/OSMF information of the servers called by this process: {host:port: info}
+__zosmf_info = {}
+
+
+def __get_zosmf_info_cache_file(host, port):
+    cache_dir = os.environ.get('ZMF_INFO_CACHE_DIR') \
+        or os.path.join(os.path.expanduser('~'), '.ansible', 'cache', 'ibm_zosmf')
+    name = (host + '_' + str(port or 443)).replace(os.sep, '_').replace(':', '_')
+    return os.path.join(cache_dir, 'zosmf_info_' + name + '.json')
+
+
+def __read_zosmf_info_cache(host, port):
+    """
+    Return the cached z/OSMF information of the server, or None when it is
+    not cached or older than ZMF_INFO_CACHE_TTL seconds (default 3600).
+    """
+    import time
+    ttl = float(os.environ.get('ZMF_INFO_CACHE_TTL') or 3600)
+    if ttl <= 0:
+        return None
+    try:
+        with open(__get_zosmf_info_cache_file(host, port)) as f:
+            cached = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or time.time() - cached.get('probed', 0) > ttl:
+        return None
+    return cached.get('info')
+
+
+def __write_zosmf_info_cache(host, port, info):
+    import tempfile
+    import time
+    filename = __get_zosmf_info_cache_file(host, port)
+    try:
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(filename), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(dict(probed=time.time(), info=info), f)
+        os.rename(tmp, filename)
+    except (IOError, OSError):
+        # the cache only saves the probe of the next module runs
+        pass
+
+
+def get_zosmf_info(module, session, probe=True):
+    """
+    Return the information of the z/OSMF server from /zosmf/info: the
+    version of z/OSMF and z/OS, the installed plugins and the API level.
+    The information is cached on the controller for ZMF_INFO_CACHE_TTL
+    seconds, in ZMF_INFO_CACHE_DIR (default ~/.ansible/cache/ibm_zosmf), so
+    the server is probed once for all module runs. Return None when the
+    server cannot be probed, or when it is not cached and probe is False.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the current connection session
+    :param bool probe: whether to call /zosmf/info when not cached
+    :rtype: dict
+    """
+    host = module.params['zmf_host'].strip()
+    port = module.params['zmf_port']
+    port = str(port).strip() if port is not None else ''
+    key = host + ':' + port
+    if key in __zosmf_info:
+        return __zosmf_info[key]
+    info = __read_zosmf_info_cache(host, port)
+    if info is None and probe:
+        url = 'https://' + host + (':' + port if port else '') + '/zosmf/info'
+        try:
+            response = __send_request(session, 'get', url, {})
+            info = json_loads(response.read())
+        except Exception:
+            info = None
+        if isinstance(info, dict):
+            __write_zosmf_info_cache(host, port, info)
+        else:
+            info = None
+    if info is not None:
+        __zosmf_info[key] = info
+    return info
+
+
+def get_zosmf_version(info):
+    """
+    Return the version of z/OSMF as a number, e.g. 27 for z/OSMF V2R4, or
+    None when unknown.
+    :param dict info: the z/OSMF information from get_zosmf_info
+    :rtype: int
+    """
+    try:
+        return int(str((info or {}).get('zosmf_version')).split('.')[0])
+    except ValueError:
+        return None
+
+
+def get_zosmf_plugin(info, name):
+    """
+    Return the z/OSMF plugin whose default name contains the given name, or
+    None when it is not installed or unknown.
+    :param dict info: the z/OSMF information from get_zosmf_info
+    :param str name: the name of the plugin
+    :rtype: dict
+    """
+    for plugin in (info or {}).get('plugins') or []:
+        if name.lower() in str(plugin.get('pluginDefaultName', '')).lower():
+            return plugin
+    return None
+
+
 def cmp_list(list1, list2):
     """
     Recursively compare the given lists.
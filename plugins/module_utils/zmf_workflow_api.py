@@ -6,6 +6,7 @@ __metaclass__ = type
 
 from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import \
     handle_request
+import hashlib
 import json
 import re
 
@@ -18,13 +19,19 @@ def __get_workflow_api_version():
     return '1.0'
 
 
+# the API table is built on first use and reused for the rest of the module run
+__workflow_apis = {}
+
+
 def __get_workflow_apis():
     """
     Return the details of all z/OSMF workflow services APIs.
     :rtype: dict[str, dict]
     """
+    if __workflow_apis:
+        return __workflow_apis
     version = __get_workflow_api_version()
-    return dict(
+    __workflow_apis.update(dict(
         # list the z/OSMF workflow instances for a system or sysplex
         list=dict(
             method='get',
@@ -184,7 +191,8 @@ def __get_workflow_apis():
             args={},
             ok_rcode=204
         )
-    )
+    ))
+    return __workflow_apis
 
 
 def __get_workflow_api_argument_spec(api):
@@ -301,17 +309,86 @@ def __parse_dict_vars(module, dict_vars):
     return list_vars
 
 
-def call_workflow_api(module, session, api, workflow_key):
+# the marker of the spec fingerprint, appended to the comments of the
+# workflow instances created by the module
+__fingerprint_marker = re.compile(r'\s*\[ansible-fp:([0-9a-f]+)\]\s*$')
+
+
+def get_workflow_fingerprint(module):
+    """
+    Return the fingerprint of the workflow instance requested by the module
+    arguments: its definition file, variables and properties, as supplied to
+    the create API. The values are compared ignoring case and leading or
+    trailing blanks, like is_same_workflow_instance does.
+    :param AnsibleModule module: the ansible module
+    :rtype: str
+    """
+    spec = {}
+    for k, v in __get_workflow_apis()['create']['args'].items():
+        if k == 'workflowName':
+            # the workflow instance is found by name
+            continue
+        value = module.params.get(v['nickname'])
+        if k == 'comments':
+            value = split_workflow_fingerprint(value)[0]
+        elif k == 'owner' and (value is None or str(value).strip() == ''):
+            value = module.params['zmf_user']
+        if k == 'variables':
+            value = dict((kk, vv if isinstance(vv, list) else str(vv).strip().lower())
+                         for kk, vv in (value or {}).items()
+                         if vv is not None and str(vv).strip() != '') or None
+        elif value is None or str(value).strip() == '':
+            value = v.get('default')
+        if isinstance(value, str):
+            value = value.strip().lower()
+        spec[k] = value
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def add_workflow_fingerprint(comments, fingerprint):
+    """
+    Return the comments of the workflow instance with the fingerprint marker
+    appended.
+    :param str comments: the comments supplied by the user
+    :param str fingerprint: the fingerprint of the workflow instance
+    :rtype: str
+    """
+    comments = split_workflow_fingerprint(comments)[0]
+    return (comments + ' ' if comments else '') + '[ansible-fp:' + fingerprint + ']'
+
+
+def split_workflow_fingerprint(comments):
+    """
+    Return the comments of the workflow instance without the fingerprint
+    marker, and the fingerprint, None if there is no marker.
+    :param str comments: the comments of the workflow instance
+    :rtype: (str, str)
+    """
+    if comments is None:
+        return (None, None)
+    comments = str(comments)
+    match = __fingerprint_marker.search(comments)
+    if match is None:
+        return (comments.strip(), None)
+    return (comments[:match.start()].strip(), match.group(1))
+
+
+def call_workflow_api(module, session, api, workflow_key, params=None):
     """
     Return the response or error message of the specific workflow API.
     :param AnsibleModule module: the ansible module
     :param Request session: the current connection session
     :param str api: the name of API
     :param str workflow_key: the key of workflow instance
+    :param dict params: the params of API, parsed from the module arguments
+                        when not supplied
     :rtype: dict or str
     """
     zmf_api = __get_workflow_api_argument_spec(api)
     zmf_api_url = __get_workflow_api_url(module, zmf_api['url'], workflow_key)
+    if params is not None:
+        return handle_request(module, session, zmf_api['method'],
+                              zmf_api_url, params, zmf_api['ok_rcode'])
     zmf_api_params = __get_workflow_api_params(module, zmf_api['args'])
     if ((module.params['state'] == 'existed'
             or module.params['state'] == 'deleted') and api == 'list'):
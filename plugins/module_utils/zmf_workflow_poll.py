@@ -0,0 +1,695 @@
+# Copyright (c) IBM Corporation 2021
+# Apache License, Version 2.0 (see https://opensource.org/licenses/Apache-2.0)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import (
+    run_in_parallel,
+    HostFailure,
+    HostModule
+)
+from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_workflow_api \
+    import call_workflow_api
+import json
+import os
+import re
+
+# the status of the workflow instances whose automation is still running
+RUNNING_STATUS = 'automation-in-progress'
+
+
+def __get_poll_dir(module):
+    """
+    Return the directory shared by the checks of the workflow instances on
+    the same z/OSMF server as the same user.
+    :param AnsibleModule module: the ansible module
+    :rtype: str
+    """
+    cache_dir = os.environ.get('ZMF_POLL_DIR') \
+        or os.path.join(os.environ.get('ZMF_INFO_CACHE_DIR')
+                        or os.path.join(os.path.expanduser('~'), '.ansible', 'cache', 'ibm_zosmf'), 'poll')
+    name = '_'.join([str(module.params['zmf_host'] or '').strip(),
+                     str(module.params['zmf_port'] or '').strip(),
+                     str(module.params['zmf_user'] or '').strip()])
+    return os.path.join(cache_dir, re.sub('[^A-Za-z0-9_.-]', '_', name))
+
+
+def __read_json(filename):
+    try:
+        with open(filename) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def __write_json(filename, content):
+    import tempfile
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(filename), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(content, f)
+    os.rename(tmp, filename)
+
+
+def __remove(filename):
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+
+class PollLock(object):
+    """
+    The lock of the poll directory, held while the files of the poller are
+    read and written, not while the z/OSMF server is polled.
+    """
+
+    def __init__(self, poll_dir):
+        self.filename = os.path.join(poll_dir, 'lock')
+
+    def __enter__(self):
+        import fcntl
+        self.file = open(self.filename, 'a')
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *args):
+        import fcntl
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+def __properties_file(poll_dir, workflow_key):
+    return os.path.join(poll_dir, re.sub('[^A-Za-z0-9_.-]', '_', workflow_key) + '.json')
+
+
+def __get_running(poll_dir, index):
+    """
+    Return the cached properties of the waited workflow instances still
+    running, by workflow key.
+    :param str poll_dir: the poll directory
+    :param dict index: the index of the poll directory
+    :rtype: dict
+    """
+    running = {}
+    for workflow_key in index['waiting']:
+        properties = __read_json(__properties_file(poll_dir, workflow_key))
+        if properties is not None and properties.get('statusName') == RUNNING_STATUS:
+            running[workflow_key] = properties
+    return running
+
+
+def __tick(module, session, running):
+    """
+    Poll the z/OSMF server for all the waiting checks: list the workflow
+    instances still running with one call, and retrieve the properties of
+    the running ones missing from the list, whose status has changed.
+    Return the new properties of these workflow instances, or the error
+    message of their retrieval, by workflow key. A workflow instance whose
+    status is unknown, because the list failed, is returned with None.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the current connection session
+    :param dict running: the cached properties of the running workflow
+        instances, by workflow key
+    :rtype: dict
+    """
+    def call(*args):
+        try:
+            return call_workflow_api(HostModule(module), session, *args)
+        except HostFailure as ex:
+            return ex.result.get('msg', '')
+
+    params = dict(statusName=RUNNING_STATUS)
+    owners = set(p.get('owner') for p in running.values())
+    if len(owners) == 1 and None not in owners:
+        params['owner'] = owners.pop()
+    response_list = call('list', None, params)
+    if not isinstance(response_list, dict):
+        # every check retrieves the properties of its own workflow instance
+        return dict((k, None) for k in running)
+    listed = set(w.get('workflowKey') for w in response_list.get('workflows') or [])
+    changed = [k for k in running if k not in listed]
+    return dict(zip(changed, run_in_parallel(lambda k: call('retrieveProperties', k), changed)))
+
+
+def poll_workflow_properties(module, session, workflow_key, interval):
+    """
+    Return the properties of the workflow instance, as returned by the
+    retrieveProperties API, through the poller shared by all the checks of
+    workflow instances on the same z/OSMF server on this controller.
+    The first check of every interval lists the running workflow instances
+    with one call, and retrieves the properties of those whose status has
+    changed. The other checks of the interval are answered from the poll
+    directory, in ZMF_POLL_DIR or ZMF_INFO_CACHE_DIR
+    (default ~/.ansible/cache/ibm_zosmf/poll), without calling z/OSMF.
+    The poll directory is locked only while its files are read and written,
+    so the other checks do not wait for the requests of the poll.
+    Return the error message when the properties cannot be retrieved.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the current connection session
+    :param str workflow_key: the key of workflow instance
+    :param int interval: the seconds between two polls of the z/OSMF server
+    :rtype: dict or str
+    """
+    import time
+    poll_dir = __get_poll_dir(module)
+    try:
+        if not os.path.isdir(poll_dir):
+            os.makedirs(poll_dir)
+        lock = PollLock(poll_dir)
+        with lock:
+            pass
+    except (IOError, OSError, ImportError):
+        # no shared directory or file lock on this controller
+        return call_workflow_api(module, session, 'retrieveProperties', workflow_key)
+    index_file = os.path.join(poll_dir, 'index.json')
+    properties_file = __properties_file(poll_dir, workflow_key)
+    running = None
+    with lock:
+        now = time.time()
+        index = __read_json(index_file) or {}
+        waiting = index.setdefault('waiting', {})
+        # forget the checks which stopped waiting without seeing the end
+        for k, seen in list(waiting.items()):
+            if now - seen > max(60, 3 * interval) and k != workflow_key:
+                waiting.pop(k)
+                __remove(__properties_file(poll_dir, k))
+        if workflow_key not in waiting:
+            # a new check never sees the properties cached for an earlier one
+            __remove(properties_file)
+        waiting[workflow_key] = now
+        if now - index.get('tick', 0) >= interval:
+            # the poll of this interval is done by this check only
+            index['tick'] = now
+            running = __get_running(poll_dir, index)
+        __write_json(index_file, index)
+        properties = __read_json(properties_file)
+    if running:
+        polled = __tick(module, session, running)
+        with lock:
+            waiting = (__read_json(index_file) or {}).get('waiting') or {}
+            for k, response in polled.items():
+                if k not in waiting:
+                    continue
+                if isinstance(response, dict):
+                    __write_json(__properties_file(poll_dir, k), response)
+                elif response is None:
+                    __remove(__properties_file(poll_dir, k))
+                else:
+                    # the check of the workflow instance fails with the error
+                    __write_json(__properties_file(poll_dir, k), dict(poll_error=response))
+            properties = __read_json(properties_file)
+    if properties is not None and 'poll_error' in properties:
+        with lock:
+            __remove(properties_file)
+        return properties['poll_error']
+    if properties is None:
+        # the first check of the workflow instance gets its own properties
+        properties = call_workflow_api(module, session, 'retrieveProperties', workflow_key)
+        if not isinstance(properties, dict):
+            return properties
+        with lock:
+            __write_json(properties_file, properties)
+    if properties.get('statusName') != RUNNING_STATUS:
+        # the check is done waiting
+        with lock:
+            index = __read_json(index_file) or {}
+            index.setdefault('waiting', {}).pop(workflow_key, None)
+            __write_json(index_file, index)
+            __remove(properties_file)
+    return properties
+
+
+# the states of the steps not started yet, not reported by the first check
+INITIAL_STEP_STATES = ('Unassigned', 'Assigned', 'Not Ready', 'Ready')
+
+
+def __get_events_dir(module):
+    """
+    Return the directory of the progress event files.
+    :param AnsibleModule module: the ansible module
+    :rtype: str
+    """
+    events_dir = module.params.get('progress_events_dir')
+    if events_dir is not None and events_dir.strip() != '':
+        return os.path.abspath(os.path.expanduser(events_dir.strip()))
+    return os.environ.get('ZMF_EVENTS_DIR') \
+        or os.path.join(os.environ.get('ZMF_INFO_CACHE_DIR')
+                        or os.path.join(os.path.expanduser('~'), '.ansible', 'cache', 'ibm_zosmf'), 'events')
+
+
+def __flatten_steps(steps, flat):
+    for step in steps or []:
+        if 'stepNumber' in step:
+            flat[step['stepNumber']] = dict(title=step.get('title') or step.get('name'),
+                                            state=step.get('state'))
+        __flatten_steps(step.get('steps'), flat)
+    return flat
+
+
+def get_workflow_snapshot(properties):
+    """
+    Return the parts of the properties of a workflow instance compared
+    between two checks: its status, percent complete, the state of every
+    step and the ID of the automation message.
+    :param dict properties: the response of the retrieveProperties API
+    :rtype: dict
+    """
+    automation = properties.get('automationStatus') or {}
+    return dict(
+        statusName=properties.get('statusName'),
+        percentComplete=properties.get('percentComplete'),
+        steps=dict((k, v['state']) for k, v in __flatten_steps(properties.get('steps'), {}).items()),
+        messageIDs=[automation['messageID']] if automation.get('messageID') else []
+    )
+
+
+def diff_workflow_snapshots(previous, properties):
+    """
+    Return the progress events of a workflow instance since the previous
+    check: the status and step state changes, the moves of percent complete
+    and the new automation messages, and its new snapshot.
+    :param dict previous: the snapshot of the previous check, or None
+    :param dict properties: the response of the retrieveProperties API
+    :rtype: (list[dict], dict)
+    """
+    current = get_workflow_snapshot(properties)
+    previous = previous or dict(steps={}, messageIDs=[])
+    events = []
+    if current['statusName'] != previous.get('statusName'):
+        events.append(dict(event='status', before=previous.get('statusName'), after=current['statusName']))
+    if (current['percentComplete'] is not None
+            and current['percentComplete'] != previous.get('percentComplete')):
+        events.append(dict(event='percent', before=previous.get('percentComplete'),
+                           after=current['percentComplete']))
+    steps = __flatten_steps(properties.get('steps'), {})
+    for number in sorted(steps, key=lambda n: [int(x) for x in n.split('.') if x.isdigit()]):
+        before = previous['steps'].get(number)
+        after = steps[number]['state']
+        if after == before or (before is None and after in INITIAL_STEP_STATES):
+            continue
+        events.append(dict(event='step', step=number, title=steps[number]['title'], before=before, after=after))
+    automation = properties.get('automationStatus') or {}
+    for message_id in current['messageIDs']:
+        if message_id not in previous['messageIDs']:
+            events.append(dict(event='message', messageID=message_id, messageText=automation.get('messageText')))
+    # the messages seen before are kept, so a message is reported once
+    current['messageIDs'] = previous['messageIDs'] + [m for m in current['messageIDs']
+                                                      if m not in previous['messageIDs']]
+    return events, current
+
+
+def record_progress_events(module, workflow_key, properties):
+    """
+    Append the progress events of the workflow instance since its previous
+    check to <workflow_key>.jsonl in the progress_events_dir directory, or in
+    ZMF_EVENTS_DIR or ZMF_INFO_CACHE_DIR (default
+    ~/.ansible/cache/ibm_zosmf/events), one JSON object per line.
+    The snapshot compared by the next check is saved next to it.
+    Return the new events and the event file, or None as the event file when
+    it cannot be written.
+    :param AnsibleModule module: the ansible module
+    :param str workflow_key: the key of workflow instance
+    :param dict properties: the response of the retrieveProperties API
+    :rtype: (list[dict], str)
+    """
+    import time
+    events_dir = __get_events_dir(module)
+    name = re.sub('[^A-Za-z0-9_.-]', '_', workflow_key)
+    events_file = os.path.join(events_dir, name + '.jsonl')
+    snapshot_file = os.path.join(events_dir, name + '.snapshot.json')
+    events, snapshot = diff_workflow_snapshots(__read_json(snapshot_file), properties)
+    now = round(time.time(), 3)
+    for event in events:
+        event['time'] = now
+        event['workflow_key'] = workflow_key
+    try:
+        if not os.path.isdir(events_dir):
+            os.makedirs(events_dir)
+        if events:
+            with open(events_file, 'a') as f:
+                for event in events:
+                    f.write(json.dumps(event, sort_keys=True) + '\n')
+        __write_json(snapshot_file, snapshot)
+    except (IOError, OSError) as ex:
+        module.warn('Failed to record the progress events in ' + events_file + ' ---- ' + str(ex))
+        return events, None
+    return events, events_file
+
+
+# the latest durations kept for every workflow definition and step
+HISTORY_SIZE = 10
+
+
+def __get_history_dir():
+    """
+    Return the directory of the durations of the completed workflow instances.
+    :rtype: str
+    """
+    return os.environ.get('ZMF_HISTORY_DIR') \
+        or os.path.join(os.environ.get('ZMF_INFO_CACHE_DIR')
+                        or os.path.join(os.path.expanduser('~'), '.ansible', 'cache', 'ibm_zosmf'), 'history')
+
+
+def __tracked_file(history_dir, workflow_key):
+    return os.path.join(history_dir, 'running', re.sub('[^A-Za-z0-9_.-]', '_', workflow_key) + '.json')
+
+
+def __median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else None
+
+
+def get_workflow_definition_key(properties):
+    """
+    Return the key of the durations of the workflow instances created from
+    the same workflow definition.
+    :param dict properties: the response of the retrieveProperties API
+    :rtype: str
+    """
+    return '%s:%s' % (properties.get('workflowID'), properties.get('workflowVersion'))
+
+
+def predict_remaining_seconds(durations, tracked, properties, now):
+    """
+    Return the seconds until the workflow instance is expected to complete,
+    or None when no instance of its workflow definition has completed yet.
+    When the current step has been seen by earlier instances, the remaining
+    seconds are the usual duration less the usual offset of the step and the
+    seconds spent in it. Otherwise they are the usual duration less the
+    seconds since the workflow instance was started.
+    :param dict durations: the durations of the workflow definition
+    :param dict tracked: the start and the steps seen of the workflow instance
+    :param dict properties: the response of the retrieveProperties API
+    :param float now: the current time
+    :rtype: float
+    """
+    duration = __median(durations.get('durations') or [])
+    if duration is None:
+        return None
+    automation = properties.get('automationStatus') or {}
+    step = automation.get('currentStepNumber')
+    offset = __median((durations.get('steps') or {}).get(step) or [])
+    if offset is not None and step in tracked['steps']:
+        return duration - offset - (now - tracked['steps'][step])
+    started = tracked.get('started')
+    if started is None and automation.get('startedTime'):
+        started = automation['startedTime'] / 1000.0
+    if started is None:
+        return None
+    return duration - max(0, now - started)
+
+
+def get_poll_delay(remaining, interval, max_interval):
+    """
+    Return the seconds until the next poll of a workflow instance: half of
+    the remaining seconds while the end is far, just after the predicted end
+    when it is near, and half of the delay past the predicted end once it is
+    late, between interval and max_interval seconds.
+    :param float remaining: the predicted remaining seconds, or None
+    :param float interval: the shortest delay
+    :param float max_interval: the longest delay
+    :rtype: float
+    """
+    if remaining is None:
+        return interval
+    if remaining > 2 * interval:
+        delay = remaining / 2.0
+    elif remaining > 0:
+        delay = remaining + interval / 2.0
+    else:
+        delay = -remaining / 2.0
+    return min(max(delay, interval), max(max_interval, interval))
+
+
+def track_workflow_start(module, workflow_key):
+    """
+    Record the time the workflow instance is started, from which the offsets
+    of its steps are measured by the adaptive polling of its checks.
+    :param AnsibleModule module: the ansible module
+    :param str workflow_key: the key of workflow instance
+    """
+    import time
+    tracked_file = __tracked_file(__get_history_dir(), workflow_key)
+    try:
+        if not os.path.isdir(os.path.dirname(tracked_file)):
+            os.makedirs(os.path.dirname(tracked_file))
+        __write_json(tracked_file, dict(started=time.time(), steps={}))
+    except (IOError, OSError) as ex:
+        module.warn('Failed to record the start of the workflow instance in ' + tracked_file + ' ---- ' + str(ex))
+
+
+def wait_for_workflow_poll(module, workflow_key):
+    """
+    Wait until the poll of the workflow instance scheduled by its previous
+    check, for at most adaptive_polling_max_interval seconds.
+    :param AnsibleModule module: the ansible module
+    :param str workflow_key: the key of workflow instance
+    """
+    import time
+    tracked = __read_json(__tracked_file(__get_history_dir(), workflow_key))
+    if tracked and tracked.get('next_poll'):
+        delay = min(tracked['next_poll'] - time.time(), module.params['adaptive_polling_max_interval'])
+        if delay > 0:
+            time.sleep(delay)
+
+
+def schedule_workflow_poll(module, workflow_key, properties):
+    """
+    Schedule the next poll of the workflow instance still in progress around
+    the end predicted from the durations of the earlier instances of its
+    workflow definition, kept in ZMF_HISTORY_DIR or ZMF_INFO_CACHE_DIR
+    (default ~/.ansible/cache/ibm_zosmf/history).
+    When the workflow instance is complete, its duration and the offsets of
+    the steps seen by its checks are added to the durations.
+    Return the predicted remaining seconds, or None when unknown, and the
+    seconds until the next poll, or None when it is not in progress.
+    :param AnsibleModule module: the ansible module
+    :param str workflow_key: the key of workflow instance
+    :param dict properties: the response of the retrieveProperties API
+    :rtype: (float, float)
+    """
+    import time
+    now = time.time()
+    history_dir = __get_history_dir()
+    tracked_file = __tracked_file(history_dir, workflow_key)
+    durations_file = os.path.join(history_dir, 'durations.json')
+    definition = get_workflow_definition_key(properties)
+    tracked = __read_json(tracked_file)
+    try:
+        if properties.get('statusName') == RUNNING_STATUS:
+            tracked = tracked or dict(steps={})
+            step = (properties.get('automationStatus') or {}).get('currentStepNumber')
+            if step is not None and step not in tracked['steps']:
+                tracked['steps'][step] = now
+            durations = (__read_json(durations_file) or {}).get(definition) or {}
+            remaining = predict_remaining_seconds(durations, tracked, properties, now)
+            delay = get_poll_delay(remaining, module.params['adaptive_polling_interval'],
+                                   module.params['adaptive_polling_max_interval'])
+            tracked['next_poll'] = now + delay
+            if not os.path.isdir(os.path.dirname(tracked_file)):
+                os.makedirs(os.path.dirname(tracked_file))
+            __write_json(tracked_file, tracked)
+            return (None if remaining is None else round(remaining, 3)), round(delay, 3)
+        if tracked is not None and properties.get('statusName') == 'complete':
+            automation = properties.get('automationStatus') or {}
+            with PollLock(history_dir):
+                history = __read_json(durations_file) or {}
+                durations = history.setdefault(definition, dict(durations=[], steps={}))
+                if automation.get('startedTime') and automation.get('stoppedTime'):
+                    durations['durations'] = (durations['durations'] + [
+                        (automation['stoppedTime'] - automation['startedTime']) / 1000.0])[-HISTORY_SIZE:]
+                if tracked.get('started') is not None:
+                    # the offsets are measured from a start seen on this controller
+                    for step, seen in tracked['steps'].items():
+                        durations['steps'][step] = (durations['steps'].get(step, [])
+                                                    + [round(seen - tracked['started'], 3)])[-HISTORY_SIZE:]
+                __write_json(durations_file, history)
+        __remove(tracked_file)
+    except (IOError, OSError, ImportError) as ex:
+        module.warn('Failed to update the workflow durations in ' + history_dir + ' ---- ' + str(ex))
+    return None, None
+
+
+# the prefix of the names of the workflow instances created for the pool
+POOL_NAME_PREFIX = 'ansible_pool_'
+# the seconds after which the creations reserved for a pool are forgotten
+POOL_RESERVATION_SECONDS = 600
+
+
+def __get_pool_dir(module):
+    """
+    Return the directory of the pools of the workflow instances created and
+    not started on the same z/OSMF server as the same user.
+    :param AnsibleModule module: the ansible module
+    :rtype: str
+    """
+    cache_dir = os.environ.get('ZMF_POOL_DIR') \
+        or os.path.join(os.environ.get('ZMF_INFO_CACHE_DIR')
+                        or os.path.join(os.path.expanduser('~'), '.ansible', 'cache', 'ibm_zosmf'), 'pool')
+    name = '_'.join([str(module.params['zmf_host'] or '').strip(),
+                     str(module.params['zmf_port'] or '').strip(),
+                     str(module.params['zmf_user'] or '').strip()])
+    return os.path.join(cache_dir, re.sub('[^A-Za-z0-9_.-]', '_', name))
+
+
+def get_pool_workflow_name(fingerprint):
+    """
+    Return a new name of a workflow instance of the pool of the fingerprint.
+    :param str fingerprint: the fingerprint of the workflow instances
+    :rtype: str
+    """
+    import uuid
+    return POOL_NAME_PREFIX + fingerprint + '_' + uuid.uuid4().hex[:8]
+
+
+def __read_pool(pool_file):
+    """
+    Return the pool in the file: the workflow instances of the pool, the
+    creations reserved by the modules refilling it, and the definition file
+    and system of its workflow instances.
+    :param str pool_file: the file of the pool
+    :rtype: dict
+    """
+    pool = __read_json(pool_file)
+    if isinstance(pool, list):
+        # the pools written before the reservations were kept
+        pool = dict(workflows=pool)
+    pool = pool if isinstance(pool, dict) else {}
+    pool.setdefault('workflows', [])
+    pool.setdefault('reserved', [])
+    return pool
+
+
+def __get_pool_family(module):
+    """
+    Return the definition file and system of the workflow instances of the
+    pool, shared by the pools whose variables or properties differ.
+    :param AnsibleModule module: the ansible module
+    :rtype: dict
+    """
+    return dict((k, str(module.params[k] or '').strip().lower()) for k in ('workflow_file', 'workflow_host'))
+
+
+def claim_pooled_workflow(module, fingerprint):
+    """
+    Remove the oldest workflow instance from the pool of the fingerprint and
+    return it, as dict(workflow_key, workflow_name), or None when the pool is
+    empty. The pool is kept in ZMF_POOL_DIR or ZMF_INFO_CACHE_DIR (default
+    ~/.ansible/cache/ibm_zosmf/pool), so that a workflow instance is claimed
+    by only one of the concurrent modules.
+    :param AnsibleModule module: the ansible module
+    :param str fingerprint: the fingerprint of the workflow instances
+    :rtype: dict
+    """
+    pool_dir = __get_pool_dir(module)
+    pool_file = os.path.join(pool_dir, fingerprint + '.json')
+    if not os.path.exists(pool_file):
+        return None
+    try:
+        with PollLock(pool_dir):
+            pool = __read_pool(pool_file)
+            if not pool['workflows']:
+                return None
+            claimed = pool['workflows'].pop(0)
+            __write_json(pool_file, pool)
+            return claimed
+    except (IOError, OSError, ImportError) as ex:
+        module.warn('Failed to claim a workflow instance from the pool in ' + pool_dir + ' ---- ' + str(ex))
+        return None
+
+
+def reserve_pooled_workflows(module, fingerprint, size):
+    """
+    Reserve the creation of the workflow instances missing from the pool of
+    the fingerprint, up to size, counting the ones other modules reserved
+    and are still creating, so the concurrent modules do not fill the pool
+    over size. Return the reservation, as dict(id, count), or None when the
+    pool is full. A reservation not released by add_pooled_workflows within
+    POOL_RESERVATION_SECONDS, by a module which failed, is dropped.
+    :param AnsibleModule module: the ansible module
+    :param str fingerprint: the fingerprint of the workflow instances
+    :param int size: the number of workflow instances of the pool
+    :rtype: dict
+    """
+    import time
+    import uuid
+    pool_dir = __get_pool_dir(module)
+    pool_file = os.path.join(pool_dir, fingerprint + '.json')
+    try:
+        if not os.path.isdir(pool_dir):
+            os.makedirs(pool_dir)
+        with PollLock(pool_dir):
+            pool = __read_pool(pool_file)
+            now = time.time()
+            pool['reserved'] = [r for r in pool['reserved'] if now - r['time'] < POOL_RESERVATION_SECONDS]
+            missing = size - len(pool['workflows']) - sum(r['count'] for r in pool['reserved'])
+            if missing <= 0:
+                return None
+            reservation = dict(id=uuid.uuid4().hex, count=missing, time=now)
+            pool['reserved'].append(reservation)
+            pool.update(__get_pool_family(module))
+            __write_json(pool_file, pool)
+            return dict(id=reservation['id'], count=missing)
+    except (IOError, OSError, ImportError) as ex:
+        module.warn('Failed to reserve the workflow instances of the pool in ' + pool_dir + ' ---- ' + str(ex))
+        return None
+
+
+def add_pooled_workflows(module, fingerprint, reservation, workflows, size):
+    """
+    Release the reservation and add the workflow instances created for the
+    pool of the fingerprint, as dict(workflow_key, workflow_name), to the
+    pool, which holds at most size workflow instances. Return the workflow
+    instances left out of the pool, to be deleted.
+    :param AnsibleModule module: the ansible module
+    :param str fingerprint: the fingerprint of the workflow instances
+    :param dict reservation: the reservation of reserve_pooled_workflows
+    :param list[dict] workflows: the workflow instances created
+    :param int size: the number of workflow instances of the pool
+    :rtype: list[dict]
+    """
+    pool_dir = __get_pool_dir(module)
+    pool_file = os.path.join(pool_dir, fingerprint + '.json')
+    try:
+        with PollLock(pool_dir):
+            pool = __read_pool(pool_file)
+            pool['reserved'] = [r for r in pool['reserved'] if r['id'] != reservation['id']]
+            free = max(0, size - len(pool['workflows']) - sum(r['count'] for r in pool['reserved']))
+            pool['workflows'] += workflows[:free]
+            pool.update(__get_pool_family(module))
+            __write_json(pool_file, pool)
+            return workflows[free:]
+    except (IOError, OSError, ImportError) as ex:
+        module.warn('Failed to add the workflow instances to the pool in ' + pool_dir + ' ---- ' + str(ex))
+        return list(workflows)
+
+
+def remove_stale_pools(module, fingerprint):
+    """
+    Remove the pools of the same definition file and system as the pool of
+    the fingerprint, whose variables or properties differ, and return their
+    workflow instances, as dict(workflow_key, workflow_name), to be deleted.
+    The workflow instances of these pools are not claimed by the modules
+    requesting the current variables and properties.
+    :param AnsibleModule module: the ansible module
+    :param str fingerprint: the fingerprint of the current workflow instances
+    :rtype: list[dict]
+    """
+    pool_dir = __get_pool_dir(module)
+    if not os.path.isdir(pool_dir):
+        return []
+    family = __get_pool_family(module)
+    stale = []
+    try:
+        with PollLock(pool_dir):
+            for name in sorted(os.listdir(pool_dir)):
+                if not name.endswith('.json') or name == fingerprint + '.json':
+                    continue
+                pool = __read_pool(os.path.join(pool_dir, name))
+                if all(pool.get(k) == v for k, v in family.items()):
+                    stale += pool['workflows']
+                    __remove(os.path.join(pool_dir, name))
+    except (IOError, OSError, ImportError) as ex:
+        module.warn('Failed to remove the stale pools in ' + pool_dir + ' ---- ' + str(ex))
+    return stale
@@ -27,14 +27,46 @@ options:
     zmf_host:
         description:
             - Hostname of the z/OSMF server.
-        required: True
+            - Either I(zmf_host) or I(zmf_hosts) is required.
+        required: False
         type: str
+        default: null
+    zmf_hosts:
+        description:
+            - >
+              List of z/OSMF servers to authenticate with, each given as
+              C(hostname) or C(hostname:port), for example one z/OSMF per
+              sysplex. An IPv6 address is given as C([address]:port), or as
+              C(address) without port.
+            - >
+              The servers are authenticated with concurrently, with the same
+              I(zmf_user) and I(zmf_password), or I(zmf_crt) and I(zmf_key).
+              The credentials are returned in I(credentials), and the servers
+              failed to authenticate with in I(errors).
+            - Either I(zmf_host) or I(zmf_hosts) is required.
+        required: False
+        type: list
+        elements: str
+        default: null
+        version_added: "1.3.0"
     zmf_port:
         description:
             - Port number of the z/OSMF server.
+            - >
+              When I(zmf_hosts) is supplied, it is the port number of the
+              servers given without one.
         required: False
         type: int
         default: null
+    max_concurrency:
+        description:
+            - >
+              Maximum number of servers of I(zmf_hosts) authenticated with at
+              the same time.
+        required: False
+        type: int
+        default: 8
+        version_added: "1.3.0"
     zmf_user:
         description:
             - User name to be used for authenticating with z/OSMF server.
@@ -89,6 +121,16 @@ EXAMPLES = r"""
     zmf_crt: "/file_with_your_certificate_chain.crt"
     zmf_key: "/file_with_your_private_key.key"
 
+- name: Authenticate with the z/OSMF servers of all sysplexes
+  zmf_authenticate:
+    zmf_hosts:
+      - "plex1.ibm.com"
+      - "plex2.ibm.com:10443"
+      - "dr.ibm.com"
+    zmf_user: "your_username"
+    zmf_password: "your_password"
+  register: result_auth
+
 - name: Authenticate with z/OSMF server by prompting to input username/password
   vars_prompt:
     - name: zmf_user
@@ -131,23 +173,54 @@ zmf_port:
     description: Port number of the z/OSMF server.
     returned: on success
     type: int
+credentials:
+    description:
+        - >
+          The authentication credentials of every server of I(zmf_hosts)
+          authenticated with, keyed by the server as given in I(zmf_hosts).
+        - >
+          Each credential has I(ltpa_token_2), I(jwt_token), I(zmf_host) and
+          I(zmf_port), and can be passed as I(zmf_credential) to the modules
+          and roles.
+    returned: when I(zmf_hosts) is supplied
+    type: dict
+    sample:
+        plex1.ibm.com:
+            ltpa_token_2: "yDS7uJxqrd3h8v5WXq9pf1yPtztQ4JzroZN3XQKF26ZicXgHc7mdzgycMCa......"
+            zmf_host: "plex1.ibm.com"
+            zmf_port: null
+errors:
+    description:
+        - >
+          The error message of every server of I(zmf_hosts) failed to
+          authenticate with, keyed by the server as given in I(zmf_hosts).
+        - The module fails only when no server is authenticated with.
+    returned: when I(zmf_hosts) is supplied
+    type: dict
+    sample:
+        dr.ibm.com: "HTTP request error: <urlopen error [Errno 111] Connection refused>"
 """
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import (
     get_auth_argument_spec,
-    get_connect_session
+    get_connect_session,
+    parse_zmf_endpoint,
+    format_zmf_host,
+    run_in_parallel,
+    HostFailure,
+    HostModule
 )
 from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_auth_api \
     import call_auth_api
 import re
 
 
-def authenticate(module):
+def get_auth_token(module):
     """
-    Authenticate with z/OSMF server.
-    Return the authentication token.
+    Return the authentication credentials of zmf_host, or the error message.
     :param AnsibleModule module: the ansible module
+    :rtype: dict or str
     """
     # create session
     session = get_connect_session(module)
@@ -168,23 +241,78 @@ def authenticate(module):
                                response_getAuth['Set-Cookie'])[0]
             auth['zmf_host'] = module.params['zmf_host']
             auth['zmf_port'] = module.params['zmf_port']
-            module.exit_json(**auth)
+            return auth
         else:
-            module.fail_json(
-                msg='Failed to authenticate with z/OSMF server '
-                + '---- Cannot obtain the authentication token.')
+            return 'Failed to authenticate with z/OSMF server ' \
+                + '---- Cannot obtain the authentication token.'
+    else:
+        return 'Failed to authenticate with z/OSMF server ---- ' \
+            + response_getAuth
+
+
+def authenticate(module):
+    """
+    Authenticate with z/OSMF server.
+    Return the authentication token.
+    :param AnsibleModule module: the ansible module
+    """
+    auth = get_auth_token(module)
+    if isinstance(auth, dict):
+        module.exit_json(**auth)
     else:
-        module.fail_json(msg='Failed to authenticate with z/OSMF server ---- '
-                         + response_getAuth)
+        module.fail_json(msg=auth)
+
+
+def authenticate_hosts(module):
+    """
+    Authenticate with every z/OSMF server of zmf_hosts concurrently.
+    Return the authentication tokens keyed by server, and the errors of the
+    servers failed to authenticate with.
+    :param AnsibleModule module: the ansible module
+    """
+    endpoints = []
+    for entry in module.params['zmf_hosts']:
+        host, port = parse_zmf_endpoint(entry, module.params['zmf_port'])
+        endpoints.append((entry.strip(), host, port))
+
+    def authenticate_host(endpoint):
+        return get_auth_token(HostModule(module, zmf_host=format_zmf_host(endpoint[1]), zmf_port=endpoint[2]))
+
+    results = run_in_parallel(authenticate_host, endpoints,
+                              module.params['max_concurrency'])
+    credentials = {}
+    errors = {}
+    for endpoint, auth in zip(endpoints, results):
+        if isinstance(auth, dict):
+            auth['zmf_port'] = endpoint[2]
+            credentials[endpoint[0]] = auth
+        elif isinstance(auth, HostFailure):
+            errors[endpoint[0]] = auth.result['msg']
+        elif isinstance(auth, Exception):
+            errors[endpoint[0]] = 'Failed to authenticate with z/OSMF server ---- ' + repr(auth)
+        else:
+            errors[endpoint[0]] = auth
+    if not credentials:
+        module.fail_json(msg='Failed to authenticate with any z/OSMF server of zmf_hosts.',
+                         credentials=credentials, errors=errors)
+    module.exit_json(credentials=credentials, errors=errors)
 
 
 def main():
     argument_spec = get_auth_argument_spec()
+    argument_spec.update(
+        max_concurrency=dict(required=False, type='int', default=8)
+    )
     module = AnsibleModule(
         argument_spec=argument_spec,
+        required_one_of=[('zmf_host', 'zmf_hosts')],
+        mutually_exclusive=[('zmf_host', 'zmf_hosts')],
         supports_check_mode=False
     )
-    authenticate(module)
+    if module.params['zmf_hosts']:
+        authenticate_hosts(module)
+    else:
+        authenticate(module)
 
 
 if __name__ == '__main__':
@@ -101,7 +101,10 @@ options:
             - >
               If I(zmf_credential) is supplied, I(zmf_host), I(zmf_port),
               I(zmf_user), I(zmf_password), I(zmf_crt) and I(zmf_key) are
-              ignored.
+              ignored, except that I(zmf_user) and I(zmf_password), or
+              I(zmf_crt) and I(zmf_key), are used once to obtain a new token
+              when the token of I(zmf_credential) expires. The new
+              credential is returned as I(zmf_credential).
         required: False
         type: dict
         default: null
@@ -141,10 +144,37 @@ options:
         description:
             - Hostname of the z/OSMF server.
             - If I(zmf_credential) is supplied, I(zmf_host) is ignored.
-            - If I(zmf_credential) is not supplied, I(zmf_host) is required.
+            - >
+              If I(zmf_credential) is not supplied, either I(zmf_host) or
+              I(zmf_endpoints) is required.
+            - If I(zmf_endpoints) is supplied, I(zmf_host) is ignored.
         required: False
         type: str
         default: null
+    zmf_endpoints:
+        description:
+            - >
+              List of equivalent z/OSMF servers in a sysplex, which share the
+              same workflow repository, each given as C(host) or C(host:port).
+              I(zmf_port) is the port number of the servers given without one.
+              An IPv6 address is given as C([address]:port), or as
+              C(address) without port.
+            - >
+              The servers are probed concurrently with C(GET /zosmf/info), and
+              each request is sent to the fastest healthy one. A server which
+              cannot be connected to is skipped, and the request is sent to the
+              next one. Requests which change a workflow, such as create or
+              start, are sent to the next server only when the connection could
+              not be set up, so they never run twice.
+            - >
+              The health and latency of the servers are cached on the
+              controller for C(ZMF_ENDPOINT_CACHE_TTL) seconds, default 60, in
+              C(ZMF_INFO_CACHE_DIR), default C(~/.ansible/cache/ibm_zosmf).
+            - If I(zmf_credential) is supplied, its token is sent to every server.
+        required: False
+        type: list
+        elements: str
+        default: null
     zmf_port:
         description:
             - Port number of the z/OSMF server.
@@ -155,7 +185,9 @@ options:
     zmf_user:
         description:
             - User name to be used for authenticating with z/OSMF server.
-            - If I(zmf_credential) is supplied, I(zmf_user) is ignored.
+            - >
+              If I(zmf_credential) is supplied, I(zmf_user) is only used to
+              obtain a new token when the token of I(zmf_credential) expires.
             - >
               If I(zmf_credential) is not supplied, I(zmf_user) is required
               when I(zmf_crt) and I(zmf_key) are not supplied.
@@ -169,7 +201,9 @@ options:
     zmf_password:
         description:
             - Password to be used for authentication with z/OSMF server.
-            - If I(zmf_credential) is supplied, I(zmf_password) is ignored.
+            - >
+              If I(zmf_credential) is supplied, I(zmf_password) is only used to
+              obtain a new token when the token of I(zmf_credential) expires.
             - >
               If I(zmf_credential) is not supplied, I(zmf_password) is required
               when I(zmf_crt) and I(zmf_key) are not supplied.
@@ -186,7 +220,8 @@ options:
               Location of the PEM-formatted certificate chain file to be used
               for HTTPS client authentication.
             - >
-              If I(zmf_credential) is supplied, I(zmf_crt) is ignored.
+              If I(zmf_credential) is supplied, I(zmf_crt) is only used to
+              obtain a new token when the token of I(zmf_credential) expires.
             - >
               If I(zmf_credential) is not supplied, I(zmf_crt) is required when
               I(zmf_user) and I(zmf_password) are not supplied.
@@ -198,7 +233,9 @@ options:
             - >
               Location of the PEM-formatted file with your private key to be
               used for HTTPS client authentication.
-            - If I(zmf_credential) is supplied, I(zmf_key) is ignored.
+            - >
+              If I(zmf_credential) is supplied, I(zmf_key) is only used to
+              obtain a new token when the token of I(zmf_credential) expires.
             - >
               If I(zmf_credential) is not supplied, I(zmf_key) is required when
               I(zmf_user) and I(zmf_password) are not supplied.
@@ -206,6 +243,38 @@ options:
         type: str
         default: null
 
+    result_detail:
+        description:
+            - The detail of the module result.
+            - >
+              If I(result_detail=minimal), only the keys and the status of the
+              security requirements are returned in I(resourceItems), that is
+              itemId, resourceClass, resourceProfile, access, status and
+              httpStatus. This keeps the results held by the Ansible control
+              node small when the module runs for thousands of hosts.
+            - >
+              If I(result_detail=full), all the security requirements are
+              returned as well as I(allResourceItems).
+        required: false
+        type: str
+        default: normal
+        choices:
+            - minimal
+            - normal
+            - full
+
+    result_file:
+        description:
+            - >
+              Location of the file on the Ansible control node to which the
+              result returned with I(result_detail=full) is written in JSON
+              format when I(result_detail=minimal).
+            - >
+              It is recommended that you use one file per target z/OS system,
+              for example, C(/tmp/{{ inventory_hostname }}_sca.json).
+        required: false
+        type: str
+
 '''
 
 EXAMPLES = r'''
@@ -249,6 +318,15 @@ EXAMPLES = r'''
     target_userid: IBMUSER
     path_of_security_requirements: /home/user/descriptor.json
     location: local
+
+- name: Validate security requirements, return only the keys and status of the requirements that need attention, \
+        and write all the requirements to a file.
+  ibm.ibm_zosmf.zmf_sca:
+    zmf_credential: "{{ result_auth }}"
+    target_userid: IBMUSER
+    path_of_security_requirements: /global/zosmf/sample/configuration/security/descriptor.json
+    result_detail: minimal
+    result_file: "/tmp/{{ inventory_hostname }}_sca.json"
 '''
 
 RETURN = r'''
@@ -263,6 +341,15 @@ msg:
     returned: always on error
     type: str
 
+zmf_credential:
+    description:
+        - >
+          The authentication credentials obtained when the token of the
+          supplied I(zmf_credential) expired, in the format returned by
+          module M(zmf_authenticate). Pass it to the later tasks.
+    returned: when the token of I(zmf_credential) is renewed, also on failure
+    type: dict
+
 resourceItems:
     description:
         - Array of security requirements that need attention.
@@ -377,13 +464,33 @@ resourceItems:
             type: str
             returned: on error
             sample: ''
+
+allResourceItems:
+    description:
+        - Array of all the security requirements, in the same format as I(resourceItems).
+    type: list
+    elements: dict
+    returned: when I(result_detail=full)
+
+result_file:
+    description: The location of the file the full result is written to.
+    type: str
+    returned: when I(result_detail=minimal) and I(result_file) is supplied
+    sample: '/tmp/SY1_sca.json'
 '''
 
 from ansible.module_utils.basic import AnsibleModule
 
 from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import (
     get_connect_argument_spec,
-    get_connect_session
+    get_connect_session,
+    get_zosmf_info,
+    get_zosmf_plugin,
+    get_zosmf_version,
+    get_result_argument_spec,
+    apply_result_detail,
+    exit_module,
+    return_renewed_credential
 )
 from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_sca_api import (
     get_request_argument_spec,
@@ -392,10 +499,53 @@ from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_sca_api import (
 import io
 
 
+# the validate services need the APAR PH41248, the provision ones PH47746
+SCA_MIN_ZOSMF_VERSION = 27
+SCA_PLUGIN = 'Security Configuration Assistant'
+# the keys of resourceItems returned with result_detail=minimal
+MINIMAL_ITEM_KEYS = ('itemId', 'resourceClass', 'resourceProfile', 'access', 'status', 'httpStatus')
+
+
+def get_result(module, res):
+    """
+    Return the module result with the detail chosen by result_detail.
+    :param AnsibleModule module: the ansible module
+    :param dict res: the full result of the module
+    :rtype: dict
+    """
+    return apply_result_detail(module, res, ('resourceItems',), ('allResourceItems',),
+                               dict(resourceItems=MINIMAL_ITEM_KEYS))
+
+
+def check_sca_support(module, session, apar):
+    """
+    Fail the module without calling the Security Configuration Assistant
+    services when the z/OSMF server is known not to provide them, from the
+    version and plugins reported by /zosmf/info.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the current connection session
+    :param str apar: the APAR needed by the services
+    """
+    info = get_zosmf_info(module, session)
+    version = get_zosmf_version(info)
+    plugin = get_zosmf_plugin(info, SCA_PLUGIN)
+    reason = None
+    if version is not None and version < SCA_MIN_ZOSMF_VERSION:
+        reason = 'z/OSMF version is ' + str(info.get('zosmf_full_version', version))
+    elif plugin is not None and str(plugin.get('pluginStatus', 'ACTIVE')).upper() != 'ACTIVE':
+        reason = SCA_PLUGIN + ' plugin status is ' + str(plugin.get('pluginStatus'))
+    if reason is not None:
+        module.fail_json(
+            msg='Please make sure z/OSMF is V2R4 or above with the APAR ' + apar
+            + ' installed, and Security Configuration Assistant is enabled. ---- ' + reason
+        )
+
+
 def validate_descriptor(module):
     # create session
     session = get_connect_session(module)
 
+    check_sca_support(module, session, 'PH41248')
     response = call_sca_api(module, session, 'validateDescriptor')
 
     process_response(response, module)
@@ -419,6 +569,7 @@ def validate_resource(module):
     session = get_connect_session(module)
     # import epdb
     # epdb.serve()
+    check_sca_support(module, session, 'PH41248')
     response = call_sca_api(module, session, 'validateResource', body)
 
     process_response(response, module)
@@ -443,6 +594,7 @@ def provision_resource(module):
     session = get_connect_session(module)
     # import epdb
     # epdb.serve()
+    check_sca_support(module, session, 'PH47746')
     response = call_sca_api(module, session, 'provisionResource', body)
 
     process_provision_response(response, module)
@@ -454,6 +606,7 @@ def provision_descriptor(module):
     """
     # create session
     session = get_connect_session(module)
+    check_sca_support(module, session, 'PH47746')
     response = call_sca_api(module, session, 'provisionDescriptor')
     process_provision_response(response, module)
 
@@ -469,13 +622,14 @@ def process_provision_response(response, module):
                 has_changed = True
 
         res = {
-            "changed": has_changed
+            "changed": has_changed,
+            "allResourceItems": response['resourceItems']
         }
         if len(unexpected) > 0:
             res['resourceItems'] = unexpected
-            module.fail_json(msg='Provision of security requirements failed.', **res)
+            module.fail_json(msg='Provision of security requirements failed.', **get_result(module, res))
         else:
-            module.exit_json(**res)
+            exit_module(module, **get_result(module, res))
     else:
         prefix = 'Failed to provision security requirements:'
         # not found, msg: path of security requirements not found
@@ -498,12 +652,14 @@ def process_response(response, module):
         for item in response['resourceItems']:
             if item['status'].lower() != expected_result:
                 unexpected.append(item)
-        res = {}
+        res = {
+            "allResourceItems": response['resourceItems']
+        }
         if len(unexpected) > 0:
             res['resourceItems'] = unexpected
-            module.fail_json(msg='Security validation does not match with expected_result.', **res)
+            module.fail_json(msg='Security validation does not match with expected_result.', **get_result(module, res))
         else:
-            module.exit_json(**res)
+            exit_module(module, **get_result(module, res))
     else:
         prefix = 'Failed to validate security requirements:'
         # not found, msg: path of security requirements not found
@@ -528,6 +684,7 @@ def run_module():
         get_request_argument_spec()
     argument_spec.update(connect_argument_spec)
     argument_spec.update(request_argument_spec)
+    argument_spec.update(get_result_argument_spec())
 
     argument_spec.update(
         target_userid=dict(type='str', required=False),
@@ -555,12 +712,13 @@ def run_module():
         argument_spec=argument_spec,
         supports_check_mode=True
     )
+    return_renewed_credential(module)
 
     # if the user is working with this module in only check mode we do not
     # want to make any changes to the environment, just return the current
     # state with no modifications
     if module.check_mode:
-        module.exit_json(**result)
+        exit_module(module, **result)
 
     if module.params['path_of_security_requirements'] is None:
         module.fail_json(
@@ -583,7 +741,7 @@ def run_module():
 
     # in the event of a successful module execution, you will want to
     # simple AnsibleModule.exit_json(), passing the key/value results
-    module.exit_json(**result)
+    exit_module(module, **result)
 
 
 def main():
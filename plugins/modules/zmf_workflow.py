@@ -15,7 +15,8 @@ description:
     - Operate z/OS workflows through the use of z/OSMF workflow REST services.
     - >
       This module supports to compare, start, delete, and check the status of
-      a workflow.
+      a workflow, and to complete a list of workflows in the order of their
+      dependencies.
 version_added: "1.0.0"
 author:
     - Yang Cao (@zosmf-Young)
@@ -30,7 +31,10 @@ options:
             - >
               If I(zmf_credential) is supplied, I(zmf_host), I(zmf_port),
               I(zmf_user), I(zmf_password), I(zmf_crt) and I(zmf_key) are
-              ignored.
+              ignored, except that I(zmf_user) and I(zmf_password), or
+              I(zmf_crt) and I(zmf_key), are used once to obtain a new token
+              when the token of I(zmf_credential) expires. The new
+              credential is returned as I(zmf_credential).
         required: False
         type: dict
         default: null
@@ -70,10 +74,37 @@ options:
         description:
             - Hostname of the z/OSMF server.
             - If I(zmf_credential) is supplied, I(zmf_host) is ignored.
-            - If I(zmf_credential) is not supplied, I(zmf_host) is required.
+            - >
+              If I(zmf_credential) is not supplied, either I(zmf_host) or
+              I(zmf_endpoints) is required.
+            - If I(zmf_endpoints) is supplied, I(zmf_host) is ignored.
         required: False
         type: str
         default: null
+    zmf_endpoints:
+        description:
+            - >
+              List of equivalent z/OSMF servers in a sysplex, which share the
+              same workflow repository, each given as C(host) or C(host:port).
+              I(zmf_port) is the port number of the servers given without one.
+              An IPv6 address is given as C([address]:port), or as
+              C(address) without port.
+            - >
+              The servers are probed concurrently with C(GET /zosmf/info), and
+              each request is sent to the fastest healthy one. A server which
+              cannot be connected to is skipped, and the request is sent to the
+              next one. Requests which change a workflow, such as create or
+              start, are sent to the next server only when the connection could
+              not be set up, so they never run twice.
+            - >
+              The health and latency of the servers are cached on the
+              controller for C(ZMF_ENDPOINT_CACHE_TTL) seconds, default 60, in
+              C(ZMF_INFO_CACHE_DIR), default C(~/.ansible/cache/ibm_zosmf).
+            - If I(zmf_credential) is supplied, its token is sent to every server.
+        required: False
+        type: list
+        elements: str
+        default: null
     zmf_port:
         description:
             - Port number of the z/OSMF server.
@@ -84,7 +115,9 @@ options:
     zmf_user:
         description:
             - User name to be used for authenticating with z/OSMF server.
-            - If I(zmf_credential) is supplied, I(zmf_user) is ignored.
+            - >
+              If I(zmf_credential) is supplied, I(zmf_user) is only used to
+              obtain a new token when the token of I(zmf_credential) expires.
             - >
               If I(zmf_credential) is not supplied, I(zmf_user) is required
               when I(zmf_crt) and I(zmf_key) are not supplied.
@@ -98,7 +131,9 @@ options:
     zmf_password:
         description:
             - Password to be used for authenticating with z/OSMF server.
-            - If I(zmf_credential) is supplied, I(zmf_password) is ignored.
+            - >
+              If I(zmf_credential) is supplied, I(zmf_password) is only used to
+              obtain a new token when the token of I(zmf_credential) expires.
             - >
               If I(zmf_credential) is not supplied, I(zmf_password) is required
               when I(zmf_crt) and I(zmf_key) are not supplied.
@@ -115,7 +150,8 @@ options:
               Location of the PEM-formatted certificate chain file to be used
               for HTTPS client authentication.
             - >
-              If I(zmf_credential) is supplied, I(zmf_crt) is ignored.
+              If I(zmf_credential) is supplied, I(zmf_crt) is only used to
+              obtain a new token when the token of I(zmf_credential) expires.
             - >
               If I(zmf_credential) is not supplied, I(zmf_crt) is required when
               I(zmf_user) and I(zmf_password) are not supplied.
@@ -127,7 +163,9 @@ options:
             - >
               Location of the PEM-formatted file with your private key to be
               used for HTTPS client authentication.
-            - If I(zmf_credential) is supplied, I(zmf_key) is ignored.
+            - >
+              If I(zmf_credential) is supplied, I(zmf_key) is only used to
+              obtain a new token when the token of I(zmf_credential) expires.
             - >
               If I(zmf_credential) is not supplied, I(zmf_key) is required when
               I(zmf_user) and I(zmf_password) are not supplied.
@@ -149,7 +187,9 @@ options:
                   - If I(workflow_key) is not specified, checks if workflow exists by I(workflow_name),
                       - If exists, starts the workflow instance.
                       - If not exist, creates a new workflow instance and starts it.
-            - If I(state=deleted), delete a workflow instance if it exists.
+            - >
+              If I(state=deleted), delete a workflow instance if it exists, or
+              the workflow instances selected by I(bulk_delete).
             - >
               If I(state=check), check the status of a workflow.
                   -
@@ -171,6 +211,50 @@ options:
                         specified in argument: workflow_step_name.
                       - Workflow instance with key:{} is not completed\:
                         In step {}\: While one or more steps may be skipped.
+            - >
+              If I(state=completed), completes the workflow instances in
+              I(workflows), or the one named I(workflow_name), as role
+              M(zmf_workflow_complete) does for one workflow instance.
+                  - >
+                    Every workflow instance is started once the ones in its
+                    I(depends_on) are completed, with at most
+                    I(max_concurrency) workflow instances started or in
+                    progress at the same time.
+                  - >
+                    The workflow instances in progress are checked together
+                    every I(complete_check_delay) seconds, with one call that
+                    lists the workflow instances in progress, and the
+                    properties of only the ones missing from the list are
+                    retrieved.
+                  - >
+                    A workflow instance is not started when one in its
+                    I(depends_on) is not completed, and the module fails when
+                    a workflow instance is not completed.
+                  - >
+                    The workflow instances in I(workflow_plan) run the action
+                    planned by I(state=planned), without being found and
+                    compared again.
+                  - >
+                    If I(workflow_hosts) is supplied, the workflows are
+                    completed on every system of I(workflow_hosts) together,
+                    through one session. The workflow instances of all the
+                    systems are first found with one call that lists the
+                    workflow instances and compared, then created and started
+                    concurrently, and checked together.
+            - >
+              If I(state=planned), plans I(state=completed) for the workflow
+              instances in I(workflows), or the one named I(workflow_name),
+              without changing them.
+                  - >
+                    The workflow instances are found with one call that lists
+                    the workflow instances, their properties and definition
+                    files are retrieved in parallel, every definition file
+                    once, and they are compared as with I(state=existed).
+                  - >
+                    The action planned for every workflow instance and the
+                    number of calls of every workflow API to run the plan are
+                    returned as I(plan) and I(api_calls). Pass I(plan) as
+                    I(workflow_plan) with I(state=completed) to run it.
         required: True
         type: str
         choices:
@@ -178,6 +262,8 @@ options:
             - started
             - deleted
             - check
+            - completed
+            - planned
     workflow_name:
         description:
             - Descriptive name of the workflow.
@@ -191,7 +277,14 @@ options:
             - Required when I(state=existed).
             - >
               Either I(workflow_name) or I(workflow_key) is required when
-              I(state=started/deleted/check).
+              I(state=started/deleted/check), unless I(workflow_pool_size) is
+              greater than 0 when I(state=started).
+            - >
+              Either I(workflow_name) or I(workflows) is required when
+              I(state=completed/planned).
+            - >
+              If I(workflow_hosts) is supplied when I(state=completed/planned),
+              the name of the workflow, in I(workflow_name_template).
         required: False
         type: str
         default: null
@@ -377,6 +470,571 @@ options:
         required: False
         type: str
         default: null
+    shared_polling:
+        description:
+            - >
+              Whether the checks of workflow instances on the same z/OSMF
+              server share one poller on the Ansible control node, when
+              I(state=check).
+            - >
+              The first check in every I(shared_polling_interval) seconds lists
+              the running workflow instances with one call, and retrieves the
+              properties of only the workflow instances whose status has
+              changed. The other checks are answered from the files of the
+              poller, in C(ZMF_POLL_DIR), default
+              C(~/.ansible/cache/ibm_zosmf/poll), without calling z/OSMF.
+            - >
+              The current step and percent complete of a workflow instance
+              still in progress are the ones of its first check.
+        required: False
+        type: bool
+        default: False
+    shared_polling_interval:
+        description:
+            - >
+              The interval time (in seconds) between two polls of the z/OSMF
+              server when I(shared_polling=true). It is expected to be the
+              delay between the periodic checks.
+        required: False
+        type: int
+        default: 5
+    workflow_fingerprint:
+        description:
+            - >
+              Whether a fingerprint of the definition file, variables and
+              properties is appended to I(workflow_comments) as
+              C([ansible-fp:<fingerprint>]) when the workflow instance is
+              created with I(state=started).
+            - >
+              When the fingerprint of an existing workflow instance matches
+              the arguments, I(state=existed) neither retrieves its definition
+              file nor compares its variables one by one. A definition file
+              changed in place, or variables updated by the steps, since the
+              workflow instance was created are not reported as different in
+              this case.
+        required: False
+        type: bool
+        default: True
+    workflow_pool_size:
+        description:
+            - >
+              The number of workflow instances created and not started kept
+              in the pool of the definition file, variables and properties
+              of the workflow instance, when I(state=started).
+            - >
+              If I(workflow_pool_size) is greater than 0, neither
+              I(workflow_key) nor I(workflow_name) is supplied. A workflow
+              instance of the pool is claimed and started at once, rather than
+              waiting for z/OSMF to create a workflow instance from the
+              definition file, or one is created when the pool is empty. Then
+              the workflow instances missing from the pool are created, while
+              the claimed workflow instance is already in progress.
+            - >
+              The workflow instances of the pool are named
+              C(ansible_pool_<fingerprint>_<suffix>), and z/OSMF cannot
+              rename a workflow instance, so the started workflow instance is
+              returned with its own I(workflow_name) and I(workflow_key),
+              which are to be used by the later tasks. A workflow instance
+              found by I(workflow_name) again cannot come from the pool.
+            - >
+              The concurrent modules reserve the workflow instances they
+              create for the pool, so the pool never holds more than
+              I(workflow_pool_size) workflow instances; the ones created over
+              it are deleted.
+            - >
+              The pools are kept on the Ansible control node in
+              C(ZMF_POOL_DIR), default C(~/.ansible/cache/ibm_zosmf/pool), per
+              z/OSMF server and user.
+        required: False
+        type: int
+        default: 0
+    workflow_pool_cleanup:
+        description:
+            - >
+              Whether to delete the workflow instances of the pools of the
+              same definition file and system whose variables or properties
+              differ, when I(state=started) and I(workflow_pool_size) is
+              greater than 0.
+            - >
+              These workflow instances are left in their pools when the
+              variables or properties of the workflow change, and are never
+              claimed again. Do not enable it while other tasks use the same
+              definition file and system with other variables or properties.
+        required: False
+        type: bool
+        default: False
+    result_detail:
+        description:
+            - The detail of the module result.
+            - >
+              If I(result_detail=minimal), only the keys and the status flags
+              of the workflow instance are returned, that is I(changed),
+              I(workflow_key), I(workflow_name), I(same_workflow_instance),
+              I(waiting), I(completed) and I(deleted). This keeps the results
+              held by the Ansible control node small when the module runs for
+              thousands of hosts.
+            - If I(result_detail=normal), I(message) is returned as well.
+            - >
+              If I(result_detail=full), the properties of the workflow
+              instance are returned as well as I(workflow_properties) when
+              I(state=existed/check).
+        required: False
+        type: str
+        default: normal
+        choices:
+            - minimal
+            - normal
+            - full
+    result_file:
+        description:
+            - >
+              Location of the file on the Ansible control node to which the
+              result returned with I(result_detail=full) is written in JSON
+              format when I(result_detail=minimal).
+            - >
+              It is recommended that you use one file per target z/OS system,
+              for example, C(/tmp/{{ inventory_hostname }}_workflow.json).
+        required: False
+        type: str
+        default: null
+    progress_events:
+        description:
+            - >
+              Whether the progress of the workflow instance since its previous
+              check is recorded when I(state=check).
+            - >
+              Every check compares the properties of the workflow instance
+              with the ones of the previous check, and appends only the
+              changes to C(<workflow_key>.jsonl) in I(progress_events_dir),
+              one JSON object per line. The changes are the status and step
+              state changes, the moves of percent complete and the new
+              automation messages. The file gives the complete timeline of the
+              workflow instance, and the changes are returned as
+              I(progress_events).
+            - >
+              With I(result_detail=minimal), only the changes and the status
+              flags of the workflow instance are returned.
+            - >
+              If I(shared_polling=true), the steps and percent complete of a
+              workflow instance still in progress are only compared when its
+              status changes.
+        required: False
+        type: bool
+        default: False
+    progress_events_dir:
+        description:
+            - >
+              Directory on the Ansible control node of the progress event files
+              when I(progress_events=true).
+            - >
+              If this value is omitted, C(ZMF_EVENTS_DIR) is used, default
+              C(~/.ansible/cache/ibm_zosmf/events).
+        required: False
+        type: str
+        default: null
+    adaptive_polling:
+        description:
+            - >
+              Whether the checks of the workflow instance are scheduled around
+              the end predicted from the durations of the earlier workflow
+              instances of the same workflow definition, when
+              I(state=started/check).
+            - >
+              The duration of every completed workflow instance and the offset
+              of every step seen by its checks are kept on the Ansible control
+              node in C(ZMF_HISTORY_DIR), default
+              C(~/.ansible/cache/ibm_zosmf/history). The latest 10 durations of
+              every workflow ID and version, and of every step, are kept.
+            - >
+              Every check of a workflow instance still in progress schedules
+              the next one at half of the predicted remaining time, just after
+              the predicted end when it is near, and less and less often once
+              the predicted end is past. The next check waits until then
+              before retrieving the properties, so the periodic checks are
+              expected to be run without delay, for example with
+              C(delay: 0) in a C(until) loop.
+            - >
+              Until a workflow instance of the same workflow definition has
+              completed, the checks are scheduled every
+              I(adaptive_polling_interval) seconds.
+        required: False
+        type: bool
+        default: False
+    adaptive_polling_interval:
+        description:
+            - >
+              The shortest interval time (in seconds) between two checks of the
+              workflow instance when I(adaptive_polling=true).
+        required: False
+        type: int
+        default: 5
+    adaptive_polling_max_interval:
+        description:
+            - >
+              The longest interval time (in seconds) between two checks of the
+              workflow instance when I(adaptive_polling=true).
+        required: False
+        type: int
+        default: 300
+    workflows:
+        description:
+            - >
+              The workflows completed when I(state=completed), or planned
+              when I(state=planned), with the names of the workflows each one
+              depends on.
+            - >
+              The arguments of a workflow that are not supplied are the ones
+              of the module, for example, I(workflow_file) or
+              I(workflow_host).
+            - >
+              The workflows are started in the order of their dependencies, so
+              the longest chain of dependent workflows, returned as
+              I(critical_path), sets the time taken by the module.
+        required: False
+        type: list
+        elements: dict
+        default: null
+        suboptions:
+            workflow_name:
+                description:
+                    - Descriptive name of the workflow.
+                required: True
+                type: str
+            depends_on:
+                description:
+                    - >
+                      The names of the workflows in I(workflows) which must be
+                      completed before this workflow is started.
+                required: False
+                type: list
+                elements: str
+                default: []
+            workflow_access_type:
+                description:
+                    - The I(workflow_access_type) of this workflow, default the one of the module.
+                required: False
+                type: str
+                choices:
+                    - Public
+                    - Restricted
+                    - Private
+            workflow_account_info:
+                description:
+                    - The I(workflow_account_info) of this workflow, default the one of the module.
+                required: False
+                type: str
+            workflow_assign_to_owner:
+                description:
+                    - The I(workflow_assign_to_owner) of this workflow, default the one of the module.
+                required: False
+                type: bool
+            workflow_category:
+                description:
+                    - The I(workflow_category) of this workflow, default the one of the module.
+                required: False
+                type: str
+                choices:
+                    - general
+                    - configuration
+            workflow_comments:
+                description:
+                    - The I(workflow_comments) of this workflow, default the one of the module.
+                required: False
+                type: str
+            workflow_delete_completed_jobs:
+                description:
+                    - The I(workflow_delete_completed_jobs) of this workflow, default the one of the module.
+                required: False
+                type: bool
+            workflow_file:
+                description:
+                    - The I(workflow_file) of this workflow, default the one of the module.
+                required: False
+                type: str
+            workflow_file_system:
+                description:
+                    - The I(workflow_file_system) of this workflow, default the one of the module.
+                required: False
+                type: str
+            workflow_host:
+                description:
+                    - The I(workflow_host) of this workflow, default the one of the module.
+                required: False
+                type: str
+            workflow_job_statement:
+                description:
+                    - The I(workflow_job_statement) of this workflow, default the one of the module.
+                required: False
+                type: str
+            workflow_notification_url:
+                description:
+                    - The I(workflow_notification_url) of this workflow, default the one of the module.
+                required: False
+                type: str
+            workflow_owner:
+                description:
+                    - The I(workflow_owner) of this workflow, default the one of the module.
+                required: False
+                type: str
+            workflow_perform_subsequent:
+                description:
+                    - The I(workflow_perform_subsequent) of this workflow, default the one of the module.
+                required: False
+                type: bool
+            workflow_resolve_conflict_by_using:
+                description:
+                    - The I(workflow_resolve_conflict_by_using) of this workflow, default the one of the module.
+                required: False
+                type: str
+                choices:
+                    - outputFileValue
+                    - existingValue
+                    - leaveConflict
+            workflow_resolve_global_conflict_by_using:
+                description:
+                    - The I(workflow_resolve_global_conflict_by_using) of this workflow, default the one of the module.
+                required: False
+                type: str
+                choices:
+                    - global
+                    - input
+            workflow_step_name:
+                description:
+                    - The I(workflow_step_name) of this workflow, default the one of the module.
+                required: False
+                type: str
+            workflow_vars:
+                description:
+                    - The I(workflow_vars) of this workflow, default the one of the module.
+                required: False
+                type: dict
+            workflow_vars_file:
+                description:
+                    - The I(workflow_vars_file) of this workflow, default the one of the module.
+                required: False
+                type: str
+            workflow_vendor:
+                description:
+                    - The I(workflow_vendor) of this workflow, default the one of the module.
+                required: False
+                type: str
+    max_concurrency:
+        description:
+            - >
+              The maximum number of workflow instances started or in progress
+              at the same time when I(state=completed).
+            - >
+              The maximum number of workflow instances whose properties, or
+              definition files, are retrieved at the same time when
+              I(state=planned).
+            - >
+              The maximum number of workflow instances whose properties are
+              retrieved, or which are deleted, at the same time when
+              I(bulk_delete) is supplied.
+        required: False
+        type: int
+        default: 10
+    force_complete:
+        description:
+            - >
+              Whether the existing workflow instances are deleted and the
+              workflows are completed again when I(state=completed), or
+              planned to be when I(state=planned).
+        required: False
+        type: bool
+        default: False
+    complete_check_times:
+        description:
+            - >
+              The maximum number of checks of every workflow instance when
+              I(state=completed).
+        required: False
+        type: int
+        default: 10
+    complete_check_delay:
+        description:
+            - >
+              The interval time (in seconds) between the checks of the
+              workflow instances in progress when I(state=completed).
+        required: False
+        type: int
+        default: 5
+    workflow_hosts:
+        description:
+            - >
+              The nicknames of the z/OS systems to complete the workflows on
+              when I(state=completed), or to plan them on when
+              I(state=planned), instead of the one of I(workflow_host).
+            - >
+              The workflows in I(workflows), or the one named
+              I(workflow_name), are repeated for every system, named by
+              I(workflow_name_template). The workflows each one depends on
+              are the ones of the same system.
+            - >
+              The result of every system is returned as I(hosts).
+        required: False
+        type: list
+        elements: str
+    workflow_name_template:
+        description:
+            - >
+              The name of the workflow instance of every system of
+              I(workflow_hosts), where C({workflow_name}) is replaced by the
+              name of the workflow and C({workflow_host}) by the nickname of
+              the system.
+            - It must contain C({workflow_host}).
+        required: False
+        type: str
+        default: "{workflow_name}_{workflow_host}"
+    workflow_plan:
+        description:
+            - >
+              The plan returned as I(plan) by I(state=planned), run when
+              I(state=completed).
+            - >
+              The workflow instances in the plan are not found and compared
+              again, they are started, created and started, or deleted and
+              created and started with the planned I(workflow_key), as
+              planned. The workflows of I(workflows) not in the plan are
+              completed as usual.
+            - >
+              Run it soon after I(state=planned), the workflow instances
+              changed meanwhile are not planned again, for example, creating
+              a workflow instance created meanwhile fails.
+        required: False
+        type: list
+        elements: dict
+        suboptions:
+            workflow_name:
+                description:
+                    - The I(workflow_name) of the workflow, one of I(workflows).
+                required: True
+                type: str
+            workflow_key:
+                description:
+                    - The key of the existing workflow instance.
+                    - Required when I(action=recreate/start).
+                required: False
+                type: str
+            action:
+                description:
+                    - >
+                      C(create) to create and start the workflow instance,
+                      C(recreate) to delete it and then create and start it,
+                      C(start) to start it, C(none) when it is completed.
+                required: True
+                type: str
+                choices:
+                    - create
+                    - recreate
+                    - start
+                    - none
+            message:
+                description:
+                    - The reason of the action, returned as the message when I(action=none).
+                required: False
+                type: str
+    bulk_delete:
+        description:
+            - >
+              The selection of the workflow instances deleted together when
+              I(state=deleted), rather than the one specified by
+              I(workflow_name) or I(workflow_key), which are ignored.
+            - >
+              The workflow instances are listed with one call filtered by
+              I(workflow_name), I(workflow_category), I(workflow_host),
+              I(workflow_vendor), and by I(workflow_owner) and
+              I(workflow_status) when they have one value. When
+              I(older_than_days) is supplied, the properties of the listed
+              workflow instances are retrieved to find their last activity.
+            - >
+              The selected workflow instances are deleted concurrently, with
+              at most I(max_concurrency) deletes at the same time, and the
+              module fails when any of them is not deleted.
+            - >
+              Deleting the completed workflow instances regularly keeps every
+              list call of the collection, and of z/OSMF Workflows task,
+              small.
+        required: False
+        type: dict
+        default: null
+        suboptions:
+            workflow_name:
+                description:
+                    - >
+                      Name of the workflow instances. A regular expression can
+                      be used, for example, C(ansible_sample_workflow_.*).
+                required: False
+                type: str
+            workflow_category:
+                description:
+                    - Category of the workflow instances.
+                required: False
+                type: str
+                choices:
+                    - general
+                    - configuration
+            workflow_host:
+                description:
+                    - >
+                      Nickname of the z/OS system on which the workflow
+                      instances are performed.
+                required: False
+                type: str
+            workflow_vendor:
+                description:
+                    - >
+                      Name of the vendor that provided the workflow definition
+                      file.
+                required: False
+                type: str
+            workflow_owner:
+                description:
+                    - User names of the owners of the workflow instances.
+                    - If this value is omitted, I(zmf_user) is used.
+                required: False
+                type: list
+                elements: str
+                default: []
+            workflow_status:
+                description:
+                    - Statuses of the workflow instances.
+                required: False
+                type: list
+                elements: str
+                default:
+                    - complete
+                choices:
+                    - in-progress
+                    - complete
+                    - automation-in-progress
+                    - canceled
+            older_than_days:
+                description:
+                    - >
+                      Select only the workflow instances whose last activity
+                      is older than this number of days: the end of their
+                      automation, the start of the automation still running,
+                      or their creation when they were never automated.
+                required: False
+                type: float
+            max_rate:
+                description:
+                    - >
+                      The maximum number of deletes started per second, which
+                      keeps the load of the z/OSMF server low. If the value is
+                      C(0), the deletes are not limited.
+                required: False
+                type: float
+                default: 10
+            dry_run:
+                description:
+                    - >
+                      Whether to only return the selected workflow instances as
+                      I(workflows), without deleting them.
+                required: False
+                type: bool
+                default: False
 
 notes:
     - >
@@ -435,13 +1093,146 @@ EXAMPLES = r"""
     state: "check"
     zmf_credential: "{{ result_auth }}"
     workflow_name: "ansible_sample_workflow_SY1"
+
+- name: Check the status of a workflow, keep only its key and status, and write the full result to a file
+  ibm.ibm_zosmf.zmf_workflow:
+    state: "check"
+    zmf_credential: "{{ result_auth }}"
+    workflow_name: "ansible_sample_workflow_{{ inventory_hostname }}"
+    result_detail: "minimal"
+    result_file: "/tmp/{{ inventory_hostname }}_workflow.json"
+
+- name: Check the status of a workflow, and return and record only its progress since the previous check
+  ibm.ibm_zosmf.zmf_workflow:
+    state: "check"
+    zmf_credential: "{{ result_auth }}"
+    workflow_name: "ansible_sample_workflow_{{ inventory_hostname }}"
+    progress_events: true
+    result_detail: "minimal"
+
+- name: Complete the workflows of a build, each one once the ones it depends on are completed
+  ibm.ibm_zosmf.zmf_workflow:
+    state: "completed"
+    zmf_credential: "{{ result_auth }}"
+    workflow_host: "{{ inventory_hostname }}"
+    workflow_file: "/zosmf/workflow_def/workflow_sample_automation_steps.xml"
+    workflows:
+      - workflow_name: "ansible_build_base_{{ inventory_hostname }}"
+      - workflow_name: "ansible_build_db2_{{ inventory_hostname }}"
+        depends_on:
+          - "ansible_build_base_{{ inventory_hostname }}"
+      - workflow_name: "ansible_build_mq_{{ inventory_hostname }}"
+        workflow_vars:
+          QMGR: "MQ01"
+        depends_on:
+          - "ansible_build_base_{{ inventory_hostname }}"
+    max_concurrency: 5
+    complete_check_times: 60
+    complete_check_delay: 10
+
+- name: Plan the workflows of a build, comparing the existing workflow instances with one list call
+  ibm.ibm_zosmf.zmf_workflow:
+    state: "planned"
+    zmf_credential: "{{ result_auth }}"
+    workflow_host: "{{ inventory_hostname }}"
+    workflow_file: "/zosmf/workflow_def/workflow_sample_automation_steps.xml"
+    workflows:
+      - workflow_name: "ansible_build_base_{{ inventory_hostname }}"
+      - workflow_name: "ansible_build_db2_{{ inventory_hostname }}"
+        depends_on:
+          - "ansible_build_base_{{ inventory_hostname }}"
+  register: result_plan
+
+- name: Run the plan, without finding and comparing the workflow instances again
+  ibm.ibm_zosmf.zmf_workflow:
+    state: "completed"
+    zmf_credential: "{{ result_auth }}"
+    workflow_host: "{{ inventory_hostname }}"
+    workflow_file: "/zosmf/workflow_def/workflow_sample_automation_steps.xml"
+    workflows:
+      - workflow_name: "ansible_build_base_{{ inventory_hostname }}"
+      - workflow_name: "ansible_build_db2_{{ inventory_hostname }}"
+        depends_on:
+          - "ansible_build_base_{{ inventory_hostname }}"
+    workflow_plan: "{{ result_plan.plan }}"
+
+- name: Complete a workflow on all the systems of a sysplex through one session
+  ibm.ibm_zosmf.zmf_workflow:
+    state: "completed"
+    zmf_credential: "{{ result_auth }}"
+    workflow_name: "ansible_sample_workflow"
+    workflow_file: "/zosmf/workflow_def/workflow_sample_automation_steps.xml"
+    workflow_hosts:
+      - "SY1"
+      - "SY2"
+      - "SY3"
+      - "SY4"
+    complete_check_times: 60
+    complete_check_delay: 10
+  run_once: true
+
+- name: Start a workflow instance created in advance, and keep 2 workflow instances created for the next runs
+  ibm.ibm_zosmf.zmf_workflow:
+    state: "started"
+    zmf_credential: "{{ result_auth }}"
+    workflow_file: "/zosmf/workflow_def/workflow_sample_automation_steps.xml"
+    workflow_host: "{{ inventory_hostname }}"
+    workflow_pool_size: 2
+  register: result_start
+
+- name: Report the completed or canceled workflow instances created by Ansible more than 30 days ago
+  ibm.ibm_zosmf.zmf_workflow:
+    state: "deleted"
+    zmf_credential: "{{ result_auth }}"
+    bulk_delete:
+      workflow_name: "ansible_.*"
+      workflow_status:
+        - "complete"
+        - "canceled"
+      older_than_days: 30
+      dry_run: true
+  register: result_cleanup
+
+- name: Delete them, 5 per second at most
+  ibm.ibm_zosmf.zmf_workflow:
+    state: "deleted"
+    zmf_credential: "{{ result_auth }}"
+    bulk_delete:
+      workflow_name: "ansible_.*"
+      workflow_status:
+        - "complete"
+        - "canceled"
+      older_than_days: 30
+      max_rate: 5
+    result_detail: "minimal"
+
+- name: Check the status of a workflow until it is completed, polling around its predicted end
+  ibm.ibm_zosmf.zmf_workflow:
+    state: "check"
+    zmf_credential: "{{ result_auth }}"
+    workflow_name: "ansible_sample_workflow_SY1"
+    adaptive_polling: true
+  register: result
+  until: (result is failed) or (not result.waiting)
+  retries: 50
+  delay: 0
+
+- name: Check the status of a workflow on the fastest healthy z/OSMF of the sysplex
+  ibm.ibm_zosmf.zmf_workflow:
+    state: "check"
+    zmf_endpoints:
+      - "plex1.ibm.com:10443"
+      - "plex2.ibm.com:10443"
+    zmf_user: "{{ zmf_user }}"
+    zmf_password: "{{ zmf_password }}"
+    workflow_name: "ansible_sample_workflow_SY1"
 """
 
 RETURN = r"""
 changed:
     description:
         - Indicates if any change is made during the module operation.
-        - If `state=existed/check`, always return false.
+        - If `state=existed/check/planned`, always return false.
         - If `state=started` and the workflow is started, return true.
         - If `state=deleted` and the workflow is deleted, return true.
     returned: always
@@ -460,7 +1251,14 @@ message:
         - >
           If `state=check`, indicate whether the workflow is completed, is not
           completed, or is still in progress.
-    returned: on success
+        - If `state=completed`, indicate that all the workflows are completed.
+        - >
+          If `state=planned`, indicate how many workflows are planned to be
+          created, recreated or started, and how many are completed.
+        - >
+          If `state=deleted` and I(bulk_delete) is supplied, indicate how many
+          workflow instances are selected, and deleted.
+    returned: on success when `result_detail=normal/full`
     type: str
     sample:
         sample1: >-
@@ -503,6 +1301,17 @@ message:
           Workflow instance named: ansible_sample_workflow_SY1 is deleted.
         sample11: >-
           Workflow instance named: ansible_sample_workflow_SY1 does not exist.
+        sample12: >-
+          Workflow instance named:
+          ansible_pool_3f2a9c0e5b7d1146_0c9e71a2 is claimed from the pool and
+          started, you can use state=check to check its final status.
+        sample13: >-
+          12 workflow instances are selected to be deleted.
+        sample14: >-
+          12 of 12 selected workflow instances are deleted.
+        sample15: >-
+          4 workflow instances are planned: 1 to create, 1 to recreate, 1 to
+          start and 1 completed.
 workflow_key:
     description:
         - Generated key to uniquely identify the existing or started workflow.
@@ -512,6 +1321,10 @@ workflow_key:
 workflow_name:
     description:
         - Descriptive name of the workflow.
+        - >
+          If `state=started` and I(workflow_pool_size) is greater than 0,
+          the name of the workflow instance claimed from the pool or created
+          like the ones of the pool.
     returned: on success when `state=existed/started/check/deleted`
     type: str
     sample: "ansible_sample_workflow_SY1"
@@ -534,29 +1347,355 @@ waiting:
 completed:
     description:
         - >
-          Indicate whether the workflow is completed.
-          Return True if the status of the workflow is 'complete'. Otherwise, return False.
-    returned: on success when `state=existed/check`
-    type: bool
-deleted:
-    description: Indicate whether the workflow is deleted.
-    returned: on success when `state=deleted`
-    type: bool
+          Indicate whether the workflow is completed.
+          Return True if the status of the workflow is 'complete'. Otherwise, return False.
+    returned: on success when `state=existed/check`
+    type: bool
+deleted:
+    description: Indicate whether the workflow is deleted.
+    returned: on success when `state=deleted`
+    type: bool
+workflows:
+    description:
+        - >
+          The result of every workflow of I(workflows), in the same order,
+          when `state=completed`.
+        - >
+          The workflow instances selected by I(bulk_delete), when
+          `state=deleted`.
+        - >
+          With I(result_detail=minimal), only I(workflow_name),
+          I(workflow_key), and I(completed) or I(deleted) are returned.
+    returned: when `state=completed`, or `state=deleted` and I(bulk_delete) is supplied
+    type: list
+    elements: dict
+    contains:
+        workflow_name:
+            description: Descriptive name of the workflow.
+            type: str
+        workflow_key:
+            description: Generated key to uniquely identify the workflow, empty when it is not started.
+            type: str
+        completed:
+            description: Indicate whether the workflow is completed.
+            type: bool
+        message:
+            description: >
+              The message of the last check of the workflow, or the reason
+              why it is not started.
+            type: str
+        seconds:
+            description: >
+              The seconds from the start of the workflow to the check that
+              found it completed or not completed, absent when it is not
+              started.
+            type: float
+        workflow_host:
+            description: Nickname of the z/OS system of the workflow, with I(bulk_delete) or I(workflow_hosts).
+            type: str
+        workflow_owner:
+            description: User name of the owner of the workflow, with I(bulk_delete).
+            type: str
+        workflow_status:
+            description: Status of the workflow, with I(bulk_delete).
+            type: str
+        age_days:
+            description: >
+              Days since the last activity of the workflow, with I(bulk_delete)
+              when I(older_than_days) is supplied.
+            type: float
+        deleted:
+            description: >
+              Indicate whether the workflow is deleted, with I(bulk_delete).
+              The message of the failure is returned as I(message) when it is
+              not deleted.
+            type: bool
+    sample:
+        [
+            {
+                "workflow_name": "ansible_build_base_SY1",
+                "workflow_key": "2535b19e-a8c3-4a52-9d77-e30bb920f912",
+                "completed": true,
+                "message": "Workflow instance with key: 2535b19e-a8c3-4a52-9d77-e30bb920f912 is completed.",
+                "seconds": 372.415
+            }
+        ]
+critical_path:
+    description:
+        - >
+          The names of the chain of dependent workflows that set the time
+          taken, when `state=completed`: the workflow finished last, preceded
+          by the workflow it depends on finished last, and so on.
+    returned: when `state=completed`
+    type: list
+    elements: str
+    sample:
+        - "ansible_build_base_SY1"
+        - "ansible_build_db2_SY1"
+plan:
+    description:
+        - >
+          The action planned for every workflow of I(workflows), in the same
+          order, when `state=planned`. Pass it as I(workflow_plan) with
+          `state=completed` to run it.
+        - >
+          With I(result_detail=minimal), only I(workflow_name),
+          I(workflow_key) and I(action) are returned.
+    returned: when `state=planned`
+    type: list
+    elements: dict
+    contains:
+        workflow_name:
+            description: Descriptive name of the workflow.
+            type: str
+        workflow_key:
+            description: Generated key to uniquely identify the existing workflow instance, empty when it does not exist.
+            type: str
+        action:
+            description: >
+              C(create) when the workflow instance does not exist, C(recreate)
+              when it is different or I(force_complete=true), C(start) when
+              it is the same and not completed, C(none) when it is the same and
+              completed.
+            type: str
+        message:
+            description: >
+              The reason of the action, with the different definition file,
+              variable or property when the workflow instance is different.
+            type: str
+    sample:
+        [
+            {
+                "workflow_name": "ansible_build_mq_SY1",
+                "workflow_key": "2535b19e-a8c3-4a52-9d77-e30bb920f912",
+                "action": "recreate",
+                "message": "Workflow instance named: ansible_build_mq_SY1 with different variable: QMGR = MQ01 is found."
+            }
+        ]
+api_calls:
+    description:
+        - >
+          The number of calls of every workflow API to run the plan with
+          `state=completed`, apart from the checks of the workflow instances
+          started, when `state=planned`.
+    returned: when `state=planned`
+    type: dict
+    sample:
+        delete: 1
+        create: 2
+        start: 3
+hosts:
+    description:
+        - >
+          The result of every system of I(workflow_hosts), in the same order,
+          when `state=completed`.
+    returned: when `state=completed` and I(workflow_hosts) is supplied
+    type: list
+    elements: dict
+    contains:
+        workflow_host:
+            description: Nickname of the z/OS system.
+            type: str
+        completed:
+            description: Indicate whether all the workflows of the system are completed.
+            type: bool
+        message:
+            description: >
+              Indicate that all the workflows of the system are completed, or
+              the ones not completed.
+            type: str
+    sample:
+        [
+            {
+                "workflow_host": "SY1",
+                "completed": true,
+                "message": "All the 1 workflow instances are completed."
+            },
+            {
+                "workflow_host": "SY2",
+                "completed": false,
+                "message": "1 of 1 workflow instances are not completed: ansible_sample_workflow_SY2."
+            }
+        ]
+seconds:
+    description: The seconds taken to complete the workflows when `state=completed`.
+    returned: when `state=completed` and `result_detail=normal/full`
+    type: float
+    sample: 1240.2
+workflow_properties:
+    description:
+        - >
+          The properties of the workflow instance, as returned by the z/OSMF
+          workflow REST service to retrieve the properties of a workflow.
+    returned: on success when `state=existed/check` and `result_detail=full`
+    type: dict
+result_file:
+    description:
+        - The location of the file the full result is written to.
+    returned: on success when `result_detail=minimal` and `result_file` is supplied
+    type: str
+    sample: "/tmp/SY1_workflow.json"
+progress_events:
+    description:
+        - >
+          The progress of the workflow instance since its previous check, one
+          event per change, in the order they are appended to
+          I(progress_events_file).
+        - >
+          An event of type C(status), C(percent) or C(step) contains the value
+          before and after the change, C(before) is null for the first check.
+          An event of type C(message) contains the ID and text of the new
+          automation message.
+    returned: on success when `state=check` and `progress_events=true`
+    type: list
+    elements: dict
+    sample:
+        - event: "step"
+          step: "1.2"
+          title: "Step title"
+          before: "In Progress"
+          after: "Complete"
+          time: 1666137600.125
+          workflow_key: "2535b19e-a8c3-4a52-9d77-e30bb920f912"
+        - event: "percent"
+          before: 28
+          after: 42
+          time: 1666137600.125
+          workflow_key: "2535b19e-a8c3-4a52-9d77-e30bb920f912"
+progress_events_file:
+    description:
+        - >
+          The file the progress events of the workflow instance are appended
+          to, null when it cannot be written.
+    returned: on success when `state=check` and `progress_events=true`
+    type: str
+    sample: "/root/.ansible/cache/ibm_zosmf/events/2535b19e-a8c3-4a52-9d77-e30bb920f912.jsonl"
+predicted_seconds:
+    description:
+        - >
+          The seconds until the workflow instance is expected to complete,
+          negative when it is late, predicted from the durations of the earlier
+          workflow instances of the same workflow definition.
+        - Null when no workflow instance of the workflow definition has completed yet.
+    returned: on success when `state=check`, `adaptive_polling=true` and the workflow instance is in progress
+    type: float
+    sample: 1180.5
+next_check_seconds:
+    description:
+        - The seconds until the next check of the workflow instance is scheduled.
+    returned: on success when `state=check`, `adaptive_polling=true` and the workflow instance is in progress
+    type: float
+    sample: 590.25
+zmf_credential:
+    description:
+        - >
+          The authentication credentials obtained when the token of the
+          supplied I(zmf_credential) expired, in the format returned by
+          module M(zmf_authenticate). Pass it to the later tasks.
+    returned: when the token of I(zmf_credential) is renewed, also on failure
+    type: dict
 """
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import (
     get_connect_argument_spec,
     get_connect_session,
-    cmp_list
+    get_result_argument_spec,
+    apply_result_detail,
+    exit_module,
+    return_renewed_credential,
+    cmp_list,
+    run_in_parallel,
+    HostFailure,
+    HostModule
 )
 from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_workflow_api \
     import (
         get_request_argument_spec,
+        get_workflow_fingerprint,
+        add_workflow_fingerprint,
+        split_workflow_fingerprint,
         call_workflow_api
     )
+from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_workflow_poll \
+    import (
+        RUNNING_STATUS,
+        poll_workflow_properties,
+        record_progress_events,
+        track_workflow_start,
+        wait_for_workflow_poll,
+        schedule_workflow_poll,
+        get_pool_workflow_name,
+        claim_pooled_workflow,
+        reserve_pooled_workflows,
+        add_pooled_workflows,
+        remove_stale_pools
+    )
 import json
 
+# the result keys returned with result_detail=minimal
+MINIMAL_RESULT_KEYS = ('workflow_key', 'workflow_name', 'same_workflow_instance',
+                       'waiting', 'completed', 'deleted', 'progress_events',
+                       'progress_events_file', 'workflows', 'critical_path',
+                       'plan', 'api_calls', 'hosts')
+# the result keys only returned with result_detail=full
+FULL_RESULT_KEYS = ('workflow_properties',)
+# the keys of the workflow instances of state=completed/deleted/planned kept with result_detail=minimal
+MINIMAL_ITEM_KEYS = dict(workflows=('workflow_name', 'workflow_key', 'completed', 'deleted'),
+                         plan=('workflow_name', 'workflow_key', 'action'))
+
+
+def exit_workflow(module, **kwargs):
+    """
+    Exit the module with the result, with the detail chosen by result_detail.
+    :param AnsibleModule module: the ansible module
+    """
+    exit_module(module, **apply_result_detail(module, kwargs, MINIMAL_RESULT_KEYS, FULL_RESULT_KEYS,
+                                              MINIMAL_ITEM_KEYS))
+
+
+class WorkflowExit(Exception):
+    """
+    Raised by the module of one workflow instance of state=completed when an
+    action exits with its result.
+    """
+
+    def __init__(self, result):
+        super(WorkflowExit, self).__init__(result.get('message'))
+        self.result = result
+
+
+class WorkflowModule(HostModule):
+    """
+    The module seen by the actions on one workflow instance of
+    state=completed, with its own copy of the module arguments and the
+    session shared by all the workflow instances. exit_json raises
+    WorkflowExit and fail_json raises HostFailure instead of exiting.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the session shared by the workflow instances
+    :param params: the module arguments of the workflow instance
+    """
+
+    def __init__(self, module, session, **params):
+        super(WorkflowModule, self).__init__(module, **params)
+        self.zmf_session = session
+
+    def exit_json(self, **kwargs):
+        raise WorkflowExit(kwargs)
+
+
+def get_workflow_session(module):
+    """
+    Return the session shared by the workflow instances of state=completed,
+    or a new connection session.
+    :param AnsibleModule module: the ansible module
+    :rtype: Request
+    """
+    session = getattr(module, 'zmf_session', None)
+    if session is not None:
+        return session
+    return get_connect_session(module)
+
 
 def get_next_step_name(module, current_step_number, response_retrieveP):
     """
@@ -739,6 +1878,8 @@ def is_same_workflow_instance(module, argument_spec_mapping,
                     res_v = res_v[res_v.rindex('.') + 1:]
             elif k == 'workflow_owner' and (v is None or str(v).strip() == ''):
                 v = module.params['zmf_user']
+            elif k == 'workflow_comments':
+                res_v = split_workflow_fingerprint(res_v)[0]
             elif v is None and 'default' in argument_spec_mapping[k]:
                 v = argument_spec_mapping[k]['default']
             if (isinstance(v, str) and v.strip() != '') or isinstance(v, bool):
@@ -747,6 +1888,88 @@ def is_same_workflow_instance(module, argument_spec_mapping,
     return (sameD, sameV, sameP, diff_name, diff_value)
 
 
+def is_same_workflow_fingerprint(module, response_retrieveP):
+    """
+    Indicate whether the workflow instance was created with the fingerprint
+    of the module arguments, when workflow_fingerprint is true.
+    :param AnsibleModule module: the ansible module
+    :param dict response_retrieveP: the properties of the workflow instance
+    :rtype: bool
+    """
+    if not module.params['workflow_fingerprint']:
+        return False
+    return (split_workflow_fingerprint(response_retrieveP.get('comments'))[1]
+            == get_workflow_fingerprint(module))
+
+
+def get_compare_result(module, argument_spec_mapping,
+                       response_retrieveP, response_retrieveD):
+    """
+    Compare the existing workflow instance with the module arguments, and
+    return the same_workflow_instance and completed flags and the message
+    of state=existed.
+    :param AnsibleModule module: the ansible module
+    :param dict[str, dict] argument_spec_mapping:
+        the mapping between arguments of ansible module and params of all
+        workflow APIs
+    :param dict response_retrieveP: the properties of the workflow instance
+    :param dict response_retrieveD: the definition file of the workflow
+        instance, empty when workflow_file is not supplied
+    :rtype: dict
+    """
+    compare_result = dict(same_workflow_instance=False, completed=False,
+                          message='')
+    if is_same_workflow_fingerprint(module, response_retrieveP):
+        # created with the same definition file, variables and properties,
+        # the MD5 value of the definition file is compared when retrieved
+        sameD = True
+        if ('workflowDefinitionFileMD5Value' in response_retrieveD
+                and response_retrieveD['workflowDefinitionFileMD5Value']
+                != response_retrieveP.get('workflowDefinitionFileMD5Value')):
+            sameD = False
+        sameV = True
+        if (module.params['workflow_vars_file'] is not None
+                and module.params['workflow_vars_file'].strip() != ''):
+            # the content of the variable input file may have changed
+            sameV = None
+        (sameP, diff_name, diff_value) = (True, '', '')
+    else:
+        (sameD, sameV, sameP, diff_name, diff_value) = \
+            is_same_workflow_instance(module, argument_spec_mapping,
+                                      response_retrieveP, response_retrieveD)
+    if sameD is False:
+        compare_result['message'] = 'Workflow instance named: ' \
+            + module.params['workflow_name'].strip() \
+            + ' with different definition file is found.'
+    elif sameV is False:
+        compare_result['message'] = 'Workflow instance named: ' \
+            + module.params['workflow_name'].strip() \
+            + ' with different variable: ' \
+            + diff_name + ' = ' + str(diff_value) + ' is found.'
+    elif sameP is False:
+        compare_result['message'] = 'Workflow instance named: ' \
+            + module.params['workflow_name'].strip() \
+            + ' with different property: ' \
+            + diff_name + ' = ' + str(diff_value) + ' is found.'
+    elif sameD is None or sameV is None:
+        compare_result['same_workflow_instance'] = True
+        compare_result['message'] = 'Workflow instance named: ' \
+            + module.params['workflow_name'].strip() \
+            + ' is found. While it could not be compared since the argument:'\
+            + ' workflow_file is required, and please supply variables by the'\
+            + ' argument: workflow_vars rather than the argument:' \
+            + ' workflow_vars_file.'
+    else:
+        compare_result['same_workflow_instance'] = True
+        compare_result['message'] = 'Workflow instance named: ' \
+            + module.params['workflow_name'].strip() \
+            + ' with same definition file, variables and properties is found.'
+    if (compare_result['same_workflow_instance'] is not False
+            and response_retrieveP['statusName'] == 'complete'):
+        compare_result['completed'] = True
+    return compare_result
+
+
 def action_compare(module, argument_spec_mapping):
     """
     Indicate whether the workflow instance specified by workflow_name already
@@ -780,7 +2003,7 @@ def action_compare(module, argument_spec_mapping):
         message=''
     )
     # create session
-    session = get_connect_session(module)
+    session = get_workflow_session(module)
     # step1.1 - find workflow instance by name
     response_list = call_workflow_api(module, session, 'list', workflow_key)
     if isinstance(response_list, dict):
@@ -819,23 +2042,28 @@ def action_compare(module, argument_spec_mapping):
                 compare_result['message'] = 'No workflow instance named: ' \
                     + module.params['workflow_name'].strip() \
                     + ' is found.'
-                module.exit_json(**compare_result)
+                exit_workflow(module, **compare_result)
         else:
             module.fail_json(
                 msg='Failed to find workflow instance named: '
                 + module.params['workflow_name'].strip()
                 + ' ---- ' + response_list)
     # step2 - compare the properties and definition files
+    # the steps are not compared
     response_retrieveP = call_workflow_api(module, session,
-                                           'retrieveProperties', workflow_key)
+                                           'retrieveProperties', workflow_key,
+                                           dict(returnData='variables'))
     if isinstance(response_retrieveP, str):
         module.fail_json(
             msg='Failed to get properties of workflow instance named: '
             + module.params['workflow_name'].strip()
             + ' ---- ' + response_retrieveP)
     response_retrieveD = {}
+    # the fingerprint covers the path of the definition file, which is not
+    # retrieved when it matches
     if (module.params['workflow_file'] is not None
-            and module.params['workflow_file'].strip() != ''):
+            and module.params['workflow_file'].strip() != ''
+            and not is_same_workflow_fingerprint(module, response_retrieveP)):
         response_retrieveD = call_workflow_api(module, session,
                                                'retrieveDefinition',
                                                workflow_key)
@@ -845,53 +2073,72 @@ def action_compare(module, argument_spec_mapping):
                 + 'named: '
                 + module.params['workflow_name'].strip()
                 + ' ---- ' + response_retrieveD)
-    (sameD, sameV, sameP, diff_name, diff_value) = \
-        is_same_workflow_instance(module, argument_spec_mapping,
-                                  response_retrieveP, response_retrieveD)
-    if sameD is False:
-        compare_result['message'] = 'Workflow instance named: ' \
-            + module.params['workflow_name'].strip() \
-            + ' with different definition file is found.'
-    elif sameV is False:
-        compare_result['message'] = 'Workflow instance named: ' \
-            + module.params['workflow_name'].strip() \
-            + ' with different variable: ' \
-            + diff_name + ' = ' + str(diff_value) + ' is found.'
-    elif sameP is False:
-        compare_result['message'] = 'Workflow instance named: ' \
-            + module.params['workflow_name'].strip() \
-            + ' with different property: ' \
-            + diff_name + ' = ' + str(diff_value) + ' is found.'
-    elif sameD is None or sameV is None:
-        compare_result['same_workflow_instance'] = True
-        compare_result['message'] = 'Workflow instance named: ' \
-            + module.params['workflow_name'].strip() \
-            + ' is found. While it could not be compared since the argument:'\
-            + ' workflow_file is required, and please supply variables by the'\
-            + ' argument: workflow_vars rather than the argument:' \
-            + ' workflow_vars_file.'
-    else:
-        compare_result['same_workflow_instance'] = True
-        compare_result['message'] = 'Workflow instance named: ' \
-            + module.params['workflow_name'].strip() \
-            + ' with same definition file, variables and properties is found.'
-    if (compare_result['same_workflow_instance'] is not False
-            and response_retrieveP['statusName'] == 'complete'):
-        compare_result['completed'] = True
+    compare_result.update(get_compare_result(module, argument_spec_mapping,
+                                             response_retrieveP,
+                                             response_retrieveD))
     compare_result['workflow_key'] = workflow_key
-    module.exit_json(**compare_result)
+    compare_result['workflow_properties'] = response_retrieveP
+    exit_workflow(module, **compare_result)
+
+
+def refill_workflow_pool(module, session, fingerprint):
+    """
+    Create the workflow instances missing from the pool of the fingerprint,
+    up to workflow_pool_size, in parallel, and add them to the pool. The
+    creations are reserved under the lock of the pool, so the concurrent
+    modules do not fill it over workflow_pool_size. With
+    workflow_pool_cleanup, the workflow instances of the pools of the same
+    definition file and system whose variables or properties differ are
+    deleted.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the current connection session
+    :param str fingerprint: the fingerprint of the workflow instances
+    """
+    size = module.params['workflow_pool_size']
+    surplus = []
+    if module.params['workflow_pool_cleanup']:
+        surplus += remove_stale_pools(module, fingerprint)
+    reservation = reserve_pooled_workflows(module, fingerprint, size)
+    if reservation is not None:
+        comments = add_workflow_fingerprint(module.params['workflow_comments'], fingerprint)
+        names = [get_pool_workflow_name(fingerprint) for i in range(reservation['count'])]
+
+        def create(name):
+            return call_workflow_api(HostModule(module, workflow_name=name, workflow_comments=comments),
+                                     session, 'create', None)
+
+        created = []
+        for name, response in zip(names, run_in_parallel(create, names)):
+            if isinstance(response, dict) and response.get('workflowKey'):
+                created.append(dict(workflow_key=response['workflowKey'], workflow_name=name))
+            else:
+                module.warn('Failed to create workflow instance named: ' + name
+                            + ' for the pool ---- ' + str(response))
+        surplus += add_pooled_workflows(module, fingerprint, reservation, created, size)
+
+    def delete(workflow):
+        return call_workflow_api(HostModule(module), session, 'delete', workflow['workflow_key'])
+
+    for workflow, response in zip(surplus, run_in_parallel(delete, surplus)):
+        if not isinstance(response, dict):
+            module.warn('Failed to delete workflow instance named: ' + workflow['workflow_name']
+                        + ' of the pool ---- ' + str(response))
 
 
-def action_start(module):
+def action_start(module, lookup=True):
     """
     Start the workflow instance specified by workflow_key.
     If workflow_key is not supplied, create the workflow instance specified by
-    workflow_name if not exist and then start it.
+    workflow_name if not exist and then start it. If neither is supplied and
+    workflow_pool_size is greater than 0, claim a workflow instance of the
+    pool, or create one named like the workflow instances of the pool.
     Return the message to indicate the workflow instance is started.
     Return the workflow_key of the started workflow instance.
     Return the workflow_name of the started workflow instance.
 
     :param AnsibleModule module: the ansible module
+    :param bool lookup: False to skip finding the workflow instance by name,
+        when it is known not to exist
     """
     workflow_key = ''
     start_by_key = False
@@ -902,20 +2149,33 @@ def action_start(module):
         message=''
     )
     # create session
-    session = get_connect_session(module)
+    session = get_workflow_session(module)
     # decide if start by name or key
     if (module.params['workflow_key'] is not None
             and module.params['workflow_key'].strip() != ''):
         workflow_key = module.params['workflow_key'].strip()
         start_by_key = True
+    # z/OSMF cannot rename a workflow instance, so the pool only serves the
+    # starts which do not request a workflow_name
+    from_pool = False
+    if workflow_key == '' and module.params['workflow_pool_size'] > 0:
+        if (module.params['workflow_name'] is not None
+                and module.params['workflow_name'].strip() != ''):
+            module.fail_json(
+                msg='Invalid argument: workflow_name. A workflow instance of '
+                + 'the pool keeps its own name, so workflow_name cannot be '
+                + 'supplied when workflow_pool_size is greater than 0.')
+        from_pool = True
+        lookup = False
     # step1.1 - find workflow instance by name if needed
-    if workflow_key == '':
+    if workflow_key == '' and from_pool is False:
         if (module.params['workflow_name'] is None
                 or module.params['workflow_name'].strip() == ''):
             module.fail_json(
                 msg='A valid argument of either workflow_name or workflow_key'
                 + ' is required.')
         start_result['workflow_name'] = module.params['workflow_name'].strip()
+    if workflow_key == '' and lookup is True:
         response_list = call_workflow_api(module, session, 'list',
                                           workflow_key)
         if isinstance(response_list, dict):
@@ -928,7 +2188,7 @@ def action_start(module):
                 + module.params['workflow_name'].strip()
                 + ' ---- ' + response_list)
     # step1.2 - if not found, find workflow instance by case-insensitive name
-    if workflow_key == '':
+    if workflow_key == '' and lookup is True:
         tmp_name = module.params['workflow_name']
         module.params['workflow_name'] = ''
         response_list = call_workflow_api(module, session, 'list',
@@ -950,10 +2210,42 @@ def action_start(module):
                 msg='Failed to find workflow instance named: '
                 + module.params['workflow_name'].strip()
                 + ' ---- ' + response_list)
-    # step2 - create workflow instance if needed
+    # step1.3 - claim a workflow instance of the pool and start it, the ones
+    # which fail to start were removed or started by others
+    fingerprint = None
+    if from_pool is True:
+        fingerprint = get_workflow_fingerprint(module)
+    while fingerprint is not None:
+        pooled = claim_pooled_workflow(module, fingerprint)
+        if pooled is None:
+            break
+        response_start = call_workflow_api(module, session, 'start',
+                                           pooled['workflow_key'])
+        if isinstance(response_start, dict):
+            start_result['changed'] = True
+            start_result['message'] = 'Workflow instance named: ' \
+                + pooled['workflow_name'] \
+                + ' is claimed from the pool and started, ' \
+                + 'you can use state=check to check its final status.'
+            start_result['workflow_key'] = pooled['workflow_key']
+            start_result['workflow_name'] = pooled['workflow_name']
+            if module.params['adaptive_polling']:
+                track_workflow_start(module, pooled['workflow_key'])
+            refill_workflow_pool(module, session, fingerprint)
+            exit_workflow(module, **start_result)
+    # step2 - create workflow instance if needed, named like the workflow
+    # instances of the pool when the pool is empty
+    if from_pool is True:
+        module.params['workflow_name'] = get_pool_workflow_name(fingerprint)
+        start_result['workflow_name'] = module.params['workflow_name']
     if workflow_key == '':
+        comments = module.params['workflow_comments']
+        if module.params['workflow_fingerprint'] or from_pool is True:
+            module.params['workflow_comments'] = add_workflow_fingerprint(
+                comments, get_workflow_fingerprint(module))
         response_create = call_workflow_api(module, session, 'create',
                                             workflow_key)
+        module.params['workflow_comments'] = comments
         if isinstance(response_create, dict):
             if ('workflowKey' in response_create
                     and response_create['workflowKey'] != ''):
@@ -982,7 +2274,11 @@ def action_start(module):
                 + ' is started, '\
                 + 'you can use state=check to check its final status.'
         start_result['workflow_key'] = workflow_key
-        module.exit_json(**start_result)
+        if module.params['adaptive_polling']:
+            track_workflow_start(module, workflow_key)
+        if fingerprint is not None:
+            refill_workflow_pool(module, session, fingerprint)
+        exit_workflow(module, **start_result)
     else:
         # handle start issue caused by non-automated step
         next_step_message = ''
@@ -1027,7 +2323,7 @@ def action_check(module):
         message=''
     )
     # create session
-    session = get_connect_session(module)
+    session = get_workflow_session(module)
     # decide if check by name or key
     if (module.params['workflow_key'] is not None
             and module.params['workflow_key'].strip() != ''):
@@ -1084,13 +2380,34 @@ def action_check(module):
                 + module.params['workflow_name'].strip()
                 + ' ---- ' + response_list)
     # step2 - get workflow properties
-    response_retrieveP = call_workflow_api(module, session,
-                                           'retrieveProperties', workflow_key)
+    if module.params['adaptive_polling']:
+        wait_for_workflow_poll(module, workflow_key)
+    if module.params['shared_polling']:
+        response_retrieveP = poll_workflow_properties(
+            module, session, workflow_key,
+            module.params['shared_polling_interval'])
+    else:
+        response_retrieveP = call_workflow_api(module, session,
+                                               'retrieveProperties',
+                                               workflow_key)
     if isinstance(response_retrieveP, dict):
         if 'statusName' in response_retrieveP:
             status = response_retrieveP['statusName']
             check_result['workflow_key'] = workflow_key
             check_result['workflow_name'] = response_retrieveP['workflowName']
+            check_result['workflow_properties'] = response_retrieveP
+            if module.params['progress_events']:
+                (check_result['progress_events'],
+                 check_result['progress_events_file']) = \
+                    record_progress_events(module, workflow_key,
+                                           response_retrieveP)
+            if module.params['adaptive_polling']:
+                (predicted_seconds, next_check_seconds) = \
+                    schedule_workflow_poll(module, workflow_key,
+                                           response_retrieveP)
+                if next_check_seconds is not None:
+                    check_result['predicted_seconds'] = predicted_seconds
+                    check_result['next_check_seconds'] = next_check_seconds
             if status == 'automation-in-progress':
                 current_step_message = ''
                 step_status = response_retrieveP['automationStatus']
@@ -1109,7 +2426,7 @@ def action_check(module):
                     check_result['message'] = 'Workflow instance named: ' \
                         + module.params['workflow_name'].strip() \
                         + ' is still in progress.' + current_step_message
-                module.exit_json(**check_result)
+                exit_workflow(module, **check_result)
             elif status == 'complete':
                 check_result['waiting'] = False
                 check_result['completed'] = True
@@ -1120,7 +2437,7 @@ def action_check(module):
                     check_result['message'] = 'Workflow instance named: ' \
                         + module.params['workflow_name'].strip() \
                         + ' is completed.'
-                module.exit_json(**check_result)
+                exit_workflow(module, **check_result)
             else:
                 step_status = response_retrieveP['automationStatus']
                 check_result['waiting'] = False
@@ -1166,7 +2483,7 @@ def action_check(module):
                             + module.params['workflow_name'].strip() \
                             + ' is not completed: ' + current_step_message \
                             + step_status['messageText'] + next_step_message
-                module.exit_json(**check_result)
+                exit_workflow(module, **check_result)
         else:
             if check_by_key is True:
                 module.fail_json(
@@ -1211,7 +2528,7 @@ def action_delete(module):
         message=''
     )
     # create session
-    session = get_connect_session(module)
+    session = get_workflow_session(module)
     # decide if delete by name or key
     if (module.params['workflow_key'] is not None
             and module.params['workflow_key'].strip() != ''):
@@ -1263,7 +2580,7 @@ def action_delete(module):
                 delete_result['message'] = 'Workflow instance named: ' \
                     + module.params['workflow_name'].strip() \
                     + ' does not exist.'
-                module.exit_json(**delete_result)
+                exit_workflow(module, **delete_result)
         else:
             module.fail_json(
                 msg='Failed to find workflow instance named: '
@@ -1283,7 +2600,7 @@ def action_delete(module):
                 + module.params['workflow_name'].strip() \
                 + ' is deleted.'
         delete_result['workflow_key'] = workflow_key
-        module.exit_json(**delete_result)
+        exit_workflow(module, **delete_result)
     else:
         if delete_by_key is True:
             module.fail_json(
@@ -1296,6 +2613,643 @@ def action_delete(module):
                 + ' ---- ' + response_delete)
 
 
+def get_workflow_activity_time(properties):
+    """
+    Return the time (in seconds) of the last activity of the workflow
+    instance: the end of its automation, the start of the automation still
+    running, or its creation when it was never automated. None when the
+    properties contain none of them.
+    :param dict properties: the response of the retrieveProperties API
+    :rtype: float
+    """
+    automation = properties.get('automationStatus') or {}
+    for k in ('stoppedTime', 'startedTime'):
+        if automation.get(k):
+            return automation[k] / 1000.0
+    if properties.get('createdTime'):
+        return properties['createdTime'] / 1000.0
+    return None
+
+
+def select_bulk_workflows(module, session, bulk):
+    """
+    Return the workflow instances selected by bulk_delete: the ones listed
+    with its filters, with one of its statuses and owners, and inactive for
+    more than its older_than_days.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the current connection session
+    :param dict bulk: the bulk_delete argument
+    :rtype: list[dict]
+    """
+    import time
+    owners = bulk['workflow_owner']
+    if not owners:
+        if module.params['zmf_user'] is None or module.params['zmf_user'].strip() == '':
+            module.fail_json(msg='Missing required argument or invalid argument: bulk_delete.workflow_owner.')
+        owners = [module.params['zmf_user'].strip()]
+    statuses = bulk['workflow_status']
+    params = dict((k, bulk[v].strip()) for k, v in (
+        ('workflowName', 'workflow_name'), ('category', 'workflow_category'),
+        ('system', 'workflow_host'), ('vendor', 'workflow_vendor'))
+        if bulk[v] is not None and bulk[v].strip() != '')
+    # a single status or owner is filtered by z/OSMF, several ones locally
+    if len(statuses) == 1:
+        params['statusName'] = statuses[0]
+    if len(owners) == 1:
+        params['owner'] = owners[0]
+    response_list = call_workflow_api(module, session, 'list', None, params)
+    if not isinstance(response_list, dict):
+        module.fail_json(msg='Failed to list workflow instances ---- ' + response_list)
+    owners = set(o.upper() for o in owners)
+    workflows = [w for w in response_list.get('workflows') or []
+                 if w.get('statusName') in statuses and str(w.get('owner')).upper() in owners]
+    if bulk['older_than_days'] is None or not workflows:
+        return workflows
+    # the list does not return the times, only the properties do
+
+    def retrieve(workflow):
+        return call_workflow_api(HostModule(module), session, 'retrieveProperties', workflow['workflowKey'], {})
+
+    now = time.time()
+    selected = []
+    for workflow, response in zip(workflows, run_in_parallel(retrieve, workflows, module.params['max_concurrency'])):
+        activity = get_workflow_activity_time(response) if isinstance(response, dict) else None
+        if activity is not None and now - activity > bulk['older_than_days'] * 86400:
+            workflow['age_days'] = round((now - activity) / 86400, 2)
+            selected.append(workflow)
+    return selected
+
+
+def action_bulk_delete(module):
+    """
+    Delete the workflow instances selected by bulk_delete concurrently, at
+    most max_rate deletes per second, or only report them when dry_run=true.
+    Return the selected workflow instances, and whether each one is deleted.
+
+    :param AnsibleModule module: the ansible module
+    """
+    bulk = module.params['bulk_delete']
+    session = get_workflow_session(module)
+    selected = select_bulk_workflows(module, session, bulk)
+    workflows = []
+    for w in selected:
+        workflow = dict(workflow_name=w.get('workflowName'), workflow_key=w.get('workflowKey'),
+                        workflow_host=w.get('system'), workflow_owner=w.get('owner'),
+                        workflow_status=w.get('statusName'), deleted=False)
+        if 'age_days' in w:
+            workflow['age_days'] = w['age_days']
+        workflows.append(workflow)
+    if bulk['dry_run']:
+        exit_workflow(module, changed=False, workflows=workflows,
+                      message='%d workflow instances are selected to be deleted.' % len(workflows))
+
+    def delete(workflow):
+        return call_workflow_api(HostModule(module), session, 'delete', workflow['workflow_key'])
+
+    failed = 0
+    responses = run_in_parallel(delete, workflows, module.params['max_concurrency'], bulk['max_rate'])
+    for workflow, response in zip(workflows, responses):
+        if isinstance(response, dict):
+            workflow['deleted'] = True
+        else:
+            failed += 1
+            workflow['message'] = response.result['msg'] if isinstance(response, HostFailure) else str(response)
+    changed = failed < len(workflows)
+    message = '%d of %d selected workflow instances are deleted.' % (len(workflows) - failed, len(workflows))
+    if failed:
+        module.fail_json(**apply_result_detail(module, dict(changed=changed, workflows=workflows, msg=message),
+                                               MINIMAL_RESULT_KEYS, FULL_RESULT_KEYS, MINIMAL_ITEM_KEYS))
+    exit_workflow(module, changed=changed, workflows=workflows, message=message)
+
+
+def run_workflow_action(module, session, action, params, *args):
+    """
+    Run the action on one workflow instance of state=completed, and return
+    its result, with failed=True and msg when the action failed.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the session shared by the workflow instances
+    :param function action: the action, e.g. action_check
+    :param dict params: the module arguments of the workflow instance
+    :rtype: dict
+    """
+    try:
+        action(WorkflowModule(module, session, **params), *args)
+    except WorkflowExit as ex:
+        return ex.result
+    except HostFailure as ex:
+        return ex.result
+    return dict(failed=True, msg='No result is returned.')
+
+
+def sort_workflows(module, workflows):
+    """
+    Return the names of the workflow instances of state=completed, each one
+    after the ones it depends on, and the names each one depends on.
+    Fail the module when a name is repeated, a dependency is not in the list
+    or the dependencies contain a cycle.
+    :param AnsibleModule module: the ansible module
+    :param list[dict] workflows: the workflow instances
+    :rtype: (list[str], dict[str, list[str]])
+    """
+    depends_on = {}
+    for item in workflows:
+        name = item['workflow_name'].strip()
+        if name in depends_on:
+            module.fail_json(msg='Invalid argument: workflows. The workflow_name ' + name + ' is repeated.')
+        depends_on[name] = [d.strip() for d in item.get('depends_on') or []]
+    for name, names in depends_on.items():
+        for d in names:
+            if d not in depends_on:
+                module.fail_json(msg='Invalid argument: workflows. The workflow ' + name
+                                 + ' depends on ' + d + ', which is not in the list.')
+    order = []
+    pending = [item['workflow_name'].strip() for item in workflows]
+    while pending:
+        ready = [name for name in pending if all(d in order for d in depends_on[name])]
+        if not ready:
+            module.fail_json(msg='Invalid argument: workflows. The dependencies of workflows '
+                             + ', '.join(pending) + ' contain a cycle.')
+        order += ready
+        pending = [name for name in pending if name not in ready]
+    return order, depends_on
+
+
+def prepare_workflow(module, session, argument_spec_mapping, params, planned=None):
+    """
+    Get one workflow instance of state=completed started, like role
+    zmf_workflow_complete: find the existing workflow instance, delete it
+    if force_complete or it is different, and create and start it unless it
+    is already completed.
+    When the workflow instance is in workflow_plan, run the planned action
+    with the planned workflow_key instead, without finding or comparing it.
+    Return the workflow_key, the completed, changed and started flags, and
+    the message.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the session shared by the workflow instances
+    :param dict[str, dict] argument_spec_mapping:
+        the mapping between arguments of ansible module and params of all
+        workflow APIs
+    :param dict params: the module arguments of the workflow instance
+    :param dict planned: the item of workflow_plan of the workflow instance
+    :rtype: dict
+    """
+    if planned is not None:
+        return run_planned_workflow(module, session, params, planned)
+    result = dict(workflow_key='', completed=False, changed=False, started=False)
+    workflow_key = ''
+    if not module.params['force_complete']:
+        response = run_workflow_action(module, session, action_compare,
+                                       dict(params, state='existed'),
+                                       argument_spec_mapping)
+        if response.get('failed'):
+            result['message'] = response['msg']
+            return result
+        workflow_key = response['workflow_key']
+        if workflow_key and response['same_workflow_instance'] and response['completed']:
+            result.update(workflow_key=workflow_key, completed=True,
+                          message=response['message'])
+            return result
+    if module.params['force_complete'] or (workflow_key and not response['same_workflow_instance']):
+        response = run_workflow_action(module, session, action_delete,
+                                       dict(params, state='deleted', workflow_key=workflow_key))
+        if response.get('failed'):
+            result['message'] = response['msg']
+            return result
+        result['changed'] = response['changed']
+        workflow_key = ''
+    response = run_workflow_action(module, session, action_start,
+                                   dict(params, state='started', workflow_key=workflow_key))
+    if response.get('failed'):
+        result['message'] = response['msg']
+        return result
+    result.update(workflow_key=response['workflow_key'], changed=True,
+                  started=True, message=response['message'])
+    return result
+
+
+def run_planned_workflow(module, session, params, planned):
+    """
+    Run the action planned by state=planned on one workflow instance of
+    state=completed: none, start it by the planned workflow_key, create
+    and start it, or delete it by the planned workflow_key and then create
+    and start it.
+    Return the same result as prepare_workflow.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the session shared by the workflow instances
+    :param dict params: the module arguments of the workflow instance
+    :param dict planned: the item of workflow_plan of the workflow instance
+    :rtype: dict
+    """
+    result = dict(workflow_key='', completed=False, changed=False, started=False)
+    workflow_key = (planned['workflow_key'] or '').strip()
+    if planned['action'] == 'none':
+        result.update(workflow_key=workflow_key, completed=True,
+                      message=planned['message'] or '')
+        return result
+    if planned['action'] == 'recreate':
+        response = run_workflow_action(module, session, action_delete,
+                                       dict(params, state='deleted', workflow_key=workflow_key))
+        if response.get('failed'):
+            result['message'] = response['msg']
+            return result
+        result['changed'] = response['changed']
+    if planned['action'] != 'start':
+        workflow_key = ''
+    response = run_workflow_action(module, session, action_start,
+                                   dict(params, state='started', workflow_key=workflow_key),
+                                   False)
+    if response.get('failed'):
+        result['message'] = response['msg']
+        return result
+    result.update(workflow_key=response['workflow_key'], changed=True,
+                  started=True, message=response['message'])
+    return result
+
+
+def check_workflows(module, session, running):
+    """
+    Check the workflow instances of state=completed in progress together:
+    list the workflow instances whose automation is in progress with one
+    call, and check only the ones missing from the list.
+    Return the results of the checks of the workflow instances checked.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the session shared by the workflow instances
+    :param dict[str, dict] running: the module arguments of the workflow
+        instances in progress, with their workflow_key
+    :rtype: dict[str, dict]
+    """
+    changed = list(running)
+    if len(running) > 1:
+        params = dict(statusName=RUNNING_STATUS)
+        owners = set((p.get('workflow_owner', module.params['workflow_owner']) or '').strip()
+                     for p in running.values())
+        if len(owners) == 1 and '' not in owners:
+            params['owner'] = owners.pop()
+        try:
+            response_list = call_workflow_api(HostModule(module), session, 'list', None, params)
+        except HostFailure:
+            response_list = None
+        if isinstance(response_list, dict):
+            listed = set(w.get('workflowKey') for w in response_list.get('workflows') or [])
+            changed = [name for name in running if running[name]['workflow_key'] not in listed]
+
+    def check(name):
+        return run_workflow_action(module, session, action_check,
+                                   dict(running[name], state='check'))
+
+    return dict(zip(changed, run_in_parallel(check, changed, module.params['max_concurrency'])))
+
+
+def get_critical_path(depends_on, finished):
+    """
+    Return the names of the chain of workflow instances that set the
+    elapsed time of state=completed: the last one finished, preceded by
+    the one it depends on finished last, and so on.
+    :param dict[str, list[str]] depends_on: the names each one depends on
+    :param dict[str, float] finished: when the ones started finished
+    :rtype: list[str]
+    """
+    if not finished:
+        return []
+    name = max(finished, key=lambda n: finished[n])
+    path = [name]
+    while [d for d in depends_on[name] if d in finished]:
+        name = max([d for d in depends_on[name] if d in finished], key=lambda n: finished[n])
+        path.insert(0, name)
+    return path
+
+
+def get_host_workflows(module, workflows):
+    """
+    Return the workflows repeated for every system of workflow_hosts, named
+    by workflow_name_template, each one depending on the ones of the same
+    system.
+    :param AnsibleModule module: the ansible module
+    :param list[dict] workflows: the workflows of every system
+    :rtype: list[dict]
+    """
+    template = module.params['workflow_name_template']
+    if template is None or '{workflow_host}' not in template:
+        module.fail_json(msg='Invalid argument: workflow_name_template. It must contain {workflow_host}.')
+
+    def get_name(name, host):
+        return template.replace('{workflow_name}', name.strip()).replace('{workflow_host}', host)
+
+    host_workflows = []
+    for host in module.params['workflow_hosts']:
+        host = host.strip()
+        for item in workflows:
+            host_workflows.append(dict(
+                item, workflow_host=host, workflow_name=get_name(item['workflow_name'], host),
+                depends_on=[get_name(d, host) for d in item.get('depends_on') or []]))
+    return host_workflows
+
+
+def get_complete_workflows(module):
+    """
+    Return the workflow instances of state=completed and state=planned, the
+    ones in workflows or the one specified by workflow_name, for every
+    system of workflow_hosts when it is supplied, their names in the order
+    to start them, the names each one depends on, and the module arguments
+    of each one, the ones not supplied in workflows being the ones of the
+    module.
+    :param AnsibleModule module: the ansible module
+    :rtype: (list[dict], list[str], dict[str, list[str]], dict[str, dict])
+    """
+    workflows = module.params['workflows']
+    if not workflows:
+        if (module.params['workflow_name'] is None
+                or module.params['workflow_name'].strip() == ''):
+            module.fail_json(
+                msg='A valid argument of either workflow_name or workflows'
+                + ' is required.')
+        workflows = [dict(workflow_name=module.params['workflow_name'])]
+    if module.params['max_concurrency'] < 1:
+        module.fail_json(msg='Invalid argument: max_concurrency. It must be positive.')
+    if module.params['workflow_hosts']:
+        workflows = get_host_workflows(module, workflows)
+    order, depends_on = sort_workflows(module, workflows)
+    params = {}
+    for item in workflows:
+        name = item['workflow_name'].strip()
+        params[name] = dict((k, v) for k, v in item.items() if v is not None and k != 'depends_on')
+        params[name].update(workflow_name=name, workflow_key=None, shared_polling=False,
+                            adaptive_polling=False, result_detail='normal', result_file=None,
+                            workflow_pool_size=0)
+    return workflows, order, depends_on, params
+
+
+def get_host_results(module, workflows, results):
+    """
+    Return the result of every system of workflow_hosts of state=completed:
+    the completed flag and the message, and add the system to the result of
+    every workflow instance.
+    :param AnsibleModule module: the ansible module
+    :param list[dict] workflows: the workflows of every system
+    :param dict[str, dict] results: the results of the workflow instances
+    :rtype: list[dict]
+    """
+    names = {}
+    for item in workflows:
+        results[item['workflow_name']]['workflow_host'] = item['workflow_host']
+        names.setdefault(item['workflow_host'], []).append(item['workflow_name'])
+    hosts_result = []
+    for host in [h.strip() for h in module.params['workflow_hosts']]:
+        not_completed = [name for name in names[host] if not results[name]['completed']]
+        if not_completed:
+            message = str(len(not_completed)) + ' of ' + str(len(names[host])) \
+                + ' workflow instances are not completed: ' + ', '.join(not_completed) + '.'
+        else:
+            message = 'All the ' + str(len(names[host])) + ' workflow instances are completed.'
+        hosts_result.append(dict(workflow_host=host, completed=len(not_completed) == 0, message=message))
+    return hosts_result
+
+
+def action_complete(module, argument_spec_mapping):
+    """
+    Complete the workflow instances in workflows, or the one specified by
+    workflow_name, as role zmf_workflow_complete does for one.
+    Every workflow instance is started once the ones it depends on are
+    completed, with at most max_concurrency started or in progress at the
+    same time. The ones in progress are checked together every
+    complete_check_delay seconds, at most complete_check_times times each.
+    A workflow instance is not started when one it depends on is not
+    completed. The ones in workflow_plan run the action planned by
+    state=planned instead of being found and compared again, and so do all
+    of them when workflow_hosts is supplied, planned first together.
+    Return the workflow_key, the completed flag and the message of every
+    workflow instance, and the critical path.
+    :param AnsibleModule module: the ansible module
+    :param dict[str, dict] argument_spec_mapping:
+        the mapping between arguments of ansible module and params of all
+        workflow APIs
+    """
+    import time
+    workflows, order, depends_on, params = get_complete_workflows(module)
+    plan = {}
+    for item in module.params['workflow_plan'] or []:
+        name = item['workflow_name'].strip()
+        if name not in params:
+            module.fail_json(msg='Invalid argument: workflow_plan. The workflow ' + name
+                             + ' is not in the list of workflows.')
+        if item['action'] in ('recreate', 'start') and not (item['workflow_key'] or '').strip():
+            module.fail_json(msg='Invalid argument: workflow_plan. The workflow ' + name
+                             + ' has no workflow_key to ' + item['action'] + '.')
+        plan[name] = item
+    session = get_connect_session(module)
+    if module.params['workflow_hosts'] and not plan:
+        # the workflow instances of all the systems are found together
+        plan = plan_workflows(module, session, argument_spec_mapping, order, params)
+    results = dict((name, dict(workflow_name=name, workflow_key='', completed=False, message=''))
+                   for name in order)
+    began = time.time()
+    started = {}
+    finished = {}
+    checks = {}
+    running = {}
+    pending = list(order)
+    changed = False
+    last_check = began
+    while pending or running:
+        for name in list(pending):
+            failed = [d for d in depends_on[name]
+                      if d not in pending and d not in running and not results[d]['completed']]
+            if failed:
+                results[name]['message'] = 'Workflow instance named: ' + name \
+                    + ' is not started: Workflow instance named: ' + failed[0] \
+                    + ' is not completed.'
+                pending.remove(name)
+        ready = [name for name in pending if all(results[d]['completed'] for d in depends_on[name])]
+        ready = ready[:module.params['max_concurrency'] - len(running)]
+        if ready:
+            for name in ready:
+                pending.remove(name)
+                started[name] = time.time()
+
+            def prepare(name):
+                return prepare_workflow(module, session, argument_spec_mapping, params[name],
+                                        plan.get(name))
+
+            for name, result in zip(ready, run_in_parallel(prepare, ready, len(ready))):
+                if isinstance(result, Exception):
+                    result = dict(workflow_key='', completed=False, changed=False, started=False,
+                                  message=repr(result))
+                if result.pop('changed'):
+                    changed = True
+                if result.pop('started'):
+                    running[name] = dict(params[name], workflow_key=result['workflow_key'])
+                    checks[name] = 0
+                else:
+                    finished[name] = time.time()
+                results[name].update(result)
+            # the workflow instances found completed let others start
+            continue
+        if not running:
+            break
+        time.sleep(max(0, last_check + module.params['complete_check_delay'] - time.time()))
+        last_check = time.time()
+        checked = check_workflows(module, session, running)
+        for name in list(running):
+            checks[name] += 1
+            result = checked.get(name)
+            if result is None:
+                if checks[name] < module.params['complete_check_times']:
+                    continue
+                result = dict(completed=False, message='Workflow instance named: ' + name
+                              + ' is not completed: It is still in progress after '
+                              + str(checks[name]) + ' checks.')
+            elif isinstance(result, Exception):
+                result = dict(completed=False, message=repr(result))
+            elif result.get('failed'):
+                result = dict(completed=False, message=result['msg'])
+            elif result['waiting'] and checks[name] < module.params['complete_check_times']:
+                continue
+            results[name].update(completed=result['completed'], message=result['message'])
+            finished[name] = time.time()
+            running.pop(name)
+    workflows_result = [results[item['workflow_name'].strip()] for item in workflows]
+    for name in finished:
+        results[name]['seconds'] = round(finished[name] - started[name], 3)
+    complete_result = dict(
+        changed=changed,
+        workflows=workflows_result,
+        critical_path=get_critical_path(depends_on, finished),
+        seconds=round(time.time() - began, 3)
+    )
+    if module.params['workflow_hosts']:
+        complete_result['hosts'] = get_host_results(module, workflows, results)
+    not_completed = [r['workflow_name'] for r in workflows_result if not r['completed']]
+    if not_completed:
+        module.fail_json(**apply_result_detail(module, dict(
+            complete_result, msg=str(len(not_completed)) + ' of ' + str(len(workflows_result))
+            + ' workflow instances are not completed: ' + ', '.join(not_completed) + '.'),
+            MINIMAL_RESULT_KEYS, FULL_RESULT_KEYS, MINIMAL_ITEM_KEYS))
+    complete_result['message'] = 'All the ' + str(len(workflows_result)) \
+        + ' workflow instances are completed.'
+    exit_workflow(module, **complete_result)
+
+
+def plan_workflows(module, session, argument_spec_mapping, order, params):
+    """
+    Plan state=completed for the workflow instances without changing them:
+    find them all with one list call, get their properties and definition
+    files in parallel, each definition file once, and compare them locally
+    like state=existed does.
+    Return the action planned for every workflow instance with its
+    workflow_key and message, in the format of workflow_plan.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the session shared by the workflow instances
+    :param dict[str, dict] argument_spec_mapping:
+        the mapping between arguments of ansible module and params of all
+        workflow APIs
+    :param list[str] order: the names of the workflow instances
+    :param dict[str, dict] params: the module arguments of every workflow
+        instance
+    :rtype: dict[str, dict]
+    """
+    from functools import partial
+    # step1 - find the workflow instances by name, else by case-insensitive
+    # name, with one call
+    response_list = call_workflow_api(HostModule(module), session, 'list', None, {})
+    if not isinstance(response_list, dict):
+        module.fail_json(msg='Failed to list workflow instances ---- ' + response_list)
+    listed = response_list.get('workflows') or []
+    plan = {}
+    modules = {}
+    for name in order:
+        found = [w for w in listed if w.get('workflowName') == name] \
+            or [w for w in listed if str(w.get('workflowName')).upper() == name.upper()]
+        if not found:
+            plan[name] = dict(workflow_name=name, workflow_key='', action='create',
+                              message='No workflow instance named: ' + name + ' is found.')
+        elif module.params['force_complete']:
+            plan[name] = dict(workflow_name=name, workflow_key=found[0]['workflowKey'], action='recreate',
+                              message='Workflow instance named: ' + found[0]['workflowName']
+                              + ' is found, and force_complete is true.')
+        else:
+            plan[name] = dict(workflow_name=name, workflow_key=found[0]['workflowKey'], action='start',
+                              message='')
+            modules[name] = HostModule(module, **dict(params[name], state='existed',
+                                                      workflow_name=found[0]['workflowName']))
+    # step2 - get the properties of the workflow instances and their
+    # definition files in parallel, each definition file once
+    definitions = {}
+    for name, m in modules.items():
+        if m.params['workflow_file'] is not None and m.params['workflow_file'].strip() != '':
+            definitions[name] = (m.params['workflow_file'].strip(),
+                                 (m.params['workflow_file_system'] or '').strip())
+    files = sorted(set(definitions.values()))
+
+    def retrieve_properties(name):
+        return call_workflow_api(HostModule(module), session, 'retrieveProperties',
+                                 plan[name]['workflow_key'], dict(returnData='variables'))
+
+    def retrieve_definition(definition):
+        params = dict(definitionFilePath=definition[0], returnData='variables')
+        if definition[1] != '':
+            params['workflowDefinitionFileSystem'] = definition[1]
+        return call_workflow_api(HostModule(module), session, 'retrieveDefinition', None, params)
+
+    names = [name for name in order if name in modules]
+    calls = [partial(retrieve_properties, name) for name in names] \
+        + [partial(retrieve_definition, definition) for definition in files]
+    responses = run_in_parallel(lambda call: call(), calls, module.params['max_concurrency'])
+    for name, response in zip(names, responses):
+        if not isinstance(response, dict):
+            module.fail_json(msg='Failed to get properties of workflow instance named: '
+                             + modules[name].params['workflow_name'] + ' ---- ' + str(response))
+    for definition, response in zip(files, responses[len(names):]):
+        if not isinstance(response, dict):
+            module.fail_json(msg='Failed to get definition file: ' + definition[0] + ' ---- ' + str(response))
+    properties = dict(zip(names, responses))
+    definition_files = dict(zip(files, responses[len(names):]))
+    # step3 - compare the workflow instances locally
+    for name in names:
+        compare_result = get_compare_result(modules[name], argument_spec_mapping, properties[name],
+                                            definition_files.get(definitions.get(name), {}))
+        if not compare_result['same_workflow_instance']:
+            plan[name]['action'] = 'recreate'
+        elif compare_result['completed']:
+            plan[name]['action'] = 'none'
+        plan[name]['message'] = compare_result['message']
+    return plan
+
+
+def action_plan(module, argument_spec_mapping):
+    """
+    Plan state=completed for the workflow instances in workflows, or the one
+    specified by workflow_name, without changing them.
+    Return the action planned for every workflow instance with its
+    workflow_key and message, and the number of calls of every workflow API
+    to run the plan by state=completed with workflow_plan, apart from the
+    checks of the workflow instances started.
+    :param AnsibleModule module: the ansible module
+    :param dict[str, dict] argument_spec_mapping:
+        the mapping between arguments of ansible module and params of all
+        workflow APIs
+    """
+    workflows, order, depends_on, params = get_complete_workflows(module)
+    session = get_connect_session(module)
+    plan = plan_workflows(module, session, argument_spec_mapping, order, params)
+    actions = [plan[name]['action'] for name in order]
+    api_calls = dict(
+        delete=actions.count('recreate'),
+        create=actions.count('create') + actions.count('recreate'),
+        start=len(actions) - actions.count('none')
+    )
+    exit_workflow(
+        module,
+        changed=False,
+        plan=[plan[item['workflow_name'].strip()] for item in workflows],
+        api_calls=api_calls,
+        message=str(len(actions)) + ' workflow instances are planned: '
+        + str(actions.count('create')) + ' to create, '
+        + str(actions.count('recreate')) + ' to recreate, '
+        + str(actions.count('start')) + ' to start and '
+        + str(actions.count('none')) + ' completed.'
+    )
+
+
 def main():
     argument_spec = {}
     connect_argument_spec = get_connect_argument_spec()
@@ -1303,16 +3257,74 @@ def main():
         get_request_argument_spec()
     argument_spec.update(connect_argument_spec)
     argument_spec.update(request_argument_spec)
+    argument_spec.update(get_result_argument_spec())
+    # the arguments of every workflow instance of state=completed, the ones
+    # not supplied are the ones of the module
+    workflow_options = dict(
+        (k, dict((kk, vv) for kk, vv in v.items() if kk != 'default'))
+        for k, v in request_argument_spec.items())
+    workflow_options.update(
+        workflow_name=dict(required=True, type='str'),
+        depends_on=dict(required=False, type='list', elements='str',
+                        default=[]))
     argument_spec.update(
         state=dict(
             required=True, type='str',
-            choices=['existed', 'started', 'deleted', 'check']
+            choices=['existed', 'started', 'deleted', 'check', 'completed',
+                     'planned']
         ),
-        workflow_key=dict(required=False, type='str'))
+        workflow_key=dict(required=False, type='str'),
+        shared_polling=dict(required=False, type='bool', default=False),
+        shared_polling_interval=dict(required=False, type='int', default=5),
+        workflow_fingerprint=dict(required=False, type='bool', default=True),
+        workflow_pool_size=dict(required=False, type='int', default=0),
+        workflow_pool_cleanup=dict(required=False, type='bool', default=False),
+        progress_events=dict(required=False, type='bool', default=False),
+        progress_events_dir=dict(required=False, type='str'),
+        adaptive_polling=dict(required=False, type='bool', default=False),
+        adaptive_polling_interval=dict(required=False, type='int', default=5),
+        adaptive_polling_max_interval=dict(required=False, type='int',
+                                           default=300),
+        workflows=dict(required=False, type='list', elements='dict',
+                       options=workflow_options),
+        max_concurrency=dict(required=False, type='int', default=10),
+        force_complete=dict(required=False, type='bool', default=False),
+        complete_check_times=dict(required=False, type='int', default=10),
+        complete_check_delay=dict(required=False, type='int', default=5),
+        workflow_hosts=dict(required=False, type='list', elements='str'),
+        workflow_name_template=dict(required=False, type='str',
+                                    default='{workflow_name}_{workflow_host}'),
+        workflow_plan=dict(
+            required=False, type='list', elements='dict',
+            options=dict(
+                workflow_name=dict(required=True, type='str'),
+                workflow_key=dict(required=False, type='str'),
+                action=dict(required=True, type='str',
+                            choices=['create', 'recreate', 'start', 'none']),
+                message=dict(required=False, type='str'))),
+        bulk_delete=dict(
+            required=False, type='dict',
+            options=dict(
+                workflow_name=dict(required=False, type='str'),
+                workflow_category=dict(required=False, type='str',
+                                       choices=['general', 'configuration']),
+                workflow_host=dict(required=False, type='str'),
+                workflow_vendor=dict(required=False, type='str'),
+                workflow_owner=dict(required=False, type='list',
+                                    elements='str', default=[]),
+                workflow_status=dict(
+                    required=False, type='list', elements='str',
+                    default=['complete'],
+                    choices=['in-progress', 'complete',
+                             'automation-in-progress', 'canceled']),
+                older_than_days=dict(required=False, type='float'),
+                max_rate=dict(required=False, type='float', default=10),
+                dry_run=dict(required=False, type='bool', default=False))))
     module = AnsibleModule(
         argument_spec=argument_spec,
         supports_check_mode=False
     )
+    return_renewed_credential(module)
     # validation for state
     if module.params['state'] == 'existed':
         if (module.params['workflow_name'] is None
@@ -1324,9 +3336,16 @@ def main():
     elif module.params['state'] == 'started':
         action_start(module)
     elif module.params['state'] == 'deleted':
-        action_delete(module)
+        if module.params['bulk_delete'] is not None:
+            action_bulk_delete(module)
+        else:
+            action_delete(module)
     elif module.params['state'] == 'check':
         action_check(module)
+    elif module.params['state'] == 'completed':
+        action_complete(module, argument_spec_mapping)
+    elif module.params['state'] == 'planned':
+        action_plan(module, argument_spec_mapping)
     else:
         module.fail_json(msg='Wrong state.')
 
@@ -0,0 +1,487 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) IBM Corporation 2021
+# Apache License, Version 2.0 (see https://opensource.org/licenses/Apache-2.0)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: zmf_workflow_info
+short_description: List z/OS workflows
+description:
+    - >
+      List the z/OS workflows matching the given filters through the use of
+      z/OSMF workflow REST services, and optionally retrieve the properties of
+      every matching workflow.
+    - >
+      The filters are applied by z/OSMF. The matching workflows are returned
+      by pages of at most I(limit) workflows, and the properties are only
+      retrieved for the workflows of the page.
+    - This module does not change any workflow.
+version_added: "1.3.0"
+author:
+    - Yang Cao (@zosmf-Young)
+options:
+    zmf_credential:
+        description:
+            - >
+              Authentication credentials, returned by module
+              M(zmf_authenticate), for successful authentication with the
+              z/OSMF server.
+            - >
+              If I(zmf_credential) is supplied, I(zmf_host), I(zmf_port),
+              I(zmf_user), I(zmf_password), I(zmf_crt) and I(zmf_key) are
+              ignored, except that I(zmf_user) and I(zmf_password), or
+              I(zmf_crt) and I(zmf_key), are used once to obtain a new token
+              when the token of I(zmf_credential) expires. The new
+              credential is returned as I(zmf_credential).
+        required: False
+        type: dict
+        default: null
+        suboptions:
+            ltpa_token_2:
+                description:
+                    - >
+                      The value of the Lightweight Third Party Access (LTPA)
+                      token, which supports strong encryption.
+                    - >
+                      If I(jwt_token) is not supplied, I(ltpa_token_2) is
+                      required.
+                required: False
+                type: str
+                default: null
+            jwt_token:
+                description:
+                    - >
+                      The value of the JSON web token, which supports strong
+                      encryption.
+                    - >
+                      If I(ltpa_token_2) is not supplied, I(jwt_token) is
+                      required.
+                required: False
+                type: str
+                default: null
+            zmf_host:
+                description: Hostname of the z/OSMF server.
+                required: True
+                type: str
+            zmf_port:
+                description: Port number of the z/OSMF server.
+                required: False
+                type: int
+                default: null
+    zmf_host:
+        description:
+            - Hostname of the z/OSMF server.
+            - If I(zmf_credential) is supplied, I(zmf_host) is ignored.
+            - >
+              If I(zmf_credential) is not supplied, either I(zmf_host) or
+              I(zmf_endpoints) is required.
+            - If I(zmf_endpoints) is supplied, I(zmf_host) is ignored.
+        required: False
+        type: str
+        default: null
+    zmf_endpoints:
+        description:
+            - >
+              List of equivalent z/OSMF servers in a sysplex, which share the
+              same workflow repository, each given as C(host) or C(host:port).
+              I(zmf_port) is the port number of the servers given without one.
+              An IPv6 address is given as C([address]:port), or as
+              C(address) without port.
+            - >
+              The servers are probed concurrently with C(GET /zosmf/info), and
+              each request is sent to the fastest healthy one. A server which
+              cannot be connected to is skipped, and the request is sent to the
+              next one.
+        required: False
+        type: list
+        elements: str
+        default: null
+    zmf_port:
+        description:
+            - Port number of the z/OSMF server.
+            - If I(zmf_credential) is supplied, I(zmf_port) is ignored.
+        required: False
+        type: int
+        default: null
+    zmf_user:
+        description:
+            - User name to be used for authenticating with z/OSMF server.
+            - >
+              If I(zmf_credential) is supplied, I(zmf_user) is only used to
+              obtain a new token when the token of I(zmf_credential) expires.
+            - >
+              If I(zmf_credential) is not supplied, I(zmf_user) is required
+              when I(zmf_crt) and I(zmf_key) are not supplied.
+            - >
+              If I(zmf_credential) is not supplied and I(zmf_crt) and
+              I(zmf_key) are supplied, I(zmf_user) and I(zmf_password) are
+              ignored.
+        required: False
+        type: str
+        default: null
+    zmf_password:
+        description:
+            - Password to be used for authenticating with z/OSMF server.
+            - >
+              If I(zmf_credential) is supplied, I(zmf_password) is only used to
+              obtain a new token when the token of I(zmf_credential) expires.
+            - >
+              If I(zmf_credential) is not supplied, I(zmf_password) is required
+              when I(zmf_crt) and I(zmf_key) are not supplied.
+            - >
+              If I(zmf_credential) is not supplied and I(zmf_crt) and
+              I(zmf_key) are supplied, I(zmf_user) and I(zmf_password) are
+              ignored.
+        required: False
+        type: str
+        default: null
+    zmf_crt:
+        description:
+            - >
+              Location of the PEM-formatted certificate chain file to be used
+              for HTTPS client authentication.
+            - >
+              If I(zmf_credential) is supplied, I(zmf_crt) is only used to
+              obtain a new token when the token of I(zmf_credential) expires.
+            - >
+              If I(zmf_credential) is not supplied, I(zmf_crt) is required when
+              I(zmf_user) and I(zmf_password) are not supplied.
+        required: False
+        type: str
+        default: null
+    zmf_key:
+        description:
+            - >
+              Location of the PEM-formatted file with your private key to be
+              used for HTTPS client authentication.
+            - >
+              If I(zmf_credential) is supplied, I(zmf_key) is only used to
+              obtain a new token when the token of I(zmf_credential) expires.
+            - >
+              If I(zmf_credential) is not supplied, I(zmf_key) is required when
+              I(zmf_user) and I(zmf_password) are not supplied.
+        required: False
+        type: str
+        default: null
+    workflow_name:
+        description:
+            - >
+              Name of the workflows to be listed. A regular expression can be
+              used, for example, C(ansible_sample_workflow_.*).
+        required: False
+        type: str
+        default: null
+    workflow_category:
+        description:
+            - Category of the workflows, which is general or configuration.
+        required: False
+        type: str
+        default: null
+        choices:
+            - general
+            - configuration
+    workflow_host:
+        description:
+            - >
+              Nickname of the z/OS system on which the workflows are
+              performed.
+        required: False
+        type: str
+        default: null
+    workflow_status:
+        description:
+            - Status of the workflows.
+        required: False
+        type: str
+        default: null
+        choices:
+            - in-progress
+            - complete
+            - automation-in-progress
+            - canceled
+    workflow_owner:
+        description:
+            - >
+              User name of the workflow owner. Unlike M(zmf_workflow), the
+              workflows of all owners are listed when this value is omitted.
+        required: False
+        type: str
+        default: null
+    workflow_vendor:
+        description:
+            - Name of the vendor that provided the workflow definition file.
+        required: False
+        type: str
+        default: null
+    include_properties:
+        description:
+            - >
+              Whether to retrieve the properties of every workflow of the
+              page, such as its status, percent complete and automation
+              status, and merge them into the workflow.
+        required: False
+        type: bool
+        default: False
+    properties_return_data:
+        description:
+            - >
+              Additional data retrieved together with the properties when
+              I(include_properties=true).
+        required: False
+        type: list
+        elements: str
+        default: []
+        choices:
+            - steps
+            - variables
+    max_concurrency:
+        description:
+            - >
+              Maximum number of workflows whose properties are retrieved at the
+              same time when I(include_properties=true).
+        required: False
+        type: int
+        default: 8
+    offset:
+        description:
+            - Number of matching workflows skipped before the page.
+        required: False
+        type: int
+        default: 0
+    limit:
+        description:
+            - Maximum number of workflows returned in the page.
+            - If the value is C(0), all matching workflows are returned.
+        required: False
+        type: int
+        default: 100
+    fields:
+        description:
+            - >
+              Names of the properties returned for every workflow, for example,
+              C(workflowKey), C(workflowName) and C(statusName).
+            - If this value is omitted, all properties are returned.
+        required: False
+        type: list
+        elements: str
+        default: null
+"""
+
+EXAMPLES = r"""
+- name: Authenticate with z/OSMF server by username/password, and register the result for later use.
+  zmf_authenticate:
+    zmf_host: "{{ zmf_host }}"
+    zmf_port: "{{ zmf_port }}"
+    zmf_user: "{{ zmf_user }}"
+    zmf_password: "{{ zmf_password }}"
+  register: result_auth
+
+- name: List the workflows created by Ansible on all systems
+  ibm.ibm_zosmf.zmf_workflow_info:
+    zmf_credential: "{{ result_auth }}"
+    workflow_name: "ansible_.*"
+    limit: 0
+    fields:
+      - workflowKey
+      - workflowName
+      - system
+
+- name: Report the progress of the workflows being automated, 50 at a time
+  ibm.ibm_zosmf.zmf_workflow_info:
+    zmf_credential: "{{ result_auth }}"
+    workflow_status: "automation-in-progress"
+    include_properties: true
+    offset: "{{ next_offset | default(0) }}"
+    limit: 50
+    fields:
+      - workflowName
+      - system
+      - percentComplete
+      - automationStatus
+  register: result_info
+"""
+
+RETURN = r"""
+workflows:
+    description:
+        - >
+          The matching workflows of the page, with the properties returned by
+          the z/OSMF list workflows service, or the properties returned by the
+          z/OSMF retrieve workflow properties service when
+          I(include_properties=true).
+        - Only the properties named in I(fields) are returned when supplied.
+        - >
+          When the properties of a workflow could not be retrieved, the error
+          message is returned as I(properties_error) of the workflow.
+    returned: on success
+    type: list
+    elements: dict
+    sample:
+        [
+            {
+                "workflowKey": "2535b19e-a8c3-4a52-9d77-e30bb920f912",
+                "workflowName": "ansible_sample_workflow_SY1",
+                "system": "PLEX1.SY1",
+                "statusName": "complete"
+            }
+        ]
+total:
+    description: The number of workflows matching the filters.
+    returned: on success
+    type: int
+    sample: 1204
+next_offset:
+    description:
+        - >
+          The I(offset) of the next page, or null when the page is the last
+          one.
+    returned: on success
+    type: int
+    sample: 100
+zmf_credential:
+    description:
+        - >
+          The authentication credentials obtained when the token of the
+          supplied I(zmf_credential) expired, in the format returned by
+          module M(zmf_authenticate). Pass it to the later tasks.
+    returned: when the token of I(zmf_credential) is renewed, also on failure
+    type: dict
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import (
+    exit_module,
+    return_renewed_credential,
+    get_connect_argument_spec,
+    get_connect_session,
+    run_in_parallel,
+    HostFailure,
+    HostModule
+)
+from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_workflow_api \
+    import call_workflow_api
+
+# the filters of the z/OSMF list workflows service: {param: module argument}
+LIST_FILTERS = dict(
+    workflowName='workflow_name',
+    category='workflow_category',
+    system='workflow_host',
+    statusName='workflow_status',
+    owner='workflow_owner',
+    vendor='workflow_vendor'
+)
+
+
+def list_workflows(module, session):
+    """
+    Return the workflows matching the filters of the module.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the current connection session
+    :rtype: list[dict]
+    """
+    params = {}
+    for k, v in LIST_FILTERS.items():
+        if module.params[v] is not None and module.params[v].strip() != '':
+            params[k] = module.params[v].strip()
+    response_list = call_workflow_api(module, session, 'list', None, params)
+    if not isinstance(response_list, dict):
+        module.fail_json(msg='Failed to list workflow instances ---- '
+                         + response_list)
+    return response_list.get('workflows') or []
+
+
+def retrieve_properties(module, session, workflows):
+    """
+    Retrieve the properties of the given workflows concurrently, and merge
+    them into the workflows.
+    :param AnsibleModule module: the ansible module
+    :param Request session: the current connection session
+    :param list[dict] workflows: the workflows
+    """
+    params = {}
+    if module.params['properties_return_data']:
+        params['returnData'] = ','.join(module.params['properties_return_data'])
+
+    def retrieve(workflow):
+        return call_workflow_api(HostModule(module), session, 'retrieveProperties',
+                                 workflow['workflowKey'], dict(params))
+
+    results = run_in_parallel(retrieve, workflows, module.params['max_concurrency'])
+    for workflow, response in zip(workflows, results):
+        if isinstance(response, dict):
+            workflow.update(response)
+        elif isinstance(response, HostFailure):
+            workflow['properties_error'] = response.result['msg']
+        elif isinstance(response, Exception):
+            workflow['properties_error'] = repr(response)
+        else:
+            workflow['properties_error'] = response
+
+
+def action_list(module):
+    """
+    List the workflows matching the filters, one page at a time.
+    Return the workflows of the page, the number of matching workflows and
+    the offset of the next page.
+    :param AnsibleModule module: the ansible module
+    """
+    offset = module.params['offset']
+    limit = module.params['limit']
+    if offset < 0:
+        module.fail_json(msg='Invalid argument: offset. It must not be negative.')
+    if limit < 0:
+        module.fail_json(msg='Invalid argument: limit. It must not be negative.')
+    session = get_connect_session(module)
+    workflows = list_workflows(module, session)
+    total = len(workflows)
+    end = offset + limit if limit > 0 else total
+    page = workflows[offset:end]
+    if module.params['include_properties'] and page:
+        retrieve_properties(module, session, page)
+    fields = module.params['fields']
+    if fields:
+        fields = list(fields)
+        if module.params['include_properties']:
+            fields.append('properties_error')
+        page = [dict((k, v) for k, v in workflow.items() if k in fields)
+                for workflow in page]
+    exit_module(module, changed=False, workflows=page, total=total,
+                next_offset=end if end < total else None)
+
+
+def main():
+    argument_spec = get_connect_argument_spec()
+    argument_spec.update(
+        workflow_name=dict(required=False, type='str'),
+        workflow_category=dict(required=False, type='str',
+                               choices=['general', 'configuration']),
+        workflow_host=dict(required=False, type='str'),
+        workflow_status=dict(
+            required=False, type='str',
+            choices=['in-progress', 'complete', 'automation-in-progress', 'canceled']
+        ),
+        workflow_owner=dict(required=False, type='str'),
+        workflow_vendor=dict(required=False, type='str'),
+        include_properties=dict(required=False, type='bool', default=False),
+        properties_return_data=dict(required=False, type='list', elements='str',
+                                    default=[], choices=['steps', 'variables']),
+        max_concurrency=dict(required=False, type='int', default=8),
+        offset=dict(required=False, type='int', default=0),
+        limit=dict(required=False, type='int', default=100),
+        fields=dict(required=False, type='list', elements='str')
+    )
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True
+    )
+    return_renewed_credential(module)
+    action_list(module)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,427 @@
+# Copyright (c) IBM Corporation 2021
+# Apache License, Version 2.0 (see https://opensource.org/licenses/Apache-2.0)
+
+"""
+Micro-benchmarks of the pure-Python hot paths of the collection, with
+synthetic inputs whose size is set by --scale.
+
+Every benchmark is calibrated to run for at least --min-time seconds and its
+min/median/mean/stddev are reported. A run can be saved and compared against
+a saved run, so that hot-path regressions are caught before they ship:
+
+    python tests/perf/bench_module_utils.py --save
+    python tests/perf/bench_module_utils.py --compare .benchmarks/<commit>.json
+
+Runs are saved as tests/perf/.benchmarks/<commit>.json by default.
+
+The json_backend group times handle_request with every JSON library that
+zmf_util can select, the ones not installed are skipped.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+
+from perf_utils import PERF_DIR, HarnessModule, compare_metrics, import_collection
+
+BENCHMARKS = []
+
+
+def benchmark(group):
+    """
+    Register a benchmark. The decorated function takes the scale and returns
+    the function to be timed.
+    """
+    def decorator(setup):
+        BENCHMARKS.append((group, setup.__name__[len('bench_'):], setup))
+        return setup
+    return decorator
+
+
+def _util():
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils import zmf_util
+    return zmf_util
+
+
+def _workflow_module(params=None):
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import get_connect_argument_spec
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_workflow_api import get_request_argument_spec
+    argument_spec = get_connect_argument_spec()
+    argument_spec.update(get_request_argument_spec()[1])
+    argument_spec.update(state=dict(), workflow_key=dict(), shared_polling=dict(default=False),
+                         shared_polling_interval=dict(default=5), workflow_fingerprint=dict(default=True),
+                         workflow_pool_size=dict(default=0), workflow_pool_cleanup=dict(default=False),
+                         result_detail=dict(default='normal'), result_file=dict(),
+                         progress_events=dict(default=False), progress_events_dir=dict(),
+                         adaptive_polling=dict(default=False), adaptive_polling_interval=dict(default=5),
+                         adaptive_polling_max_interval=dict(default=300), workflows=dict(),
+                         max_concurrency=dict(default=10), force_complete=dict(default=False),
+                         complete_check_times=dict(default=10), complete_check_delay=dict(default=5),
+                         workflow_hosts=dict(), workflow_name_template=dict(default='{workflow_name}_{workflow_host}'),
+                         workflow_plan=dict(), bulk_delete=dict())
+    values = dict(
+        state='started', zmf_host='zosmf.example.com', zmf_port=443,
+        zmf_user='IBMUSER', zmf_password='SECRET',
+        workflow_name='ansible_bench_workflow_SY1',
+        workflow_file='/zosmf/workflow_def/workflow_bench.xml',
+        workflow_host='SY1', workflow_owner='IBMUSER',
+        workflow_comments='benchmark', workflow_category='general'
+    )
+    values.update(params or {})
+    return HarnessModule(argument_spec, values)
+
+
+@benchmark('zmf_util')
+def bench_cmp_list_str(scale):
+    cmp_list = _util().cmp_list
+    n = int(10000 * scale)
+    list1 = ['Value %d' % i for i in range(n)]
+    list2 = list(list1)
+    return lambda: cmp_list(list1, list2)
+
+
+@benchmark('zmf_util')
+def bench_cmp_list_dict(scale):
+    cmp_list = _util().cmp_list
+    n = int(1000 * scale)
+    list1 = [dict(name='var%d' % i, value='Value %d' % i) for i in range(n)]
+    list2 = list(reversed(list1))
+    return lambda: cmp_list(list1, list2)
+
+
+@benchmark('zmf_util')
+def bench_cmp_dict(scale):
+    cmp_dict = _util().cmp_dict
+    n = int(10000 * scale)
+    dict1 = dict(('key%d' % i, ['a%d' % i, 'b%d' % i] if i % 3 == 0 else 'Value %d' % i) for i in range(n))
+    dict2 = dict((k, list(v) if isinstance(v, list) else v.upper()) for k, v in dict1.items())
+    return lambda: cmp_dict(dict1, dict2)
+
+
+@benchmark('zmf_workflow')
+def bench_is_same_workflow_instance(scale):
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules.zmf_workflow import is_same_workflow_instance
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_workflow_api import get_request_argument_spec
+    mapping = get_request_argument_spec()[0]
+    n = int(2000 * scale)
+    module_vars = {}
+    res_vars = []
+    def_vars = []
+    for i in range(n):
+        name = 'var%d' % i
+        if i % 4 == 0:
+            value = json.dumps(['item%d' % j for j in range(5)])
+            vtype = 'array'
+        else:
+            value = 'value%d' % i
+            vtype = 'string'
+        if i % 2 == 0:
+            module_vars[name] = json.loads(value) if vtype == 'array' else value
+        res_vars.append(dict(name=name, value=value, type=vtype, scope='instance'))
+        def_vars.append(dict(name=name, default=value, type=vtype))
+    module = _workflow_module(dict(workflow_vars=module_vars))
+    response_retrieveP = dict(
+        workflowDefinitionFileMD5Value='MD5', variables=res_vars, workflowName='ansible_bench_workflow_SY1',
+        system='PLEX1.SY1', owner='IBMUSER', comments='benchmark', category='general',
+        accessType='Public', assignToOwner=True, deleteCompletedJobs=False
+    )
+    response_retrieveD = dict(workflowDefinitionFileMD5Value='MD5', variables=def_vars)
+    return lambda: is_same_workflow_instance(module, mapping, response_retrieveP, response_retrieveD)
+
+
+def _step_tree(prefix, fanout, depth):
+    steps = []
+    for i in range(1, fanout + 1):
+        number = prefix + str(i)
+        steps.append(dict(
+            name='step' + number.replace('.', '_'), stepNumber=number,
+            steps=_step_tree(number + '.', fanout, depth - 1) if depth > 1 else None
+        ))
+    return steps
+
+
+@benchmark('zmf_workflow')
+def bench_get_next_step_name(scale):
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules.zmf_workflow import get_next_step_name
+    fanout = max(int(20 * scale), 2)
+    depth = 6
+    response_retrieveP = dict(steps=_step_tree('', fanout, depth))
+    # the step before the last branch of every level walks the whole width
+    current = '.'.join([str(fanout)] * (depth - 1) + [str(fanout - 1)])
+    module = _workflow_module()
+    return lambda: get_next_step_name(module, current, response_retrieveP)
+
+
+def _private(module, name):
+    return getattr(module, name)
+
+
+@benchmark('zmf_workflow_api')
+def bench_workflow_api_url(scale):
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils import zmf_workflow_api
+    get_url = _private(zmf_workflow_api, '__get_workflow_api_url')
+    api = _private(zmf_workflow_api, '__get_workflow_api_argument_spec')('start')
+    module = _workflow_module()
+    n = int(1000 * scale)
+
+    def run():
+        for i in range(n):
+            get_url(module, api['url'], '2535b19e-a8c3-4a52-9d77-e30bb920f912')
+    return run
+
+
+@benchmark('zmf_workflow_api')
+def bench_workflow_api_params(scale):
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils import zmf_workflow_api
+    get_params = _private(zmf_workflow_api, '__get_workflow_api_params')
+    api = _private(zmf_workflow_api, '__get_workflow_api_argument_spec')('create')
+    module = _workflow_module(dict(workflow_vars=dict(('var%d' % i, 'value%d' % i) for i in range(20))))
+    n = int(1000 * scale)
+
+    def run():
+        for i in range(n):
+            get_params(module, api['args'])
+    return run
+
+
+@benchmark('zmf_sca_api')
+def bench_sca_api_url_params(scale):
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils import zmf_sca_api
+    get_url = _private(zmf_sca_api, '__get_sca_api_url')
+    get_params = _private(zmf_sca_api, '__get_sca_api_params')
+    api = _private(zmf_sca_api, '__get_sca_api_argument_spec')('validateDescriptor')
+    module = HarnessModule({}, dict(zmf_host='zosmf.example.com', zmf_port=443, zmf_user='IBMUSER',
+                                    path_of_security_requirements='/u/ibmuser/sca.json'))
+    n = int(1000 * scale)
+
+    def run():
+        for i in range(n):
+            get_url(module, api['url'], 'IBMUSER')
+            get_params(module, api['args'])
+    return run
+
+
+@benchmark('zmf_auth_api')
+def bench_auth_api_url(scale):
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils import zmf_auth_api
+    get_url = _private(zmf_auth_api, '__get_auth_api_url')
+    api = _private(zmf_auth_api, '__get_auth_api_argument_spec')('getAuth')
+    module = HarnessModule({}, dict(zmf_host='zosmf.example.com', zmf_port=443))
+    n = int(1000 * scale)
+
+    def run():
+        for i in range(n):
+            get_url(module, api['url'])
+    return run
+
+
+class _Response(object):
+    """
+    A canned HTTP response, as returned by Request.open.
+    """
+
+    def __init__(self, content):
+        self.status = 200
+        self.headers = {}
+        self._content = content
+
+    def read(self):
+        return self._content
+
+
+class _Session(object):
+    """
+    A session answering every request with the same canned response body.
+    """
+
+    def __init__(self, content):
+        self.content = content
+
+    def open(self, method, url, **kwargs):
+        return _Response(self.content)
+
+    def get(self, url, **kwargs):
+        return self.open('GET', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.open('PUT', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.open('POST', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.open('DELETE', url, **kwargs)
+
+
+def _workflow_list_body(n):
+    workflows = []
+    for i in range(n):
+        workflows.append(dict(
+            workflowKey='%08d-a8c3-4a52-9d77-e30bb920f912' % i,
+            workflowName='ansible_workflow_%d' % i,
+            workflowDescription='Workflow %d' % i,
+            workflowID='WF%d' % i, workflowVersion='1.0',
+            workflowDefinitionFileMD5Value='D41D8CD98F00B204E9800998ECF8427E',
+            vendor='IBM', owner='IBMUSER', system='PLEX1.SY%d' % (i % 8),
+            category='general', statusName='complete'
+        ))
+    return json.dumps(dict(workflows=workflows)).encode('utf-8')
+
+
+@benchmark('zmf_util')
+def bench_handle_request_decode(scale):
+    handle_request = _util().handle_request
+    session = _Session(_workflow_list_body(int(20000 * scale)))
+    module = _workflow_module()
+    url = 'https://zosmf.example.com:443/zosmf/workflow/rest/1.0/workflows'
+    return lambda: handle_request(module, session, 'get', url, dict(workflowName=''))
+
+
+@benchmark('zmf_util')
+def bench_handle_request_encode(scale):
+    handle_request = _util().handle_request
+    session = _Session(b'{}')
+    module = _workflow_module()
+    items = [dict(resourceClass='FACILITY', resourceProfile='SIM.PROFILE.%d' % i, access='READ')
+             for i in range(int(20000 * scale))]
+    url = 'https://zosmf.example.com:443/zosmf/config/security/v1/validate'
+    return lambda: handle_request(module, session, 'post', url, dict(resourceItems=items))
+
+
+def _with_json_backend(name, setup):
+    """
+    Return a benchmark setup timing the function returned by setup with the
+    JSON library name selected in zmf_util, or None when it is not installed.
+    """
+    def backend_setup(scale):
+        zmf_util = _util()
+        backend = _private(zmf_util, '__json_backend')
+        default = dict(backend)
+        backend.clear()
+        os.environ['ZMF_JSON_BACKEND'] = name
+        try:
+            selected = zmf_util.get_json_backend()
+            forced = dict(backend)
+        finally:
+            os.environ.pop('ZMF_JSON_BACKEND')
+            backend.clear()
+            backend.update(default)
+        if selected != name:
+            return None
+        func = setup(scale)
+
+        def run():
+            backend.update(forced)
+            try:
+                func()
+            finally:
+                backend.clear()
+                backend.update(default)
+        return run
+    return backend_setup
+
+
+for _backend in ('json', 'orjson', 'ujson'):
+    BENCHMARKS.append(('json_backend', 'handle_request_decode[%s]' % _backend,
+                       _with_json_backend(_backend, bench_handle_request_decode)))
+    BENCHMARKS.append(('json_backend', 'handle_request_encode[%s]' % _backend,
+                       _with_json_backend(_backend, bench_handle_request_encode)))
+
+
+def run_benchmark(func, min_time, max_rounds):
+    """
+    Time func for at least min_time seconds and return its statistics.
+    """
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    rounds = max(1, min(max_rounds, int(min_time / first) if first > 0 else max_rounds))
+    times = [first] if rounds == 1 else []
+    for i in range(rounds if rounds > 1 else 0):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    mean = sum(times) / len(times)
+    stddev = (sum((t - mean) ** 2 for t in times) / len(times)) ** 0.5
+    return dict(rounds=len(times), min=times[0], median=times[len(times) // 2], mean=mean, stddev=stddev)
+
+
+def _commit():
+    try:
+        out = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=PERF_DIR,
+                                      stderr=subprocess.DEVNULL)
+        return out.decode().strip()
+    except Exception:
+        return 'unknown'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-benchmarks of the ibm_zosmf hot paths.')
+    parser.add_argument('-k', dest='pattern', help='only run the benchmarks whose name matches this regex')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every input size, default 1.0')
+    parser.add_argument('--min-time', type=float, default=0.5, help='seconds to run each benchmark for')
+    parser.add_argument('--max-rounds', type=int, default=1000)
+    parser.add_argument('--save', nargs='?', const='', metavar='FILE',
+                        help='save the results, to .benchmarks/<commit>.json when FILE is omitted')
+    parser.add_argument('--compare', metavar='FILE', help='compare the median times with a saved run')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='accepted relative slowdown when comparing, default 0.1')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    import_collection()
+    results = {}
+    print('%-45s %8s %12s %12s %12s' % ('benchmark', 'rounds', 'min (ms)', 'median (ms)', 'stddev (ms)'))
+    for group, name, setup in BENCHMARKS:
+        full_name = group + '.' + name
+        if args.pattern and re.search(args.pattern, full_name) is None:
+            continue
+        func = setup(args.scale)
+        if func is None:
+            print('%-45s %8s' % (full_name, 'skipped, not installed'))
+            continue
+        stats = run_benchmark(func, args.min_time, args.max_rounds)
+        results[full_name] = stats
+        print('%-45s %8d %12.3f %12.3f %12.3f' % (full_name, stats['rounds'], stats['min'] * 1000,
+                                                  stats['median'] * 1000, stats['stddev'] * 1000))
+    run = dict(commit=_commit(), scale=args.scale, python=platform.python_version(), benchmarks=results)
+    if args.save is not None:
+        path = args.save or os.path.join(PERF_DIR, '.benchmarks', run['commit'] + '.json')
+        if not os.path.isdir(os.path.dirname(os.path.abspath(path))):
+            os.makedirs(os.path.dirname(os.path.abspath(path)))
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(run, indent=2, sort_keys=True))
+        print('Saved to ' + path)
+    if args.compare:
+        with io.open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('scale') != args.scale:
+            print('Warning: the baseline was run with --scale %s.' % baseline.get('scale'))
+        regressions = compare_metrics(
+            dict((k, v['median']) for k, v in results.items()),
+            dict((k, v['median']) for k, v in baseline['benchmarks'].items()),
+            args.tolerance
+        )
+        if regressions:
+            print('Slower than %s by more than %d%%:' % (baseline.get('commit'), args.tolerance * 100))
+            for r in regressions:
+                print('  ' + r)
+            return 1
+        print('No regression against %s.' % baseline.get('commit'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
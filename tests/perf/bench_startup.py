@@ -0,0 +1,168 @@
+# Copyright (c) IBM Corporation 2021
+# Apache License, Version 2.0 (see https://opensource.org/licenses/Apache-2.0)
+
+"""
+Measure the startup time of the zmf modules in fresh interpreters.
+
+Every zmf task runs in its own module process, so the time spent importing
+the module and its module_utils is paid by every task. Two phases are timed
+for zmf_workflow, zmf_sca and zmf_authenticate:
+
+    import   import the module, reported as the time over importing
+             ansible.module_utils.basic alone
+    run      run the module as a process for one fast call against a local
+             simulator, e.g. zmf_workflow state=check by workflow_key
+
+and the medians are checked against the budgets in milliseconds.
+
+    python tests/perf/bench_startup.py
+    python tests/perf/bench_startup.py --runs 21 --importtime
+    python tests/perf/bench_startup.py --budget-scale 2   # slower machines
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from perf_utils import SimulatorProcess, import_collection, percentile
+
+MODULE_PACKAGE = 'ansible_collections.ibm.ibm_zosmf.plugins.modules.'
+BASELINE = 'ansible.module_utils.basic'
+
+# milliseconds: import is over the baseline, run is the whole process
+BUDGETS = dict(
+    zmf_workflow=dict(import_ms=25, run_ms=400),
+    zmf_sca=dict(import_ms=25, run_ms=400),
+    zmf_authenticate=dict(import_ms=25, run_ms=400)
+)
+
+
+def _time_process(args, env, stdin=None, runs=11):
+    """
+    Return the median seconds of running the process, and its last output.
+    """
+    samples = []
+    output = None
+    for i in range(runs):
+        start = time.time()
+        process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, env=env)
+        output = process.communicate(stdin)
+        samples.append(time.time() - start)
+        if process.returncode != 0 and stdin is None:
+            raise RuntimeError(output[1].decode('utf-8', 'replace'))
+    return percentile(samples, 50), output
+
+
+def _import_time(name, env, runs):
+    return _time_process([sys.executable, '-c', 'import ' + name], env, runs=runs)[0]
+
+
+def _importtime_report(name, env, top):
+    """
+    Return the imports with the largest cumulative time, from -X importtime.
+    """
+    process = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', 'import ' + name],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+    lines = process.communicate()[1].decode('utf-8', 'replace').splitlines()
+    entries = []
+    for line in lines:
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        try:
+            entries.append((int(parts[1]), int(parts[0]), parts[2].rstrip()))
+        except ValueError:
+            continue
+    entries.sort(reverse=True)
+    return ['%8.1f ms %8.1f ms  %s' % (c / 1000.0, s / 1000.0, n) for c, s, n in entries[:top]]
+
+
+def _run_args(sim, workflow_key):
+    connect = dict(zmf_host=sim.host, zmf_port=sim.port, zmf_user='IBMUSER', zmf_password='SECRET')
+    return dict(
+        zmf_workflow=dict(connect, state='check', workflow_key=workflow_key),
+        zmf_sca=dict(connect, state='check', location='remote',
+                     path_of_security_requirements='/sim/security_requirements.json'),
+        zmf_authenticate=dict(connect)
+    )
+
+
+def _create_workflow(sim, env):
+    """
+    Start a workflow instance with zmf_workflow, for the state=check runs.
+    """
+    args = dict(zmf_host=sim.host, zmf_port=sim.port, zmf_user='IBMUSER', zmf_password='SECRET',
+                state='started', workflow_name='ansible_startup', workflow_file='/sim/startup.xml',
+                workflow_host='SY1')
+    output = subprocess.Popen([sys.executable, '-m', MODULE_PACKAGE + 'zmf_workflow'], stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, env=env).communicate(
+        json.dumps(dict(ANSIBLE_MODULE_ARGS=args)).encode('utf-8'))[0]
+    return json.loads(output)['workflow_key']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the startup time of the zmf modules.')
+    parser.add_argument('--runs', type=int, default=11, help='processes started per measurement, default 11')
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help='multiply the budgets, for machines slower than the reference one')
+    parser.add_argument('--importtime', action='store_true', help='print the slowest imports of every module')
+    parser.add_argument('--top', type=int, default=10, help='imports printed by --importtime')
+    parser.add_argument('--output', help='write the measurements to this JSON file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    root = import_collection()
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    env.pop('ZMF_FIXTURE_RECORD', None)
+    env.pop('ZMF_FIXTURE_REPLAY', None)
+    report = dict(baseline_ms=round(_import_time(BASELINE, env, args.runs) * 1000, 1), modules={})
+    sim = SimulatorProcess(dict(step_seconds=1000))
+    try:
+        run_args = _run_args(sim, _create_workflow(sim, env))
+        for name in sorted(BUDGETS):
+            import_s = _import_time(MODULE_PACKAGE + name, env, args.runs)
+            stdin = json.dumps(dict(ANSIBLE_MODULE_ARGS=run_args[name])).encode('utf-8')
+            run_s, output = _time_process([sys.executable, '-m', MODULE_PACKAGE + name], env, stdin, args.runs)
+            result = json.loads(output[0].decode('utf-8'))
+            report['modules'][name] = dict(
+                import_ms=round(import_s * 1000 - report['baseline_ms'], 1),
+                run_ms=round(run_s * 1000, 1),
+                run_failed=bool(result.get('failed'))
+            )
+    finally:
+        sim.stop()
+
+    failed = False
+    print('baseline: import %s %.1f ms' % (BASELINE, report['baseline_ms']))
+    print('%-18s %14s %14s' % ('module', 'import (ms)', 'run (ms)'))
+    for name, measured in sorted(report['modules'].items()):
+        cells = []
+        for k in ('import_ms', 'run_ms'):
+            budget = BUDGETS[name][k] * args.budget_scale
+            over = measured[k] > budget
+            failed = failed or over
+            cells.append('%6.1f/%-5d%s' % (measured[k], budget, '!' if over else ' '))
+        print('%-18s %14s %14s%s' % (name, cells[0], cells[1], '  (module failed)' if measured['run_failed'] else ''))
+        if args.importtime:
+            for line in _importtime_report(MODULE_PACKAGE + name, env, args.top):
+                print('    ' + line)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if failed:
+        print('Startup time over budget, marked with !')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
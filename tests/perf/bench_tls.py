@@ -0,0 +1,106 @@
+# Copyright (c) IBM Corporation 2021
+# Apache License, Version 2.0 (see https://opensource.org/licenses/Apache-2.0)
+
+"""
+Measure the TLS cost of the requests sent with client certificate
+authentication against a local simulator.
+
+    per-request   Request loads zmf_crt/zmf_key in a new SSL context and
+                  does a full handshake for every request
+    cached        get_connect_session reuses one SSL context per (cert, key,
+                  CA), and the later connections resume the TLS session
+
+The handshake counts and seconds of the cached mode come from
+zmf_util.get_tls_stats().
+
+    python tests/perf/bench_tls.py
+    python tests/perf/bench_tls.py --requests 200
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from perf_utils import HarnessModule, SimulatorProcess, import_collection
+
+
+def _client_certificate(tmpdir):
+    crt = os.path.join(tmpdir, 'client.crt')
+    key = os.path.join(tmpdir, 'client.key')
+    subprocess.check_call(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '2',
+         '-subj', '/CN=IBMUSER', '-keyout', key, '-out', crt],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return crt, key
+
+
+def _run(zmf_util, module, session, url, count):
+    start = time.time()
+    for i in range(count):
+        response = zmf_util.handle_request(module, session, 'get', url, {})
+        if 'workflows' not in response:
+            raise RuntimeError('Unexpected response: %s' % response)
+    return time.time() - start
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the TLS cost of client certificate authentication.')
+    parser.add_argument('--requests', type=int, default=100, help='requests sent per mode, default 100')
+    parser.add_argument('--output', help='write the measurements to this JSON file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    import_collection()
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils import zmf_util
+
+    tmpdir = tempfile.mkdtemp(prefix='zmf_bench_tls_')
+    crt, key = _client_certificate(tmpdir)
+    sim = SimulatorProcess(extra_args=['--client-ca', crt])
+    try:
+        params = dict(zmf_host=sim.host, zmf_port=sim.port, zmf_crt=crt, zmf_key=key,
+                      zmf_user=None, zmf_password=None)
+        module = HarnessModule(zmf_util.get_connect_argument_spec(), params)
+        url = 'https://%s:%s/zosmf/workflow/rest/1.0/workflows' % (sim.host, sim.port)
+
+        session = zmf_util.get_connect_session(module)
+        session.context = None
+        per_request = _run(zmf_util, module, session, url, args.requests)
+
+        session = zmf_util.get_connect_session(module)
+        zmf_util.reset_tls_stats()
+        cached = _run(zmf_util, module, session, url, args.requests)
+        stats = zmf_util.get_tls_stats()
+    finally:
+        sim.stop()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    report = dict(
+        requests=args.requests,
+        per_request_ms=round(per_request * 1000 / args.requests, 2),
+        cached_ms=round(cached * 1000 / args.requests, 2),
+        handshakes=stats['handshakes'],
+        resumed=stats['resumed'],
+        handshake_ms=round(stats['handshake_seconds'] * 1000 / max(stats['handshakes'], 1), 2)
+    )
+    print('%-12s %8.2f ms/request' % ('per-request', report['per_request_ms']))
+    print('%-12s %8.2f ms/request, %d handshakes, %d resumed, %.2f ms/handshake'
+          % ('cached', report['cached_ms'], report['handshakes'], report['resumed'], report['handshake_ms']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1088 @@
+# Copyright (c) IBM Corporation 2021
+# Apache License, Version 2.0 (see https://opensource.org/licenses/Apache-2.0)
+
+"""
+Assert the number of z/OSMF API calls and the bytes transferred by every
+module state and role against the budgets in call_budgets.json, as well as
+the requests authenticated with a user and password rather than a token.
+
+Each scenario runs against a local z/OSMF simulator, which counts the
+requests per endpoint. A scenario fails when it calls any endpoint more often
+than its budget, or transfers more bytes than its budget; a scenario that
+needs fewer calls is reported, so that the budget can be tightened.
+
+    python tests/perf/check_call_budget.py
+    python tests/perf/check_call_budget.py -k workflow.existed
+    python tests/perf/check_call_budget.py --write-budgets
+
+The role scenarios run ansible-playbook and are skipped when it is not
+installed.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import base64
+import json
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+
+from perf_utils import (
+    HarnessModule,
+    PERF_DIR,
+    SimulatorProcess,
+    free_port,
+    import_collection,
+    run_action
+)
+
+try:
+    from urllib.request import Request, urlopen
+except ImportError:
+    from urllib2 import Request, urlopen
+
+BUDGET_FILE = os.path.join(PERF_DIR, 'call_budgets.json')
+SIMULATOR_CONFIG = dict(
+    workflow_count=50,
+    step_seconds=0,
+    step_fanout=2,
+    step_depth=2,
+    variable_count=5,
+    sca_item_count=3,
+    cpm_step_seconds=0,
+    cpm_action_seconds=0
+)
+USER = 'IBMUSER'
+PASSWORD = 'SECRET'
+WORKFLOW_NAME = 'Ansible_Budget'
+WORKFLOW_FILE = '/sim/budget_workflow.xml'
+
+_scenarios = []
+
+
+def scenario(name, role=False, requires=None):
+    """
+    Register a scenario. A module scenario is called with the simulator and
+    a scratch directory, a role scenario returns (setup, tasks) of a play,
+    or (setup, tasks, hosts) to run it on several local hosts.
+    A scenario requiring another collection is skipped when it is not
+    installed.
+    """
+    def register(func):
+        _scenarios.append((name, role, requires, func))
+        return func
+    return register
+
+
+def _sim_request(sim, method, path, body=None):
+    """
+    Call the simulator directly, to prepare the objects of a scenario.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    request = Request('https://%s:%s%s' % (sim.host, sim.port, path), data=data)
+    request.get_method = lambda: method.upper()
+    request.add_header('Content-Type', 'application/json')
+    request.add_header('Authorization', 'Basic ' + base64.b64encode(
+        ('%s:%s' % (USER, PASSWORD)).encode('utf-8')).decode('ascii'))
+    content = urlopen(request, context=context, timeout=30).read()
+    return json.loads(content) if content else {}
+
+
+def _create_workflow(sim, name=WORKFLOW_NAME):
+    response = _sim_request(sim, 'post', '/zosmf/workflow/rest/1.0/workflows', dict(
+        workflowName=name, workflowDefinitionFile=WORKFLOW_FILE, system='SY1', owner=USER))
+    return response['workflowKey']
+
+
+def _start_workflow(sim, key):
+    _sim_request(sim, 'put', '/zosmf/workflow/rest/1.0/workflows/%s/operations/start' % key, {})
+
+
+def _workflow_module(sim, state, **params):
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import get_connect_argument_spec
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_workflow_api import get_request_argument_spec
+    argument_spec = get_connect_argument_spec()
+    argument_spec.update(get_request_argument_spec()[1])
+    argument_spec.update(state=dict(), workflow_key=dict(), shared_polling=dict(default=False),
+                         shared_polling_interval=dict(default=5), workflow_fingerprint=dict(default=True),
+                         workflow_pool_size=dict(default=0), workflow_pool_cleanup=dict(default=False),
+                         result_detail=dict(default='normal'), result_file=dict(),
+                         progress_events=dict(default=False), progress_events_dir=dict(),
+                         adaptive_polling=dict(default=False), adaptive_polling_interval=dict(default=5),
+                         adaptive_polling_max_interval=dict(default=300), workflows=dict(),
+                         max_concurrency=dict(default=10), force_complete=dict(default=False),
+                         complete_check_times=dict(default=10), complete_check_delay=dict(default=5),
+                         workflow_hosts=dict(), workflow_name_template=dict(default='{workflow_name}_{workflow_host}'),
+                         workflow_plan=dict(), bulk_delete=dict())
+    args = dict(state=state, zmf_host=sim.host, zmf_port=sim.port, zmf_user=USER, zmf_password=PASSWORD,
+                workflow_name=WORKFLOW_NAME, workflow_host='SY1')
+    args.update(params)
+    return HarnessModule(argument_spec, args)
+
+
+def _run_workflow(sim, action, state, **params):
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules import zmf_workflow
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_workflow_api import get_request_argument_spec
+    module = _workflow_module(sim, state, **params)
+    args = (get_request_argument_spec()[0],) if action in ('action_compare', 'action_complete', 'action_plan') else ()
+    sim.reset_stats()
+    return run_action(getattr(zmf_workflow, action), module, *args)
+
+
+@scenario('workflow.existed.found_exact')
+def _existed_found_exact(sim, tmpdir):
+    _create_workflow(sim)
+    return _run_workflow(sim, 'action_compare', 'existed', workflow_file=WORKFLOW_FILE)
+
+
+@scenario('workflow.existed.found_case_insensitive')
+def _existed_found_case_insensitive(sim, tmpdir):
+    _create_workflow(sim)
+    return _run_workflow(sim, 'action_compare', 'existed', workflow_name=WORKFLOW_NAME.lower(),
+                         workflow_file=WORKFLOW_FILE)
+
+
+@scenario('workflow.existed.not_found')
+def _existed_not_found(sim, tmpdir):
+    return _run_workflow(sim, 'action_compare', 'existed', workflow_file=WORKFLOW_FILE)
+
+
+@scenario('workflow.existed.fixture_scrubbed')
+def _existed_fixture_scrubbed(sim, tmpdir):
+    # the value of a variable named like a password is scrubbed from the
+    # recorded create request, and the values of the variables named like a
+    # password or marked sensitive from the recorded properties, the other
+    # values are kept
+    sim.configure(dict(sensitive_variables=['DB_PASSWORD', 'DB_PIN']))
+    variables = dict(var0='plain-value', DB_PASSWORD='password-value', DB_PIN='pin-value')
+    fixture_dir = os.path.join(tmpdir, 'fixtures')
+    os.environ['ZMF_FIXTURE_RECORD'] = fixture_dir
+    try:
+        result = _run_workflow(sim, 'action_start', 'started', workflow_file=WORKFLOW_FILE, workflow_vars=variables)
+        if not result[1]:
+            result = _run_workflow(sim, 'action_compare', 'existed', workflow_file=WORKFLOW_FILE,
+                                   workflow_vars=variables)
+    finally:
+        del os.environ['ZMF_FIXTURE_RECORD']
+    if result[1]:
+        return result
+    with open(os.path.join(fixture_dir, 'fixtures.jsonl')) as f:
+        fixtures = [json.loads(line) for line in f]
+    # the create request carries no flag marking DB_PIN sensitive
+    responses = ''.join(fixture.get('body') or '' for fixture in fixtures)
+    requests = ''.join(fixture.get('request_body') or '' for fixture in fixtures)
+    if 'password-value' in requests + responses or 'pin-value' in responses or 'plain-value' not in responses:
+        return dict(msg='the sensitive variables are not scrubbed from the fixtures'), True, result[2]
+    return result
+
+
+@scenario('workflow.existed.fingerprint')
+def _existed_fingerprint(sim, tmpdir):
+    # created by the module, so the comments carry the spec fingerprint and
+    # the definition file is not retrieved
+    _run_workflow(sim, 'action_start', 'started', workflow_file=WORKFLOW_FILE)
+    return _run_workflow(sim, 'action_compare', 'existed', workflow_file=WORKFLOW_FILE)
+
+
+@scenario('workflow.started.new')
+def _started_new(sim, tmpdir):
+    return _run_workflow(sim, 'action_start', 'started', workflow_file=WORKFLOW_FILE)
+
+
+@scenario('workflow.started.existing')
+def _started_existing(sim, tmpdir):
+    _create_workflow(sim)
+    return _run_workflow(sim, 'action_start', 'started', workflow_file=WORKFLOW_FILE)
+
+
+@scenario('workflow.started.by_key')
+def _started_by_key(sim, tmpdir):
+    key = _create_workflow(sim)
+    return _run_workflow(sim, 'action_start', 'started', workflow_key=key)
+
+
+def _pool_file(tmpdir, sim, fingerprint):
+    return os.path.join(tmpdir, 'pool', '%s_%s_%s' % (sim.host, sim.port, USER), fingerprint + '.json')
+
+
+@scenario('workflow.started.pool')
+def _started_pool(sim, tmpdir):
+    # the first start creates its workflow instance and fills the pool, the
+    # second one starts a workflow instance of the pool before creating its
+    # replacement
+    result = _run_workflow(sim, 'action_start', 'started', workflow_name=None, workflow_file=WORKFLOW_FILE,
+                           workflow_pool_size=2)
+    if result[1]:
+        return result
+    sim.reset_stats()
+    result = _run_workflow(sim, 'action_start', 'started', workflow_name=None, workflow_file=WORKFLOW_FILE,
+                           workflow_pool_size=2)
+    if not result[1] and not result[0]['message'].endswith('is claimed from the pool and started, '
+                                                           'you can use state=check to check its final status.'):
+        return dict(msg='no workflow instance is claimed from the pool: ' + json.dumps(result[0])), True, result[2]
+    return result
+
+
+@scenario('workflow.started.pool.concurrent')
+def _started_pool_concurrent(sim, tmpdir):
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules import zmf_workflow
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import run_in_parallel
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_workflow_api import get_workflow_fingerprint
+    # 4 concurrent starts find the pool empty: each creates its own workflow
+    # instance, and only the first one to reserve the refill creates the 2
+    # of the pool
+    sim.configure(dict(endpoint_latency_ms={'workflow.create': 100}))
+    modules = [_workflow_module(sim, 'started', workflow_name=None, workflow_file=WORKFLOW_FILE,
+                                workflow_pool_size=2) for i in range(4)]
+    sim.reset_stats()
+    results = run_in_parallel(lambda module: run_action(zmf_workflow.action_start, module), modules, 4)
+    for result in results:
+        if result[1]:
+            return result
+    with open(_pool_file(tmpdir, sim, get_workflow_fingerprint(modules[0]))) as f:
+        pool = json.load(f)
+    if len(pool['workflows']) != 2 or pool['reserved']:
+        return dict(msg='the pool is not filled to its size: ' + json.dumps(pool)), True, results[0][2]
+    return results[0]
+
+
+@scenario('workflow.started.pool.cleanup')
+def _started_pool_cleanup(sim, tmpdir):
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_workflow_api import get_workflow_fingerprint
+    # the pool of the previous variables is left with 2 workflow instances,
+    # which the start with the new variables deletes
+    result = _run_workflow(sim, 'action_start', 'started', workflow_name=None, workflow_file=WORKFLOW_FILE,
+                           workflow_vars=dict(var0='old'), workflow_pool_size=2)
+    if result[1]:
+        return result
+    stale = _pool_file(tmpdir, sim, get_workflow_fingerprint(_workflow_module(
+        sim, 'started', workflow_file=WORKFLOW_FILE, workflow_vars=dict(var0='old'))))
+    result = _run_workflow(sim, 'action_start', 'started', workflow_name=None, workflow_file=WORKFLOW_FILE,
+                           workflow_vars=dict(var0='new'), workflow_pool_size=2, workflow_pool_cleanup=True)
+    if not result[1] and os.path.exists(stale):
+        return dict(msg='the stale pool is not removed'), True, result[2]
+    return result
+
+
+def _start_on_failing_endpoint(sim, endpoint_errors):
+    # the first member of zmf_endpoints answers the probe faster than the
+    # simulator, then closes the connection of the requests of
+    # endpoint_errors once it received them
+    first = SimulatorProcess(SIMULATOR_CONFIG)
+    try:
+        first.configure(dict(endpoint_errors=dict((e, dict(rate=1, status=0)) for e in endpoint_errors)))
+        sim.configure(dict(endpoint_latency_ms={'info.get': 300}))
+        result = _run_workflow(sim, 'action_start', 'started', workflow_file=WORKFLOW_FILE, zmf_endpoints=[
+            '%s:%d' % (first.host, first.port), '%s:%d' % (sim.host, sim.port)])
+        return result, first.get_stats()['endpoints']
+    finally:
+        first.stop()
+
+
+@scenario('workflow.started.failover')
+def _started_failover(sim, tmpdir):
+    # the lookup, a GET, is sent again to the simulator, which then gets the
+    # other requests, as the first member is known to be down
+    result, first = _start_on_failing_endpoint(sim, ['workflow.list'])
+    if not result[1] and dict((e, v['calls']) for e, v in first.items() if e != 'info.get') != {'workflow.list': 1}:
+        return dict(msg='the first member got other requests: ' + json.dumps(first)), True, result[2]
+    return result
+
+
+@scenario('workflow.started.failover.ipv6')
+def _started_failover_ipv6(sim, tmpdir):
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import (
+        get_endpoint_health,
+        parse_zmf_endpoint
+    )
+    cases = [('plex1.ibm.com', ('plex1.ibm.com', 443)), ('plex1.ibm.com:10443', ('plex1.ibm.com', 10443)),
+             ('fe80::1', ('fe80::1', 443)), ('2001:db8::10', ('2001:db8::10', 443)),
+             ('[fe80::1]:10443', ('fe80::1', 10443)), ('[2001:db8::10]', ('2001:db8::10', 443))]
+    for entry, expected in cases:
+        if parse_zmf_endpoint(entry, 443) != expected:
+            return dict(msg='%s is parsed as %r' % (entry, parse_zmf_endpoint(entry, 443))), True, 0
+    # the IPv6 loopback members, bare with zmf_port and bracketed with a
+    # port, refuse the connection and the requests go to the simulator
+    down = free_port()
+    result = _run_workflow(sim, 'action_start', 'started', workflow_file=WORKFLOW_FILE, zmf_port=sim.port,
+                           zmf_endpoints=['::1', '[::1]:%d' % down, '%s:%d' % (sim.host, sim.port)])
+    health = get_endpoint_health()
+    for netloc in ('[::1]:%d' % sim.port, '[::1]:%d' % down):
+        if not result[1] and health.get(netloc, {}).get('healthy') is not False:
+            return dict(msg='%s is not probed: %s' % (netloc, json.dumps(health))), True, result[2]
+    return result
+
+
+@scenario('workflow.started.failover.not_resent')
+def _started_failover_not_resent(sim, tmpdir):
+    # the create, a POST, may have been run by the first member, so it is
+    # not sent to the simulator again and the module fails
+    result, first = _start_on_failing_endpoint(sim, ['workflow.create'])
+    if first.get('workflow.create', {}).get('calls') != 1:
+        return dict(msg='the create is not sent to the first member: ' + json.dumps(first)), not result[1], result[2]
+    return result
+
+
+@scenario('workflow.deleted.by_name')
+def _deleted_by_name(sim, tmpdir):
+    _create_workflow(sim)
+    return _run_workflow(sim, 'action_delete', 'deleted')
+
+
+@scenario('workflow.deleted.by_key')
+def _deleted_by_key(sim, tmpdir):
+    key = _create_workflow(sim)
+    return _run_workflow(sim, 'action_delete', 'deleted', workflow_key=key)
+
+
+def _bulk_delete(sim, **params):
+    # 3 completed and 2 not started workflow instances among the unrelated ones
+    for i in range(5):
+        key = _create_workflow(sim, '%s_%d' % (WORKFLOW_NAME, i))
+        if i < 3:
+            _start_workflow(sim, key)
+    bulk = dict(workflow_name=WORKFLOW_NAME + '_.*', workflow_category=None, workflow_host=None,
+                workflow_vendor=None, workflow_owner=[], workflow_status=['complete'], older_than_days=None,
+                max_rate=0, dry_run=False)
+    bulk.update(params)
+    result = _run_workflow(sim, 'action_bulk_delete', 'deleted', bulk_delete=bulk)
+    if not result[1] and len(result[0]['workflows']) != 3:
+        return dict(msg='the selection is wrong: ' + json.dumps(result[0])), True, result[2]
+    return result
+
+
+@scenario('workflow.deleted.bulk')
+def _deleted_bulk(sim, tmpdir):
+    return _bulk_delete(sim)
+
+
+@scenario('workflow.deleted.bulk.dry_run')
+def _deleted_bulk_dry_run(sim, tmpdir):
+    # the age needs the properties of the listed workflow instances
+    return _bulk_delete(sim, older_than_days=0, dry_run=True)
+
+
+@scenario('workflow.deleted.not_found')
+def _deleted_not_found(sim, tmpdir):
+    return _run_workflow(sim, 'action_delete', 'deleted')
+
+
+@scenario('workflow.check.complete')
+def _check_complete(sim, tmpdir):
+    key = _create_workflow(sim)
+    _start_workflow(sim, key)
+    return _run_workflow(sim, 'action_check', 'check', workflow_key=key)
+
+
+@scenario('workflow.check.by_name')
+def _check_by_name(sim, tmpdir):
+    key = _create_workflow(sim)
+    _start_workflow(sim, key)
+    return _run_workflow(sim, 'action_check', 'check')
+
+
+@scenario('workflow.check.shared_polling')
+def _check_shared_polling(sim, tmpdir):
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules import zmf_workflow
+    # 10 hosts check their running workflow instances twice: the first
+    # checks retrieve their own properties, the second ones are answered by
+    # one list call
+    sim.configure(dict(step_seconds=60))
+    keys = []
+    for i in range(10):
+        keys.append(_create_workflow(sim, '%s_%d' % (WORKFLOW_NAME, i)))
+        _start_workflow(sim, keys[-1])
+    sim.reset_stats()
+    for tick in range(2):
+        for key in keys:
+            module = _workflow_module(sim, 'check', workflow_key=key, shared_polling=True,
+                                      shared_polling_interval=0 if tick and key == keys[0] else 60)
+            result = run_action(zmf_workflow.action_check, module)
+            if result[1]:
+                return result
+    return result
+
+
+@scenario('workflow.check.shared_polling.concurrent')
+def _check_shared_polling_concurrent(sim, tmpdir):
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules import zmf_workflow
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import run_in_parallel
+    import time
+    # 10 hosts check their running workflow instances at once every second:
+    # the first checks retrieve their own properties, each later round is
+    # answered by one list call, which the other checks of the round do not
+    # wait for
+    sim.configure(dict(step_seconds=60, endpoint_latency_ms={'workflow.list': 500}))
+    keys = []
+    for i in range(10):
+        keys.append(_create_workflow(sim, '%s_%d' % (WORKFLOW_NAME, i)))
+        _start_workflow(sim, keys[-1])
+    sim.reset_stats()
+    for tick in range(4):
+        if tick:
+            time.sleep(1.1)
+        modules = [_workflow_module(sim, 'check', workflow_key=key, shared_polling=True, shared_polling_interval=1)
+                   for key in keys]
+        results = run_in_parallel(lambda module: run_action(zmf_workflow.action_check, module), modules, 10)
+        for result in results:
+            if result[1]:
+                return result
+        slow = [r for r in results if r[2] >= 0.5]
+        if tick and len(slow) > 1:
+            return dict(msg='%d checks waited for the list call of the round' % len(slow)), True, results[0][2]
+    return results[0]
+
+
+@scenario('workflow.check.progress_events')
+def _check_progress_events(sim, tmpdir):
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules import zmf_workflow
+    # a check of the running workflow instance and a check of the completed
+    # one record its progress without any call besides retrieveProperties
+    sim.configure(dict(step_seconds=60))
+    key = _create_workflow(sim)
+    _start_workflow(sim, key)
+    sim.reset_stats()
+    events = []
+    for step_seconds in (60, 0):
+        sim.configure(dict(step_seconds=step_seconds))
+        module = _workflow_module(sim, 'check', workflow_key=key, progress_events=True,
+                                  progress_events_dir=tmpdir, result_detail='minimal')
+        result = run_action(zmf_workflow.action_check, module)
+        if result[1]:
+            return result
+        events += result[0]['progress_events']
+    with open(result[0]['progress_events_file']) as f:
+        if [json.loads(line) for line in f] != events or events[0]['after'] != 'automation-in-progress' \
+                or dict(event='status', after='complete') not in [dict(event=e['event'], after=e.get('after'))
+                                                                  for e in events]:
+            return dict(msg='the progress events are not recorded: ' + json.dumps(events)), True, result[2]
+    return result
+
+
+@scenario('workflow.check.adaptive_polling')
+def _check_adaptive_polling(sim, tmpdir):
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules import zmf_workflow
+    # the first workflow instance of 3 steps of 1.5 seconds is checked every
+    # second; the second one is only checked at 0, 2.25, 3.5 and 5.5 seconds,
+    # the last one just after the end predicted from the first one
+    sim.configure(dict(step_fanout=3, step_depth=1, step_seconds=1.5))
+    for i in range(2):
+        name = '%s_%d' % (WORKFLOW_NAME, i)
+        result = run_action(zmf_workflow.action_start, _workflow_module(
+            sim, 'started', workflow_name=name, workflow_file=WORKFLOW_FILE, adaptive_polling=True))
+        if result[1]:
+            return result
+        key = result[0]['workflow_key']
+        sim.reset_stats()
+        while True:
+            module = _workflow_module(sim, 'check', workflow_key=key, adaptive_polling=True,
+                                      adaptive_polling_interval=1)
+            result = run_action(zmf_workflow.action_check, module)
+            if result[1] or not result[0]['waiting']:
+                break
+    return result
+
+
+@scenario('workflow.completed.graph')
+def _completed_graph(sim, tmpdir):
+    # 5 workflow instances in 3 waves: A and E, then B and C after A, then D
+    # after B and C; the instances of a wave are checked with one list call
+    # and retrieve the properties only once completed. The instances of a
+    # wave are looked up concurrently, so whether the list responses contain
+    # the instance created by the other one depends on the timing, which the
+    # bytes_tolerance of its budget allows for
+    names = dict((n, '%s_%s' % (WORKFLOW_NAME, n)) for n in 'ABCDE')
+    workflows = [dict(workflow_name=names['A']),
+                 dict(workflow_name=names['B'], depends_on=[names['A']]),
+                 dict(workflow_name=names['C'], depends_on=[names['A']]),
+                 dict(workflow_name=names['D'], depends_on=[names['B'], names['C']]),
+                 dict(workflow_name=names['E'])]
+    result = _run_workflow(sim, 'action_complete', 'completed', workflows=workflows, workflow_file=WORKFLOW_FILE,
+                           complete_check_delay=0)
+    if not result[1] and result[0]['critical_path'][0] != names['A']:
+        return dict(msg='the critical path is wrong: ' + json.dumps(result[0])), True, result[2]
+    return result
+
+
+@scenario('workflow.completed.hosts')
+def _completed_hosts(sim, tmpdir):
+    # the workflow on 4 systems through one session, the instances in
+    # progress of all the systems are checked with one list call
+    hosts = ['SY1', 'SY2', 'SY3', 'SY4']
+    sim.configure(dict(step_fanout=3, step_depth=1, step_seconds=0.2))
+    result = _run_workflow(sim, 'action_complete', 'completed', workflow_hosts=hosts, workflow_file=WORKFLOW_FILE,
+                           complete_check_delay=1)
+    if not result[1] and [h['workflow_host'] for h in result[0]['hosts'] if h['completed']] != hosts:
+        return dict(msg='the results of the systems are wrong: ' + json.dumps(result[0])), True, result[2]
+    return result
+
+
+def _plan_fleet(sim):
+    # A is completed, B is not started, C has a different variable and D
+    # does not exist
+    names = dict((n, '%s_%s' % (WORKFLOW_NAME, n)) for n in 'ABCD')
+    _start_workflow(sim, _create_workflow(sim, names['A']))
+    _create_workflow(sim, names['B'])
+    _create_workflow(sim, names['C'])
+    workflows = [dict(workflow_name=names['A']), dict(workflow_name=names['B']),
+                 dict(workflow_name=names['C'], workflow_vars=dict(var0='changed')),
+                 dict(workflow_name=names['D'], depends_on=[names['A']])]
+    return workflows, _run_workflow(sim, 'action_plan', 'planned', workflows=workflows, workflow_file=WORKFLOW_FILE)
+
+
+@scenario('workflow.planned.fleet')
+def _planned_fleet(sim, tmpdir):
+    # one list call, the properties of the 3 found and the definition once
+    result = _plan_fleet(sim)[1]
+    if not result[1] and [p['action'] for p in result[0]['plan']] != ['none', 'start', 'recreate', 'create']:
+        return dict(msg='the plan is wrong: ' + json.dumps(result[0])), True, result[2]
+    return result
+
+
+@scenario('workflow.completed.plan')
+def _completed_plan(sim, tmpdir):
+    # the plan is applied without finding or comparing the workflow
+    # instances again
+    workflows, result = _plan_fleet(sim)
+    if result[1]:
+        return result
+    return _run_workflow(sim, 'action_complete', 'completed', workflows=workflows, workflow_file=WORKFLOW_FILE,
+                         workflow_plan=result[0]['plan'], complete_check_delay=0)
+
+
+def _expired_credential(sim):
+    # a credential of zmf_authenticate whose token is revoked, as if it expired
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules import zmf_authenticate
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils import zmf_util
+    credential = run_action(zmf_authenticate.authenticate, HarnessModule(zmf_util.get_auth_argument_spec(), dict(
+        zmf_host=sim.host, zmf_port=sim.port, zmf_user=USER, zmf_password=PASSWORD)))[0]
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    request = Request('https://%s:%s/zosmf/services/authenticate' % (sim.host, sim.port))
+    request.get_method = lambda: 'DELETE'
+    request.add_header('Cookie', 'LtpaToken2=' + credential['ltpa_token_2'])
+    urlopen(request, context=context, timeout=30).read()
+    # the renewed credential of a previous scenario
+    getattr(zmf_util, '__renewed_credential').clear()
+    return dict(ltpa_token_2=credential['ltpa_token_2'], zmf_host=sim.host, zmf_port=sim.port)
+
+
+@scenario('workflow.api.token_renewed')
+def _api_token_renewed(sim, tmpdir):
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import get_connect_session, run_in_parallel
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_workflow_api import call_workflow_api
+    # 6 threads of one session are all rejected with the expired token; one
+    # of them logs in again while the others wait for the new token and send
+    # their request again with it
+    keys = [_create_workflow(sim, '%s_%d' % (WORKFLOW_NAME, i)) for i in range(6)]
+    credential = _expired_credential(sim)
+    sim.configure(dict(endpoint_latency_ms={'workflow.retrieveProperties': 200}))
+    module = _workflow_module(sim, 'check', zmf_credential=credential)
+    session = get_connect_session(module)
+    sim.reset_stats()
+    responses = run_in_parallel(lambda key: call_workflow_api(module, session, 'retrieveProperties', key,
+                                                              dict(returnData='steps')), keys, 6)
+    failed = [r for r in responses if not isinstance(r, dict)]
+    if failed:
+        return dict(msg='the requests failed: ' + repr(failed)), True, 0
+    return dict(responses=responses), False, 0
+
+
+def _check_token_renewed(sim, key):
+    # the module renews the expired token of zmf_credential once, and returns
+    # the renewed credential whether it exits or fails
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules import zmf_workflow
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import return_renewed_credential
+    credential = _expired_credential(sim)
+    module = _workflow_module(sim, 'check', workflow_key=key, zmf_credential=credential)
+    return_renewed_credential(module)
+    sim.reset_stats()
+    result = run_action(zmf_workflow.action_check, module)
+    renewed = result[0].get('zmf_credential') or {}
+    if renewed.get('ltpa_token_2') in (None, credential['ltpa_token_2']):
+        return dict(msg='the renewed credential is not returned: ' + json.dumps(result[0])), not result[1], result[2]
+    return result
+
+
+@scenario('workflow.check.token_renewed')
+def _check_token_renewed_complete(sim, tmpdir):
+    key = _create_workflow(sim)
+    _start_workflow(sim, key)
+    return _check_token_renewed(sim, key)
+
+
+@scenario('workflow.check.token_renewed.failed')
+def _check_token_renewed_failed(sim, tmpdir):
+    return _check_token_renewed(sim, 'no-such-workflow-key')
+
+
+def _run_workflow_info(sim, **params):
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules import zmf_workflow_info
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import get_connect_argument_spec
+    args = dict(zmf_host=sim.host, zmf_port=sim.port, zmf_user=USER, zmf_password=PASSWORD,
+                workflow_name=None, workflow_category=None, workflow_host=None, workflow_status=None,
+                workflow_owner=None, workflow_vendor=None, include_properties=False,
+                properties_return_data=[], max_concurrency=8, offset=0, limit=100, fields=None)
+    args.update(params)
+    module = HarnessModule(get_connect_argument_spec(), args)
+    sim.reset_stats()
+    return run_action(zmf_workflow_info.action_list, module)
+
+
+@scenario('workflow_info.list')
+def _workflow_info_list(sim, tmpdir):
+    return _run_workflow_info(sim, workflow_host='SY1', fields=['workflowKey', 'workflowName'])
+
+
+@scenario('workflow_info.properties')
+def _workflow_info_properties(sim, tmpdir):
+    # the properties are only retrieved for the workflows of the page
+    return _run_workflow_info(sim, limit=10, include_properties=True,
+                              fields=['workflowName', 'statusName', 'percentComplete'])
+
+
+def _run_sca(sim, tmpdir, state, location):
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules import zmf_sca
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import get_connect_argument_spec
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_sca_api import get_request_argument_spec
+    path = '/sim/security_requirements.json'
+    if location == 'local':
+        path = os.path.join(tmpdir, 'security_requirements.json')
+        shutil.copy(os.path.join(PERF_DIR, '..', 'CICD', 'playbooks', 'sca_1_passed.json'), path)
+    argument_spec = get_connect_argument_spec()
+    argument_spec.update(get_request_argument_spec()[1])
+    argument_spec.update(target_userid=dict(), path_of_security_requirements=dict(), location=dict(),
+                         expected_result=dict(default='all-passed'), state=dict(),
+                         result_detail=dict(default='normal'), result_file=dict())
+    module = HarnessModule(argument_spec, dict(
+        zmf_host=sim.host, zmf_port=sim.port, zmf_user=USER, zmf_password=PASSWORD,
+        state=state, location=location, path_of_security_requirements=path))
+    action = dict(
+        check=dict(remote=zmf_sca.validate_descriptor, local=zmf_sca.validate_resource),
+        provisioned=dict(remote=zmf_sca.provision_descriptor, local=zmf_sca.provision_resource)
+    )[state][location]
+    sim.reset_stats()
+    return run_action(action, module)
+
+
+@scenario('sca.check.remote')
+def _sca_check_remote(sim, tmpdir):
+    return _run_sca(sim, tmpdir, 'check', 'remote')
+
+
+@scenario('sca.check.local')
+def _sca_check_local(sim, tmpdir):
+    return _run_sca(sim, tmpdir, 'check', 'local')
+
+
+@scenario('sca.provisioned.remote')
+def _sca_provisioned_remote(sim, tmpdir):
+    return _run_sca(sim, tmpdir, 'provisioned', 'remote')
+
+
+@scenario('sca.provisioned.local')
+def _sca_provisioned_local(sim, tmpdir):
+    return _run_sca(sim, tmpdir, 'provisioned', 'local')
+
+
+@scenario('sca.check.info_cached')
+def _sca_check_info_cached(sim, tmpdir):
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils import zmf_util
+    _run_sca(sim, tmpdir, 'check', 'remote')
+    # a new module process finds /zosmf/info in the controller cache
+    getattr(zmf_util, '__zosmf_info').clear()
+    return _run_sca(sim, tmpdir, 'check', 'remote')
+
+
+@scenario('sca.check.unsupported')
+def _sca_check_unsupported(sim, tmpdir):
+    sim.configure(dict(zosmf_version=26))
+    return _run_sca(sim, tmpdir, 'check', 'remote')
+
+
+@scenario('authenticate.basic')
+def _authenticate_basic(sim, tmpdir):
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules import zmf_authenticate
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import get_auth_argument_spec
+    module = HarnessModule(get_auth_argument_spec(), dict(
+        zmf_host=sim.host, zmf_port=sim.port, zmf_user=USER, zmf_password=PASSWORD))
+    sim.reset_stats()
+    return run_action(zmf_authenticate.authenticate, module)
+
+
+@scenario('authenticate.hosts')
+def _authenticate_hosts(sim, tmpdir):
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules import zmf_authenticate
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import get_auth_argument_spec
+    # 4 names of the simulator and a server that is down, authenticated 2 at
+    # a time; the down server is reported in errors, not in credentials
+    hosts = ['127.0.0.1', 'localhost', '127.0.0.1:%d' % sim.port, 'localhost:%d' % sim.port]
+    down = '127.0.0.1:%d' % free_port()
+    sim.configure(dict(endpoint_latency_ms={'auth.getAuth': 200}))
+    argument_spec = get_auth_argument_spec()
+    argument_spec.update(max_concurrency=dict(default=8))
+    module = HarnessModule(argument_spec, dict(
+        zmf_hosts=hosts[:2] + [down] + hosts[2:], zmf_port=sim.port, zmf_user=USER, zmf_password=PASSWORD,
+        max_concurrency=2))
+    sim.reset_stats()
+    result = run_action(zmf_authenticate.authenticate_hosts, module)
+    if result[1]:
+        return result
+    credentials, errors = result[0]['credentials'], result[0]['errors']
+    if sorted(credentials) != sorted(hosts) or list(errors) != [down] \
+            or any(not c.get('ltpa_token_2') or c['zmf_port'] != sim.port for c in credentials.values()) \
+            or 'Connection refused' not in errors[down]:
+        return dict(msg='the credentials or errors are wrong: ' + json.dumps(result[0])), True, result[2]
+    peak = sim.get_stats()['peak_in_flight']
+    if peak != 2:
+        return dict(msg='%d servers were authenticated at once, max_concurrency is 2' % peak), True, result[2]
+    return result
+
+
+def _include_role(name, **variables):
+    return {'include_role': {'name': 'ibm.ibm_zosmf.' + name}, 'vars': variables}
+
+
+@scenario('role.zmf_workflow_complete.new', role=True)
+def _role_workflow_complete_new(sim, tmpdir):
+    return [], [_include_role('zmf_workflow_complete', workflow_name=WORKFLOW_NAME,
+                              workflow_file=WORKFLOW_FILE, complete_check_delay=0)]
+
+
+@scenario('role.zmf_workflow_complete.completed', role=True)
+def _role_workflow_complete_completed(sim, tmpdir):
+    setup = [_include_role('zmf_workflow_complete', workflow_name=WORKFLOW_NAME,
+                           workflow_file=WORKFLOW_FILE, complete_check_delay=0)]
+    return setup, setup
+
+
+@scenario('role.zmf_workflow_complete.minimal', role=True)
+def _role_workflow_complete_minimal(sim, tmpdir):
+    # the same calls, with only the keys and status kept in final_result
+    return [], [_include_role('zmf_workflow_complete', workflow_name=WORKFLOW_NAME,
+                              workflow_file=WORKFLOW_FILE, complete_check_delay=0, result_detail='minimal',
+                              result_file=os.path.join(tmpdir, 'result.json')),
+                {'assert': {'that': ["'msg' not in final_result", "final_result.completed",
+                                     "result.result_file is exists"]}}]
+
+
+@scenario('role.zmf_workflow_complete.graph', role=True)
+def _role_workflow_complete_graph(sim, tmpdir):
+    base, db2 = WORKFLOW_NAME + '_base', WORKFLOW_NAME + '_db2'
+    return [], [_include_role('zmf_workflow_complete', workflow_file=WORKFLOW_FILE, complete_check_delay=0,
+                              workflows=[dict(workflow_name=base), dict(workflow_name=db2, depends_on=[base])]),
+                {'assert': {'that': ["final_result.critical_path == ['%s', '%s']" % (base, db2),
+                                     "final_result.workflows | map(attribute='completed') is all"]}}]
+
+
+@scenario('role.zmf_workflow_complete.hosts', role=True)
+def _role_workflow_complete_hosts(sim, tmpdir):
+    return [], [_include_role('zmf_workflow_complete', workflow_file=WORKFLOW_FILE, complete_check_delay=0,
+                              workflow_name=WORKFLOW_NAME, workflow_hosts=['SY1', 'SY2', 'SY3']),
+                {'assert': {'that': ["final_result.hosts | map(attribute='completed') is all",
+                                     "final_result.workflows[2].workflow_name == '%s_SY3'" % WORKFLOW_NAME]}}]
+
+
+@scenario('role.zmf_cpm_list_software_templates', role=True)
+def _role_cpm_list(sim, tmpdir):
+    return [], [_include_role('zmf_cpm_list_software_templates')]
+
+
+@scenario('role.zmf_cpm_provision_software_service', role=True)
+def _role_cpm_provision(sim, tmpdir):
+    return [], [_include_role('zmf_cpm_provision_software_service', cpm_template_name='simtemplate0',
+                              domain_name='default')]
+
+
+@scenario('role.zmf_cpm_provision_software_service.minimal', role=True)
+def _role_cpm_provision_minimal(sim, tmpdir):
+    return [], [_include_role('zmf_cpm_provision_software_service', cpm_template_name='simtemplate0',
+                              domain_name='default', result_detail='minimal'),
+                {'assert': {'that': ["zosmf_instance_info['object-id']", "'variables' not in zosmf_instance_info",
+                                     "instance_info_json_path is exists"]}}]
+
+
+@scenario('role.zmf_cpm_provision_software_service.adaptive', role=True)
+def _role_cpm_provision_adaptive(sim, tmpdir):
+    # the second provision of the template is polled around the end
+    # predicted from the first one
+    sim.configure(dict(cpm_step_count=3, cpm_step_seconds=2))
+    provision = _include_role('zmf_cpm_provision_software_service', cpm_template_name='simtemplate0',
+                              domain_name='default', api_polling_adaptive=True, api_polling_interval_seconds=1)
+    history = os.path.join(tmpdir, 'provision_durations.json')
+    return [provision], [provision, {'assert': {'that': [
+        "(lookup('file', '%s') | from_json)['simtemplate0'] | length == 2" % history]}}]
+
+
+@scenario('role.zmf_cpm_provision_software_service.adaptive.hosts', role=True)
+def _role_cpm_provision_adaptive_hosts(sim, tmpdir):
+    # 3 hosts provision the template at once twice, and every provision
+    # adds its duration to the history file; the role creates the instance
+    # record directory of the first host only
+    sim.configure(dict(cpm_step_count=3))
+    record_dir = {'file': {'path': os.path.join(tmpdir, '{{ inventory_hostname }}'), 'state': 'directory'}}
+    provision = _include_role('zmf_cpm_provision_software_service', cpm_template_name='simtemplate0',
+                              domain_name='default', api_polling_adaptive=True, api_polling_interval_seconds=1)
+    history = os.path.join(tmpdir, 'provision_durations.json')
+    return [record_dir, provision], [provision, {'assert': {'that': [
+        "(lookup('file', '%s') | from_json)['simtemplate0'] | length == 6" % history]}}], ['SY1', 'SY2', 'SY3']
+
+
+def _httpapi_vars(sim, network_os='ibm.ibm_zosmf.zmf'):
+    # the connection of the zmf httpapi plugin to the simulator
+    return dict(ansible_connection='ansible.netcommon.httpapi', ansible_network_os=network_os,
+                ansible_host=sim.host, ansible_httpapi_port=sim.port, ansible_httpapi_use_ssl=True,
+                ansible_httpapi_validate_certs=False, ansible_user=USER, ansible_password=PASSWORD)
+
+
+@scenario('httpapi.relogin', role=True, requires='ansible.netcommon')
+def _httpapi_relogin(sim, tmpdir):
+    # the plugin logs in once for the first task; the token expires before
+    # the second task, whose request is rejected, so the plugin logs in again
+    # and sends it once more
+    config = {'uri': {'url': 'https://%s:%s/__sim/config' % (sim.host, sim.port), 'method': 'POST',
+                      'body_format': 'json', 'body': {'token_ttl': 2}, 'status_code': [200, 204],
+                      'validate_certs': False}}
+    return [config], [
+        {'ibm.ibm_zosmf.zmf_workflow': dict(state='started', workflow_name=WORKFLOW_NAME,
+                                            workflow_file=WORKFLOW_FILE, workflow_host='SY1', workflow_owner=USER),
+         'vars': _httpapi_vars(sim), 'register': 'started'},
+        {'pause': {'seconds': 3}},
+        {'ibm.ibm_zosmf.zmf_workflow': dict(state='check', workflow_key='{{ started.workflow_key }}'),
+         'vars': _httpapi_vars(sim), 'register': 'checked'},
+        {'assert': {'that': ['checked.completed']}}
+    ]
+
+
+@scenario('httpapi.other_network_os', role=True, requires='ansible.netcommon')
+def _httpapi_other_network_os(sim, tmpdir):
+    # the persistent connection of another httpapi plugin is not used, the
+    # module sends its requests with its own session
+    return [], [
+        {'ibm.ibm_zosmf.zmf_workflow': dict(state='started', workflow_name=WORKFLOW_NAME,
+                                            workflow_file=WORKFLOW_FILE, workflow_host='SY1',
+                                            workflow_owner=USER, zmf_host=sim.host, zmf_port=sim.port, zmf_user=USER,
+                                            zmf_password=PASSWORD),
+         'vars': _httpapi_vars(sim, 'ansible.netcommon.restconf')}
+    ]
+
+
+def _provisioned_instance():
+    return [
+        _include_role('zmf_cpm_provision_software_service', cpm_template_name='simtemplate0',
+                      domain_name='default'),
+        {'set_fact': {'instance_file_path': '{{ instance_info_json_path }}'}}
+    ]
+
+
+@scenario('role.zmf_cpm_manage_software_instance', role=True)
+def _role_cpm_manage(sim, tmpdir):
+    return _provisioned_instance(), [_include_role(
+        'zmf_cpm_manage_software_instance', instance_action_name='deprovision',
+        instance_info_json_path='{{ instance_file_path }}')]
+
+
+@scenario('role.zmf_cpm_remove_software_instance', role=True)
+def _role_cpm_remove(sim, tmpdir):
+    return _provisioned_instance(), [_include_role(
+        'zmf_cpm_remove_software_instance', instance_info_json_path='{{ instance_file_path }}')]
+
+
+@scenario('role.zmf_cpm_create_software_instance', role=True)
+def _role_cpm_create(sim, tmpdir):
+    return [], [_include_role(
+        'zmf_cpm_create_software_instance', system_name='SY1', sysplex_name='PLEX1', external_name='DB2B',
+        software_type='Db2', vendor_name='IBM', product_version='V12', instance_description='Budget',
+        instance_owner=USER, instance_provider=USER, instance_state='deprovisioned')]
+
+
+@scenario('role.zmf_cpm_get_software_instance', role=True)
+def _role_cpm_get(sim, tmpdir):
+    setup = _role_cpm_create(sim, tmpdir)[1]
+    return setup, [_include_role('zmf_cpm_get_software_instance', external_software_name='DB2B')]
+
+
+def _collections_path(collections_root):
+    """
+    Return the collections path of ansible-playbook: the collection under
+    test, then the collections installed for the user or in
+    ANSIBLE_COLLECTIONS_PATH.
+    """
+    installed = os.environ.get('ANSIBLE_COLLECTIONS_PATH') \
+        or os.pathsep.join([os.path.expanduser('~/.ansible/collections'), '/usr/share/ansible/collections'])
+    return collections_root + os.pathsep + installed
+
+
+def _has_collection(name, collections_root):
+    namespace, collection = name.split('.')
+    return any(os.path.isdir(os.path.join(path, 'ansible_collections', namespace, collection))
+               for path in _collections_path(collections_root).split(os.pathsep))
+
+
+def _run_role(sim, tmpdir, setup, tasks, collections_root, hosts=('localhost',)):
+    """
+    Run the setup tasks, reset the counters of the simulator and run the
+    measured tasks in one play on the hosts, all run locally.
+    """
+    reset = {'uri': {'url': 'https://%s:%s/__sim/reset' % (sim.host, sim.port), 'method': 'POST',
+                     'status_code': 204, 'validate_certs': False}}
+    play = dict(
+        hosts='all',
+        gather_facts=False,
+        vars=dict(zmf_host=sim.host, zmf_port=sim.port, zmf_user=USER, zmf_password=PASSWORD,
+                  instance_record_dir=tmpdir, api_polling_interval_seconds=0, api_polling_retry_count=5),
+        tasks=setup + [reset] + tasks
+    )
+    playbook = os.path.join(tmpdir, 'budget.yml')
+    with open(playbook, 'w') as f:
+        # JSON is valid YAML
+        json.dump([play], f, indent=2)
+    # the roles use the truthy conditionals accepted before ansible-core 2.19
+    env = dict(os.environ, ANSIBLE_COLLECTIONS_PATH=_collections_path(collections_root), ANSIBLE_NOCOLOR='1',
+               ANSIBLE_LOCALHOST_WARNING='false', ANSIBLE_INVENTORY_UNPARSED_WARNING='false',
+               ANSIBLE_ALLOW_BROKEN_CONDITIONALS='true')
+    process = subprocess.Popen(
+        ['ansible-playbook', '-i', ','.join(hosts) + ',', '-c', 'local', '-e',
+         'ansible_python_interpreter=' + sys.executable, playbook],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env, cwd=tmpdir)
+    output = process.communicate()[0].decode('utf-8', 'replace')
+    if process.returncode != 0:
+        return dict(msg=output[-2000:]), True, 0
+    return {}, False, 0
+
+
+def _measure(stats, failed):
+    calls = dict((k, v['calls']) for k, v in stats['endpoints'].items() if v['calls'])
+    return dict(
+        failed=failed,
+        calls=calls,
+        bytes_in=sum(v['bytes_in'] for v in stats['endpoints'].values()),
+        bytes_out=sum(v['bytes_out'] for v in stats['endpoints'].values()),
+        basic_auths=stats['auth'].get('basic', 0)
+    )
+
+
+def check_budget(measured, budget, bytes_tolerance):
+    """
+    Return the violations and the possible savings of a scenario. The bytes
+    may exceed their budget by the bytes_tolerance of the budget, for the
+    scenarios whose responses depend on the timing of concurrent requests.
+    """
+    bytes_tolerance = max(bytes_tolerance, budget.get('bytes_tolerance', 0))
+    violations = []
+    savings = []
+    if measured['failed'] != budget['failed']:
+        violations.append('failed: %s, expected %s' % (measured['failed'], budget['failed']))
+    for endpoint in sorted(set(measured['calls']) | set(budget['calls'])):
+        used = measured['calls'].get(endpoint, 0)
+        allowed = budget['calls'].get(endpoint, 0)
+        if used > allowed:
+            violations.append('%s: %d calls, budget %d' % (endpoint, used, allowed))
+        elif used < allowed:
+            savings.append('%s: %d calls, budget %d' % (endpoint, used, allowed))
+    for k in ('bytes_in', 'bytes_out'):
+        if measured[k] > budget[k] * (1 + bytes_tolerance):
+            violations.append('%s: %d, budget %d' % (k, measured[k], budget[k]))
+    # the requests authenticated against the security product with a user
+    # and password, rather than with the token z/OSMF returned
+    if measured['basic_auths'] > budget.get('basic_auths', measured['basic_auths']):
+        violations.append('basic_auths: %d, budget %d' % (measured['basic_auths'], budget['basic_auths']))
+    return violations, savings
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Check the API call budget of every module state and role.')
+    parser.add_argument('-k', dest='select', help='run only the scenarios whose name contains this text')
+    parser.add_argument('--budgets', default=BUDGET_FILE, help='the budget file, default call_budgets.json')
+    parser.add_argument('--bytes-tolerance', type=float, default=0.0,
+                        help='accepted relative excess of the bytes budgets, default 0')
+    parser.add_argument('--write-budgets', action='store_true',
+                        help='write the measured calls and bytes of the selected scenarios as their budgets')
+    parser.add_argument('--skip-roles', action='store_true', help='do not run the role scenarios')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    collections_root = import_collection()
+    # the bytes sent do not depend on the optional JSON libraries installed
+    os.environ['ZMF_JSON_BACKEND'] = 'json'
+    budgets = {}
+    if os.path.exists(args.budgets):
+        with open(args.budgets) as f:
+            budgets = json.load(f)
+    has_playbook = shutil.which('ansible-playbook') is not None if hasattr(shutil, 'which') else False
+    failed = 0
+    measured_all = {}
+    for name, role, requires, func in _scenarios:
+        if args.select and args.select not in name:
+            continue
+        if role and (args.skip_roles or not has_playbook):
+            print('SKIP %-45s ansible-playbook is not available' % name if not args.skip_roles
+                  else 'SKIP %-45s --skip-roles' % name)
+            continue
+        if requires and not _has_collection(requires, collections_root):
+            print('SKIP %-45s %s is not installed' % (name, requires))
+            continue
+        # every scenario gets a fresh simulator, so the objects of the
+        # previous scenarios do not change the size of the list responses
+        sim = SimulatorProcess(SIMULATOR_CONFIG)
+        tmpdir = tempfile.mkdtemp(prefix='zmf_budget_')
+        # the /zosmf/info cache of the controller starts empty in every scenario
+        os.environ['ZMF_INFO_CACHE_DIR'] = tmpdir
+        try:
+            if role:
+                play = func(sim, tmpdir)
+                result, error, seconds = _run_role(sim, tmpdir, play[0], play[1], collections_root, *play[2:])
+            else:
+                result, error, seconds = func(sim, tmpdir)
+            measured = _measure(sim.get_stats(), error)
+        finally:
+            sim.stop()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        measured_all[name] = measured
+        if error and role:
+            failed += 1
+            print('FAIL %-45s the playbook failed:\n%s' % (name, result['msg']))
+            continue
+        if name not in budgets:
+            if not args.write_budgets:
+                failed += 1
+                print('FAIL %-45s no budget, run with --write-budgets' % name)
+            continue
+        violations, savings = check_budget(measured, budgets[name], args.bytes_tolerance)
+        total = sum(measured['calls'].values())
+        if violations:
+            failed += 1
+            print('FAIL %-45s %d calls' % (name, total))
+            for v in violations:
+                print('       over budget  ' + v)
+        else:
+            print('ok   %-45s %d calls, %d bytes in, %d bytes out' % (
+                name, total, measured['bytes_in'], measured['bytes_out']))
+        for s in savings:
+            print('       under budget ' + s + ', tighten call_budgets.json')
+    if args.write_budgets:
+        for name, measured in measured_all.items():
+            if 'bytes_tolerance' in budgets.get(name, {}):
+                measured['bytes_tolerance'] = budgets[name]['bytes_tolerance']
+        budgets.update(measured_all)
+        with open(args.budgets, 'w') as f:
+            json.dump(budgets, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print('Budgets written to ' + args.budgets)
+        return 0
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
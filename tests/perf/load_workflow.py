@@ -0,0 +1,312 @@
+# Copyright (c) IBM Corporation 2021
+# Apache License, Version 2.0 (see https://opensource.org/licenses/Apache-2.0)
+
+"""
+Drive concurrent workflow lifecycles through the real zmf_workflow code paths
+against a stand-in z/OSMF endpoint.
+
+Each lifecycle runs, like the zmf_workflow_complete role:
+    existed (action_compare) -> deleted (action_delete) ->
+    started (action_start) -> check (action_check) until complete
+
+and the tool reports the throughput, the p50/p95/p99 latency of every state,
+the API calls per lifecycle, the size of the results registered per lifecycle
+and the CPU/RSS used by the controller side.
+
+    python tests/perf/load_workflow.py --lifecycles 200 --concurrency 20
+    python tests/perf/load_workflow.py --zmf-host 127.0.0.1 --zmf-port 10443
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from multiprocessing.pool import Pool, ThreadPool
+
+from perf_utils import (
+    HarnessModule,
+    SimulatorProcess,
+    compare_metrics,
+    control_simulator,
+    import_collection,
+    latency_summary,
+    resource_usage,
+    run_action
+)
+
+STATES = ('existed', 'deleted', 'started', 'check')
+_options = None
+
+
+def _workflow_module(options, state, index, workflow_key=None):
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_util import get_connect_argument_spec
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_workflow_api import get_request_argument_spec
+    argument_spec = get_connect_argument_spec()
+    argument_spec.update(get_request_argument_spec()[1])
+    argument_spec.update(state=dict(), workflow_key=dict(), shared_polling=dict(default=False),
+                         shared_polling_interval=dict(default=5), workflow_fingerprint=dict(default=True),
+                         workflow_pool_size=dict(default=0), workflow_pool_cleanup=dict(default=False),
+                         result_detail=dict(default='normal'), result_file=dict(),
+                         progress_events=dict(default=False), progress_events_dir=dict(),
+                         adaptive_polling=dict(default=False), adaptive_polling_interval=dict(default=5),
+                         adaptive_polling_max_interval=dict(default=300), workflows=dict(),
+                         max_concurrency=dict(default=10), force_complete=dict(default=False),
+                         complete_check_times=dict(default=10), complete_check_delay=dict(default=5),
+                         workflow_hosts=dict(), workflow_name_template=dict(default='{workflow_name}_{workflow_host}'),
+                         workflow_plan=dict(), bulk_delete=dict())
+    return HarnessModule(argument_spec, dict(
+        state=state,
+        zmf_host=options['zmf_host'],
+        zmf_port=options['zmf_port'],
+        zmf_user=options['zmf_user'],
+        zmf_password=options['zmf_password'],
+        workflow_name='%s_%d' % (options['name_prefix'], index),
+        workflow_file=options['workflow_file'],
+        workflow_host=options['workflow_host'],
+        workflow_key=workflow_key,
+        shared_polling=options['shared_polling'],
+        shared_polling_interval=options['check_delay'],
+        result_detail=options['result_detail'],
+        adaptive_polling=options['adaptive_polling'],
+        adaptive_polling_interval=options['check_delay'],
+        adaptive_polling_max_interval=options['check_max_delay'],
+        workflow_pool_size=options['pool_size']
+    ))
+
+
+def run_lifecycle(index):
+    """
+    Run one workflow lifecycle and return the seconds spent in every state,
+    and the JSON size of the results the controller would hold. The workflow
+    name is shared by the rounds of a lifecycle, so from the second round on
+    the existing instance is found and deleted.
+    """
+    from ansible_collections.ibm.ibm_zosmf.plugins.modules import zmf_workflow
+    from ansible_collections.ibm.ibm_zosmf.plugins.module_utils.zmf_workflow_api import get_request_argument_spec
+    options = _options
+    mapping = get_request_argument_spec()[0]
+    timings = dict((s, []) for s in STATES)
+    result_bytes = 0
+    start = time.time()
+    # existed
+    module = _workflow_module(options, 'existed', index)
+    result, failed, seconds = run_action(zmf_workflow.action_compare, module, mapping)
+    timings['existed'].append(seconds)
+    result_bytes += len(json.dumps(result))
+    if failed:
+        return dict(ok=False, error='existed: ' + result['msg'], timings=timings)
+    workflow_key = result['workflow_key']
+    # deleted, the lifecycle always starts from a new instance
+    if workflow_key:
+        module = _workflow_module(options, 'deleted', index, workflow_key)
+        result, failed, seconds = run_action(zmf_workflow.action_delete, module)
+        timings['deleted'].append(seconds)
+        result_bytes += len(json.dumps(result))
+        if failed:
+            return dict(ok=False, error='deleted: ' + result['msg'], timings=timings)
+    # started, from the pool without a name with --pool-size
+    module = _workflow_module(options, 'started', index)
+    if options['pool_size']:
+        module.params['workflow_name'] = None
+    result, failed, seconds = run_action(zmf_workflow.action_start, module)
+    timings['started'].append(seconds)
+    result_bytes += len(json.dumps(result))
+    if failed:
+        return dict(ok=False, error='started: ' + result['msg'], timings=timings)
+    workflow_key = result['workflow_key']
+    # check until complete
+    for i in range(options['check_times']):
+        module = _workflow_module(options, 'check', index, workflow_key)
+        result, failed, seconds = run_action(zmf_workflow.action_check, module)
+        timings['check'].append(seconds)
+        if failed:
+            return dict(ok=False, error='check: ' + result['msg'], timings=timings)
+        if not result['waiting']:
+            break
+        if not options['adaptive_polling']:
+            # the adaptive checks wait for the time they scheduled
+            time.sleep(options['check_delay'])
+    # only the last check is registered, the retries replace each other
+    result_bytes += len(json.dumps(result))
+    if options['pool_size']:
+        # the instance of the pool is not found by name in the next round
+        module = _workflow_module(options, 'deleted', index, workflow_key)
+        deleted, failed, seconds = run_action(zmf_workflow.action_delete, module)
+        timings['deleted'].append(seconds)
+        if failed:
+            return dict(ok=False, error='deleted: ' + deleted['msg'], timings=timings)
+    return dict(ok=result.get('completed', False), error=None if result.get('completed') else result.get('message'),
+                timings=timings, seconds=time.time() - start, result_bytes=result_bytes)
+
+
+def _init_worker(options):
+    global _options
+    _options = options
+    import_collection()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Drive concurrent zmf_workflow lifecycles.')
+    parser.add_argument('--lifecycles', type=int, default=50, help='number of workflow lifecycles')
+    parser.add_argument('--concurrency', type=int, default=10, help='lifecycles run at the same time')
+    parser.add_argument('--rounds', type=int, default=2,
+                        help='rounds sharing the workflow names, the second round exercises state=deleted')
+    parser.add_argument('--workers', choices=['threads', 'processes'], default='threads',
+                        help='run lifecycles in threads, or in processes like Ansible forks')
+    parser.add_argument('--zmf-host', help='stand-in z/OSMF host, a local simulator is started when omitted')
+    parser.add_argument('--zmf-port', type=int)
+    parser.add_argument('--zmf-user', default='IBMUSER')
+    parser.add_argument('--zmf-password', default='SECRET')
+    parser.add_argument('--workflow-file', default='/sim/perf_workflow.xml')
+    parser.add_argument('--workflow-host', default='SY1')
+    parser.add_argument('--name-prefix', default='ansible_perf')
+    parser.add_argument('--check-times', type=int, default=100, help='max state=check calls per lifecycle')
+    parser.add_argument('--check-delay', type=float, default=0.5, help='seconds between state=check calls')
+    parser.add_argument('--shared-polling', action='store_true',
+                        help='check the workflows through the poller shared by all the lifecycles')
+    parser.add_argument('--adaptive-polling', action='store_true',
+                        help='schedule the checks around the end predicted from the earlier lifecycles')
+    parser.add_argument('--check-max-delay', type=float, default=10,
+                        help='longest seconds between state=check calls with --adaptive-polling')
+    parser.add_argument('--history-dir',
+                        help='durations kept for --adaptive-polling, a new temporary directory when omitted')
+    parser.add_argument('--pool-size', type=int, default=0,
+                        help='workflow_pool_size of state=started, the instances are created ahead of the starts '
+                        'and deleted by key once completed')
+    parser.add_argument('--result-detail', choices=['minimal', 'normal', 'full'], default='normal',
+                        help='the result_detail of every state')
+    parser.add_argument('--sim-set', action='append', default=[], metavar='KEY=VALUE',
+                        help='configuration of the local simulator')
+    parser.add_argument('--output', help='write the report to this JSON file')
+    parser.add_argument('--compare', help='compare with the report in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='accepted relative regression when comparing, default 0.2')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    import_collection()
+    simulator = None
+    if args.zmf_host is None:
+        config = dict(step_seconds=0.2, step_fanout=2, step_depth=2)
+        for item in args.sim_set:
+            k, v = item.split('=', 1)
+            config[k] = json.loads(v)
+        simulator = SimulatorProcess(config)
+        args.zmf_host, args.zmf_port = simulator.host, simulator.port
+    options = dict(
+        zmf_host=args.zmf_host, zmf_port=args.zmf_port, zmf_user=args.zmf_user,
+        zmf_password=args.zmf_password, workflow_file=args.workflow_file,
+        workflow_host=args.workflow_host, name_prefix=args.name_prefix,
+        check_times=args.check_times, check_delay=args.check_delay,
+        shared_polling=args.shared_polling, result_detail=args.result_detail,
+        adaptive_polling=args.adaptive_polling, check_max_delay=args.check_max_delay,
+        pool_size=args.pool_size
+    )
+    if args.adaptive_polling:
+        # set before the worker processes are forked
+        os.environ['ZMF_HISTORY_DIR'] = args.history_dir or tempfile.mkdtemp(prefix='zmf_history_')
+    if args.pool_size:
+        # every run starts with empty pools
+        os.environ['ZMF_POOL_DIR'] = tempfile.mkdtemp(prefix='zmf_pool_')
+    stats_before = None
+    try:
+        try:
+            stats_before = control_simulator(args.zmf_host, args.zmf_port, 'get', 'stats')
+        except Exception:
+            stats_before = None
+        usage_before = resource_usage()
+        pool_class = ThreadPool if args.workers == 'threads' else Pool
+        pool = pool_class(args.concurrency, _init_worker, (options,))
+        start = time.time()
+        names = -(-args.lifecycles // args.rounds)
+        results = []
+        while len(results) < args.lifecycles:
+            # the rounds run one after another, so that no two lifecycles
+            # share a workflow name at the same time
+            count = min(names, args.lifecycles - len(results))
+            results += pool.map(run_lifecycle, range(count), chunksize=1)
+        elapsed = time.time() - start
+        pool.close()
+        pool.join()
+        usage_after = resource_usage()
+        stats_after = None
+        if stats_before is not None:
+            stats_after = control_simulator(args.zmf_host, args.zmf_port, 'get', 'stats')
+    finally:
+        if simulator is not None:
+            simulator.stop()
+
+    completed = [r for r in results if r['ok']]
+    report = dict(
+        lifecycles=args.lifecycles,
+        concurrency=args.concurrency,
+        workers=args.workers,
+        completed=len(completed),
+        failed=len(results) - len(completed),
+        errors=sorted(set(r['error'] for r in results if r['error']))[:10],
+        elapsed_s=round(elapsed, 3),
+        throughput_per_s=round(len(completed) / elapsed, 3) if elapsed else None,
+        lifecycle=latency_summary([r['seconds'] for r in completed]),
+        states=dict((s, latency_summary([t for r in results for t in r['timings'][s]])) for s in STATES),
+        result_bytes_per_lifecycle=round(
+            sum(r['result_bytes'] for r in completed) / float(max(len(completed), 1)), 1),
+        controller=dict(
+            cpu_user_s=round(usage_after['cpu_user_s'] - usage_before['cpu_user_s'], 3),
+            cpu_system_s=round(usage_after['cpu_system_s'] - usage_before['cpu_system_s'], 3),
+            max_rss_mb=usage_after['max_rss_mb']
+        )
+    )
+    report['controller']['cpu_ms_per_lifecycle'] = round(
+        (report['controller']['cpu_user_s'] + report['controller']['cpu_system_s']) * 1000 / max(len(results), 1), 2)
+    if stats_after is not None:
+        calls = {}
+        for k, v in stats_after['endpoints'].items():
+            before = stats_before['endpoints'].get(k, dict(calls=0))['calls']
+            calls[k] = v['calls'] - before
+        total = sum(calls.values())
+        report['api_calls'] = dict(
+            total=total,
+            per_lifecycle=round(total / float(max(len(results), 1)), 2),
+            endpoints=calls
+        )
+    print(json.dumps(report, indent=2, sort_keys=True))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_metrics(_flatten(report), _flatten(baseline), args.tolerance,
+                                      higher_is_better=('throughput_per_s',))
+        if regressions:
+            print('Regressions over %d%%:' % (args.tolerance * 100))
+            for r in regressions:
+                print('  ' + r)
+            return 1
+    return 0 if not report['failed'] else 1
+
+
+def _flatten(report):
+    """
+    Return the metrics of a report that are compared between runs.
+    """
+    metrics = dict(throughput_per_s=report['throughput_per_s'])
+    for s, v in report['states'].items():
+        metrics[s + '.p95_ms'] = v['p95_ms']
+    metrics['cpu_ms_per_lifecycle'] = report['controller']['cpu_ms_per_lifecycle']
+    if 'result_bytes_per_lifecycle' in report:
+        metrics['result_bytes_per_lifecycle'] = report['result_bytes_per_lifecycle']
+    if 'api_calls' in report:
+        metrics['api_calls_per_lifecycle'] = report['api_calls']['per_lifecycle']
+    return metrics
+
+
+if __name__ == '__main__':
+    sys.exit(main())
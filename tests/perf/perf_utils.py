@@ -0,0 +1,239 @@
+# Copyright (c) IBM Corporation 2021
+# Apache License, Version 2.0 (see https://opensource.org/licenses/Apache-2.0)
+
+"""
+Helpers shared by the performance test tools.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import resource
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    from urllib.request import Request, urlopen
+except ImportError:
+    from urllib2 import Request, urlopen
+
+PERF_DIR = os.path.dirname(os.path.abspath(__file__))
+COLLECTION_DIR = os.path.dirname(os.path.dirname(PERF_DIR))
+
+
+def import_collection():
+    """
+    Make the collection importable as ansible_collections.ibm.ibm_zosmf.
+
+    The checkout is used in place when it already lives in an
+    ansible_collections/ibm/ibm_zosmf tree, otherwise it is linked into a
+    temporary one.
+    """
+    parts = COLLECTION_DIR.split(os.sep)
+    if parts[-3:] == ['ansible_collections', 'ibm', 'ibm_zosmf']:
+        root = os.sep.join(parts[:-3])
+    else:
+        root = tempfile.mkdtemp(prefix='zmf_perf_')
+        os.makedirs(os.path.join(root, 'ansible_collections', 'ibm'))
+        os.symlink(COLLECTION_DIR, os.path.join(root, 'ansible_collections', 'ibm', 'ibm_zosmf'))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    return root
+
+
+class ModuleExit(Exception):
+    """
+    Raised by HarnessModule.exit_json with the module result.
+    """
+
+    def __init__(self, result):
+        super(ModuleExit, self).__init__(result.get('message', ''))
+        self.result = result
+
+
+class ModuleFailed(Exception):
+    """
+    Raised by HarnessModule.fail_json with the module result.
+    """
+
+    def __init__(self, result):
+        super(ModuleFailed, self).__init__(result.get('msg', ''))
+        self.result = result
+
+
+class HarnessModule(object):
+    """
+    A stand-in of AnsibleModule, so the real module code paths can be called
+    in-process.
+
+    :param dict argument_spec: the argument spec of the module, used to fill
+        in the default values
+    :param dict params: the module arguments
+    """
+
+    def __init__(self, argument_spec, params):
+        self.params = {}
+        for k, v in argument_spec.items():
+            self.params[k] = v.get('default')
+        self.params.update(params)
+        self.check_mode = False
+        self._socket_path = None
+
+    def exit_json(self, **kwargs):
+        raise ModuleExit(kwargs)
+
+    def fail_json(self, **kwargs):
+        kwargs['failed'] = True
+        raise ModuleFailed(kwargs)
+
+    def warn(self, warning):
+        pass
+
+
+def run_action(action, module, *args):
+    """
+    Call a module action and return (result, failed, seconds).
+    """
+    start = time.time()
+    try:
+        action(module, *args)
+    except ModuleExit as ex:
+        return ex.result, False, time.time() - start
+    except ModuleFailed as ex:
+        return ex.result, True, time.time() - start
+    return {}, False, time.time() - start
+
+
+def free_port():
+    s = socket.socket()
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class SimulatorProcess(object):
+    """
+    Run tests/perf/zmf_simulator.py in a child process, so that its CPU and
+    memory are not charged to the process under measurement.
+    """
+
+    def __init__(self, config=None, port=None, extra_args=None):
+        self.host = '127.0.0.1'
+        self.port = port or free_port()
+        args = [sys.executable, os.path.join(PERF_DIR, 'zmf_simulator.py'),
+                '--host', self.host, '--port', str(self.port)]
+        for k, v in (config or {}).items():
+            args += ['--set', '%s=%s' % (k, json.dumps(v))]
+        args += extra_args or []
+        self._process = subprocess.Popen(args, stdout=subprocess.DEVNULL)
+        deadline = time.time() + 30
+        while True:
+            try:
+                self.control('get', 'stats')
+                break
+            except Exception:
+                if self._process.poll() is not None or time.time() > deadline:
+                    raise RuntimeError('The z/OSMF simulator did not start.')
+                time.sleep(0.1)
+
+    def control(self, method, name, body=None):
+        return control_simulator(self.host, self.port, method, name, body)
+
+    def get_stats(self):
+        return self.control('get', 'stats')
+
+    def reset_stats(self):
+        self.control('post', 'reset')
+
+    def configure(self, config):
+        self.control('post', 'config', config)
+
+    def stop(self):
+        self._process.terminate()
+        self._process.wait()
+
+
+def control_simulator(host, port, method, name, body=None):
+    """
+    Call a control endpoint of a running simulator.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    if data is None and method == 'post':
+        data = b''
+    request = Request('https://%s:%s/__sim/%s' % (host, port, name), data=data)
+    request.get_method = lambda: method.upper()
+    response = urlopen(request, context=context, timeout=30)
+    content = response.read()
+    return json.loads(content) if content else {}
+
+
+def percentile(values, p):
+    """
+    Return the p-th percentile of values by linear interpolation.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_summary(values):
+    """
+    Return the count and p50/p95/p99/max of the given seconds, in ms.
+    """
+    summary = dict(count=len(values))
+    for p in (50, 95, 99):
+        v = percentile(values, p)
+        summary['p%d_ms' % p] = round(v * 1000, 2) if v is not None else None
+    summary['max_ms'] = round(max(values) * 1000, 2) if values else None
+    return summary
+
+
+def resource_usage():
+    """
+    Return the CPU seconds and peak RSS of this process and its children.
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in kilobytes on Linux
+    return dict(
+        cpu_user_s=usage.ru_utime + children.ru_utime,
+        cpu_system_s=usage.ru_stime + children.ru_stime,
+        max_rss_mb=round(max(usage.ru_maxrss, children.ru_maxrss) / 1024.0, 1)
+    )
+
+
+def compare_metrics(current, baseline, tolerance, higher_is_better=()):
+    """
+    Compare two flat dicts of metrics and return the regressions found.
+
+    :param dict current: the metrics of this run
+    :param dict baseline: the metrics of the baseline run
+    :param float tolerance: the accepted relative change, e.g. 0.1 for 10%
+    :param tuple higher_is_better: the metrics where a decrease regresses
+    :rtype: list[str]
+    """
+    regressions = []
+    for k, base in sorted(baseline.items()):
+        cur = current.get(k)
+        if not isinstance(base, (int, float)) or not isinstance(cur, (int, float)) or base == 0:
+            continue
+        change = (cur - base) / float(base)
+        if k in higher_is_better:
+            change = -change
+        if change > tolerance:
+            regressions.append('%s: %s -> %s (%+.1f%%)' % (k, base, cur, change * 100))
+    return regressions
@@ -0,0 +1,1194 @@
+# Copyright (c) IBM Corporation 2021
+# Apache License, Version 2.0 (see https://opensource.org/licenses/Apache-2.0)
+
+"""
+Local simulator of the z/OSMF REST services called by the ibm_zosmf
+collection.
+
+The simulator serves the workflow, security configuration assistant (SCA),
+authentication, cloud provisioning (CPM) and /zosmf/info endpoints over HTTPS, with a
+time-based workflow state machine, configurable latency, error injection and
+payload sizes. Every request is counted per endpoint so that the number of
+round trips and bytes transferred by a module or role can be measured offline.
+
+Run it standalone::
+
+    python tests/perf/zmf_simulator.py --port 10443 --latency-ms 20
+
+or embed it in a harness::
+
+    sim = ZmfSimulator(dict(latency_ms=20))
+    sim.start()
+    ... point zmf_host/zmf_port at sim.host/sim.port ...
+    print(sim.get_stats())
+    sim.stop()
+
+Control endpoints (not part of z/OSMF):
+    GET  /__sim/stats    return the request counters
+    POST /__sim/reset    reset the request counters
+    POST /__sim/config   merge the JSON body into the configuration
+
+With --replay DIR the requests are answered from the fixtures recorded by
+plugins/module_utils/zmf_fixture.py instead of the simulated services, and
+with --record DIR --upstream URL they are forwarded to a real z/OSMF and
+recorded. Both also serve the roles which call z/OSMF through the builtin
+uri module, where ZMF_FIXTURE_RECORD and ZMF_FIXTURE_REPLAY do not apply.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import base64
+import copy
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+
+
+DEFAULT_CONFIG = dict(
+    # mean latency added to every request, and the +/- jitter around it
+    latency_ms=0,
+    latency_jitter_ms=0,
+    # per endpoint latency overrides, e.g. {"workflow.list": 200}
+    endpoint_latency_ms={},
+    # probability of answering any request with error_status
+    error_rate=0.0,
+    error_status=500,
+    # per endpoint error injection, e.g. {"workflow.start": {"rate": 0.1, "status": 503}};
+    # status 0 closes the connection without answering, like a server failing
+    # once it received the request
+    endpoint_errors={},
+    # number of unrelated workflow instances present at startup, which sets
+    # the size of every unfiltered list response
+    workflow_count=0,
+    # shape of the step tree of each workflow instance
+    step_fanout=3,
+    step_depth=2,
+    # seconds each automated leaf step takes once the workflow is started
+    step_seconds=1.0,
+    # 1-based index of the leaf step that cannot be automated (IZUWF0145E),
+    # 0 means every step is automated
+    manual_step=0,
+    # number of variables defined by every workflow definition file
+    variable_count=5,
+    # names of the sensitive variables also defined by every definition file
+    sensitive_variables=[],
+    # extra bytes of description added to each step and variable
+    payload_padding=0,
+    # changing the revision changes the MD5 of every definition file
+    definition_revision=0,
+    # number of items returned by the SCA validate and provision services
+    sca_item_count=3,
+    # SCA status of every item: passed or failed
+    sca_item_status='passed',
+    # seconds an issued LTPA2/JWT token is accepted, 0 means forever
+    token_ttl=0,
+    # answer the requests authenticated with a user and password with new
+    # LtpaToken2/jwtToken cookies, as z/OSMF does
+    basic_auth_sets_token=True,
+    # accept requests without any credentials
+    allow_anonymous=False,
+    # number of published software templates
+    cpm_template_count=3,
+    # number of workflow steps of a software service provision
+    cpm_step_count=5,
+    cpm_step_seconds=1.0,
+    # seconds an instance action takes to complete
+    cpm_action_seconds=1.0,
+    # factor applied to the recorded latency with --replay, 0 disables it
+    latency_scale=1.0,
+    # version reported by /zosmf/info, 27 is z/OSMF V2R4
+    zosmf_version=27,
+    # status of the Security Configuration Assistant plugin reported by
+    # /zosmf/info, or null to leave the plugin out
+    sca_plugin_status='ACTIVE'
+)
+
+WORKFLOW_PATH = '/zosmf/workflow/rest/1.0/'
+SCA_PATH = '/zosmf/config/security/v1/'
+AUTH_PATH = '/zosmf/services/authenticate'
+CPM_PATH = '/zosmf/provisioning/rest/1.0/'
+INFO_PATH = '/zosmf/info'
+
+
+class SimulatedError(Exception):
+    """
+    An HTTP error answered by the simulator.
+    """
+
+    def __init__(self, status, message, message_id='IZUG000E'):
+        super(SimulatedError, self).__init__(message)
+        self.status = status
+        self.body = dict(messageID=message_id, messageText=message)
+
+
+class RequestStats(object):
+    """
+    Thread-safe counters of the requests served by the simulator.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+            self.auth = dict(basic=0, token=0, cert=0, anonymous=0, rejected=0)
+            self.connections = 0
+            self.tls_resumed = 0
+            # the requests being served, and the most served at once
+            self.in_flight = 0
+            self.peak_in_flight = 0
+
+    def add_connection(self, resumed):
+        with self._lock:
+            self.connections += 1
+            if resumed:
+                self.tls_resumed += 1
+
+    def begin_request(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def end_request(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def add_request(self, endpoint, status, bytes_in, bytes_out, auth_type):
+        with self._lock:
+            stats = self.endpoints.setdefault(
+                endpoint, dict(calls=0, bytes_in=0, bytes_out=0, status={})
+            )
+            stats['calls'] += 1
+            stats['bytes_in'] += bytes_in
+            stats['bytes_out'] += bytes_out
+            stats['status'][str(status)] = stats['status'].get(str(status), 0) + 1
+            if auth_type is not None:
+                self.auth[auth_type] += 1
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = copy.deepcopy(self.endpoints)
+            return dict(
+                endpoints=endpoints,
+                total_calls=sum(v['calls'] for v in endpoints.values()),
+                total_bytes_in=sum(v['bytes_in'] for v in endpoints.values()),
+                total_bytes_out=sum(v['bytes_out'] for v in endpoints.values()),
+                auth=dict(self.auth),
+                connections=self.connections,
+                tls_resumed=self.tls_resumed,
+                peak_in_flight=self.peak_in_flight
+            )
+
+
+class WorkflowStore(object):
+    """
+    In-memory repository of workflow instances.
+
+    The status of a started workflow instance is derived from the time
+    elapsed since it was started, so no background thread is needed.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._lock = threading.Lock()
+        self._workflows = {}
+        for i in range(int(config['workflow_count'])):
+            self.create(dict(
+                workflowName='sim_background_workflow_%d' % i,
+                workflowDefinitionFile='/sim/background_%d.xml' % (i % 10),
+                system='SY%d' % (i % 8),
+                owner='IBMUSER'
+            ))
+
+    def _padding(self):
+        return 'x' * int(self.config['payload_padding'])
+
+    def definition_md5(self, path):
+        seed = '%s#%s' % (path, self.config['definition_revision'])
+        return hashlib.md5(seed.encode('utf-8')).hexdigest().upper()
+
+    def definition_variables(self, path):
+        variables = []
+        for i in range(int(self.config['variable_count'])):
+            variables.append(dict(
+                name='var%d' % i,
+                default='default%d' % i,
+                type='string',
+                scope='instance',
+                description='Variable %d. %s' % (i, self._padding())
+            ))
+        for name in self.config['sensitive_variables']:
+            variables.append(dict(name=name, default=None, type='string', scope='instance',
+                                  visibility='private', sensitive=True, description='Sensitive variable.'))
+        return variables
+
+    def _build_steps(self, prefix, depth):
+        steps = []
+        for i in range(1, int(self.config['step_fanout']) + 1):
+            number = prefix + str(i)
+            step = dict(
+                name='step' + number.replace('.', '_'),
+                title='Step ' + number,
+                stepNumber=number,
+                state='Ready',
+                description=self._padding(),
+                isConditionStep=False,
+                steps=None
+            )
+            if depth > 1:
+                step['steps'] = self._build_steps(number + '.', depth - 1)
+            steps.append(step)
+        return steps
+
+    @staticmethod
+    def _leaves(steps):
+        leaves = []
+        for step in steps or []:
+            if step['steps'] is None:
+                leaves.append(step)
+            else:
+                leaves.extend(WorkflowStore._leaves(step['steps']))
+        return leaves
+
+    def create(self, body):
+        for arg in ('workflowName', 'workflowDefinitionFile', 'system', 'owner'):
+            if not body.get(arg):
+                raise SimulatedError(400, 'Required property %s is missing.' % arg, 'IZUWF0101E')
+        with self._lock:
+            for wf in self._workflows.values():
+                if wf['workflowName'] == body['workflowName']:
+                    raise SimulatedError(
+                        409, 'The workflow name %s is already in use.' % body['workflowName'], 'IZUWF0103E'
+                    )
+            path = body['workflowDefinitionFile']
+            supplied = {}
+            for v in body.get('variables') or []:
+                supplied[v['name']] = v['value']
+            variables = []
+            for v in self.definition_variables(path):
+                variables.append(dict(
+                    name=v['name'], type=v['type'], scope=v['scope'],
+                    value=supplied.get(v['name'], v['default']),
+                    description=v['description']
+                ))
+                if v.get('sensitive'):
+                    variables[-1].update(visibility=v['visibility'], sensitive=True)
+            key = str(uuid.uuid4())
+            wf = dict(
+                workflowKey=key,
+                workflowName=body['workflowName'],
+                workflowDescription='Simulated workflow for ' + path,
+                workflowID='SIMWF',
+                workflowVersion='1.0',
+                workflowDefinitionFileMD5Value=self.definition_md5(path),
+                vendor='IBM',
+                owner=body['owner'],
+                system=body['system'],
+                category='general',
+                statusName='in-progress',
+                deleteCompletedJobs=body.get('deleteCompletedJobs', False),
+                percentComplete=0,
+                automationStatus=None,
+                accessType=body.get('accessType', 'Public'),
+                assignToOwner=body.get('assignToOwner', True),
+                accountInfo=body.get('accountInfo'),
+                jobStatement=body.get('jobStatement'),
+                comments=body.get('comments'),
+                resolveGlobalConflictByUsing=body.get('resolveGlobalConflictByUsing', 'global'),
+                createdTime=int(time.time() * 1000),
+                variables=variables,
+                steps=self._build_steps('', int(self.config['step_depth'])),
+                _started=None,
+                _start_index=0
+            )
+            self._workflows[key] = wf
+            return dict(
+                workflowKey=key,
+                workflowDescription=wf['workflowDescription'],
+                workflowID=wf['workflowID'],
+                workflowVersion=wf['workflowVersion'],
+                vendor=wf['vendor']
+            )
+
+    def _refresh(self, wf):
+        """
+        Advance the state of a started workflow instance to the current time.
+        """
+        leaves = self._leaves(wf['steps'])
+        if wf['_started'] is None or not leaves:
+            return
+        step_seconds = float(self.config['step_seconds'])
+        elapsed = time.time() - wf['_started']
+        done = wf['_start_index']
+        if step_seconds > 0:
+            done += int(elapsed / step_seconds)
+        else:
+            done = len(leaves)
+        manual = int(self.config['manual_step'])
+        stop = None
+        if manual > wf['_start_index'] and done >= manual - 1:
+            done = manual - 1
+            stop = leaves[manual - 1]
+        done = min(done, len(leaves))
+        for i, leaf in enumerate(leaves):
+            if i < done:
+                leaf['state'] = 'Complete'
+            elif i == done and stop is None:
+                leaf['state'] = 'In Progress'
+            else:
+                leaf['state'] = 'Ready'
+        wf['percentComplete'] = int(done * 100 / len(leaves))
+        if stop is not None:
+            wf['statusName'] = 'in-progress'
+            wf['automationStatus'] = dict(
+                startUser=wf['owner'],
+                startedTime=int(wf['_started'] * 1000),
+                stoppedTime=int(time.time() * 1000),
+                currentStepNumber=stop['stepNumber'],
+                currentStepTitle=stop['title'],
+                messageID='IZUWF0145E',
+                messageText='IZUWF0145E: Automation processing for the workflow `%s` stopped at step `%s`. '
+                            'This step cannot be performed automatically.' % (wf['workflowName'], stop['title'])
+            )
+        elif done >= len(leaves):
+            # the automation stopped when the last step completed
+            stopped = min(time.time(), wf['_started'] + (len(leaves) - wf['_start_index']) * step_seconds)
+            wf['statusName'] = 'complete'
+            wf['percentComplete'] = 100
+            wf['automationStatus'] = dict(
+                startUser=wf['owner'],
+                startedTime=int(wf['_started'] * 1000),
+                stoppedTime=int(stopped * 1000),
+                currentStepNumber=None,
+                currentStepTitle=None,
+                messageID='IZUWF0126I',
+                messageText='IZUWF0126I: Automation processing for workflow `%s` is complete.' % wf['workflowName']
+            )
+        else:
+            current = leaves[done]
+            wf['statusName'] = 'automation-in-progress'
+            wf['automationStatus'] = dict(
+                startUser=wf['owner'],
+                startedTime=int(wf['_started'] * 1000),
+                stoppedTime=None,
+                currentStepNumber=current['stepNumber'],
+                currentStepTitle=current['title'],
+                messageID='IZUWF0122I',
+                messageText='IZUWF0122I: Automation processing is in progress.'
+            )
+
+    @staticmethod
+    def _public(wf):
+        return dict((k, v) for k, v in wf.items() if not k.startswith('_'))
+
+    def _get(self, key):
+        if key not in self._workflows:
+            raise SimulatedError(404, 'The workflow key %s was not found.' % key, 'IZUWF5001W')
+        wf = self._workflows[key]
+        self._refresh(wf)
+        return wf
+
+    def list(self, query):
+        with self._lock:
+            result = []
+            for wf in self._workflows.values():
+                self._refresh(wf)
+                if not self._match(wf, query):
+                    continue
+                item = self._public(wf)
+                for k in ('variables', 'steps', 'automationStatus', 'percentComplete',
+                          'comments', 'accountInfo', 'jobStatement', 'createdTime',
+                          'deleteCompletedJobs', 'accessType', 'assignToOwner',
+                          'resolveGlobalConflictByUsing'):
+                    item.pop(k, None)
+                result.append(item)
+            return dict(workflows=result)
+
+    @staticmethod
+    def _match(wf, query):
+        for arg in ('workflowName', 'category', 'statusName', 'owner', 'vendor'):
+            value = query.get(arg)
+            if value:
+                if arg == 'workflowName':
+                    if re.match('^(?:' + value + ')$', wf[arg]) is None:
+                        return False
+                elif str(wf[arg]) != value:
+                    return False
+        system = query.get('system')
+        if system:
+            own = wf['system']
+            if own != system and own.split('.')[-1] != system:
+                return False
+        return True
+
+    def properties(self, key, return_data):
+        with self._lock:
+            wf = copy.deepcopy(self._public(self._get(key)))
+            requested = [x.strip() for x in (return_data or '').split(',')]
+            for k in ('steps', 'variables'):
+                if k not in requested:
+                    wf.pop(k, None)
+            return wf
+
+    def start(self, key, body):
+        with self._lock:
+            wf = self._get(key)
+            if wf['statusName'] == 'automation-in-progress':
+                raise SimulatedError(
+                    409, 'IZUWF5008E: Automation is already in progress for workflow %s.' % wf['workflowName'],
+                    'IZUWF5008E'
+                )
+            if wf['statusName'] == 'complete':
+                raise SimulatedError(
+                    409, 'IZUWF5007E: The workflow %s is already complete.' % wf['workflowName'], 'IZUWF5007E'
+                )
+            leaves = self._leaves(wf['steps'])
+            index = 0
+            step_name = body.get('stepName')
+            if step_name:
+                names = [leaf['name'] for leaf in leaves]
+                if step_name not in names:
+                    raise SimulatedError(400, 'The step %s was not found.' % step_name, 'IZUWF0112E')
+                index = names.index(step_name)
+            elif wf['_started'] is not None:
+                index = len([leaf for leaf in leaves if leaf['state'] == 'Complete'])
+                if int(self.config['manual_step']) == index + 1:
+                    raise SimulatedError(
+                        409, 'IZUWF5007E: Automation processing stopped at a manual step.', 'IZUWF5007E'
+                    )
+            wf['_started'] = time.time()
+            wf['_start_index'] = index
+            self._refresh(wf)
+            return {}
+
+    def delete(self, key):
+        with self._lock:
+            self._get(key)
+            del self._workflows[key]
+
+
+class CpmStore(object):
+    """
+    In-memory registry of software templates and software instances.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._lock = threading.Lock()
+        self._instances = {}
+        self._actions = {}
+        self._templates = []
+        for i in range(int(config['cpm_template_count'])):
+            self._templates.append({
+                'object-id': str(uuid.uuid4()),
+                'name': 'simtemplate%d' % i,
+                'version': '1.0',
+                'state': 'published',
+                'description': 'Simulated template %d' % i
+            })
+
+    def list_templates(self):
+        return {'psc-list': copy.deepcopy(self._templates)}
+
+    def _new_instance(self, body, template=None):
+        object_id = str(uuid.uuid4())
+        name = body.get('external-name') or ('SIM%05d' % (len(self._instances) + 1))
+        instance = {
+            'object-id': object_id,
+            'object-name': name,
+            'external-name': name,
+            'registry-type': body.get('registry-type', 'catalog'),
+            'system': body.get('system', 'SY1'),
+            'sysplex': body.get('sysplex', 'PLEX1'),
+            'type': body.get('type', 'sim'),
+            'owner': body.get('owner', 'IBMUSER'),
+            'state': body.get('state', 'being-provisioned'),
+            'template-name': template,
+            'variables': body.get('variables', []),
+            'actions': body.get('actions', [{'name': 'deprovision', 'type': 'instructions'}]),
+            '_started': time.time() if template else None
+        }
+        self._instances[object_id] = instance
+        return instance
+
+    def run_template(self, name, body):
+        with self._lock:
+            if name not in [t['name'] for t in self._templates]:
+                raise SimulatedError(404, 'The template %s was not found.' % name, 'IZUPR0001E')
+            instance = self._new_instance(dict(state='being-provisioned'), template=name)
+            return {
+                'registry-info': {
+                    'object-id': instance['object-id'],
+                    'object-name': instance['object-name'],
+                    'external-name': instance['external-name'],
+                    'system-nickname': instance['system']
+                },
+                'workflow-info': {'workflowKey': str(uuid.uuid4())}
+            }
+
+    def create_instance(self, body):
+        with self._lock:
+            instance = self._new_instance(body)
+            return {'object-id': instance['object-id'], 'object-name': instance['object-name']}
+
+    def _refresh(self, instance):
+        if instance['_started'] is None or instance['state'] != 'being-provisioned':
+            return
+        total = int(self.config['cpm_step_count'])
+        step_seconds = float(self.config['cpm_step_seconds'])
+        done = total
+        if step_seconds > 0:
+            done = min(total, int((time.time() - instance['_started']) / step_seconds))
+        instance['workflow-total-steps'] = total
+        instance['workflow-current-step-number'] = min(done + 1, total)
+        instance['workflow-current-step-name'] = 'provisionStep%d' % min(done + 1, total)
+        instance['workflow-message-text'] = ''
+        if done >= total:
+            instance['state'] = 'provisioned'
+
+    def _get(self, object_id):
+        if object_id not in self._instances:
+            raise SimulatedError(404, 'The instance %s was not found.' % object_id, 'IZUPR0002E')
+        instance = self._instances[object_id]
+        self._refresh(instance)
+        return instance
+
+    def list_instances(self, query):
+        with self._lock:
+            result = []
+            for instance in self._instances.values():
+                if query.get('external-name') and instance['external-name'] != query['external-name']:
+                    continue
+                self._refresh(instance)
+                result.append(dict((k, v) for k, v in instance.items() if not k.startswith('_')))
+            return {'scr-list': result}
+
+    def get_instance(self, object_id):
+        with self._lock:
+            instance = self._get(object_id)
+            return dict((k, v) for k, v in instance.items() if not k.startswith('_'))
+
+    def run_action(self, object_id, action):
+        with self._lock:
+            self._get(object_id)
+            action_id = str(uuid.uuid4())
+            self._actions[action_id] = dict(name=action, started=time.time())
+            return {'action-id': action_id, 'action-uri': '/zosmf/provisioning/rest/1.0/scr/%s/actions/%s'
+                    % (object_id, action_id)}
+
+    def get_action(self, object_id, action_id):
+        with self._lock:
+            self._get(object_id)
+            if action_id not in self._actions:
+                raise SimulatedError(404, 'The action %s was not found.' % action_id, 'IZUPR0003E')
+            action = self._actions[action_id]
+            state = 'running'
+            if time.time() - action['started'] >= float(self.config['cpm_action_seconds']):
+                state = 'complete'
+            return {'action-id': action_id, 'name': action['name'], 'state': state}
+
+    def delete_instance(self, object_id):
+        with self._lock:
+            self._get(object_id)
+            del self._instances[object_id]
+
+
+class TokenStore(object):
+    """
+    The LTPA2 and JWT tokens issued by the authentication service.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._lock = threading.Lock()
+        self._tokens = {}
+
+    def issue(self):
+        with self._lock:
+            ltpa = base64.b64encode(os.urandom(48)).decode('ascii')
+            jwt = 'eyJ0eXAiOiJKV1QifQ.' + base64.urlsafe_b64encode(os.urandom(32)).decode('ascii').rstrip('=')
+            now = time.time()
+            self._tokens[ltpa] = now
+            self._tokens[jwt] = now
+            return ltpa, jwt
+
+    def is_valid(self, token):
+        with self._lock:
+            if token not in self._tokens:
+                return False
+            ttl = float(self.config['token_ttl'])
+            return ttl <= 0 or time.time() - self._tokens[token] < ttl
+
+    def revoke(self, token):
+        with self._lock:
+            self._tokens.pop(token, None)
+
+
+class ZmfRequestHandler(BaseHTTPRequestHandler):
+    """
+    Dispatch the z/OSMF REST requests to the simulated services.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'zOSMF-Simulator/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.simulator.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.simulator.stats.add_connection(getattr(self.connection, 'session_reused', False))
+
+    def do_GET(self):
+        self._handle('get')
+
+    def do_POST(self):
+        self._handle('post')
+
+    def do_PUT(self):
+        self._handle('put')
+
+    def do_DELETE(self):
+        self._handle('delete')
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > 0:
+            return self.rfile.read(length)
+        return b''
+
+    def _send(self, status, body=None, headers=None):
+        if body is None:
+            data = b''
+        elif isinstance(body, bytes):
+            data = body
+        else:
+            data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        if data:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for k, v in (headers or []):
+            self.send_header(k, v)
+        self.end_headers()
+        if data and self.command != 'HEAD':
+            self.wfile.write(data)
+        return len(data)
+
+    def _cookies(self):
+        cookies = {}
+        for part in (self.headers.get('Cookie') or '').split(';'):
+            if '=' in part:
+                k, v = part.strip().split('=', 1)
+                cookies[k] = v
+        return cookies
+
+    def _authenticate(self, sim):
+        """
+        Return how the request is authenticated, or raise a 401 error.
+        """
+        cookies = self._cookies()
+        for name in ('LtpaToken2', 'jwtToken'):
+            if name in cookies:
+                if sim.tokens.is_valid(cookies[name]):
+                    return 'token'
+                raise SimulatedError(401, 'The authentication token is expired or not valid.', 'IZUG846W')
+        authorization = self.headers.get('Authorization') or ''
+        if authorization.lower().startswith('basic '):
+            return 'basic'
+        if hasattr(self.connection, 'getpeercert') and self.connection.getpeercert():
+            return 'cert'
+        if sim.config['allow_anonymous']:
+            return 'anonymous'
+        raise SimulatedError(401, 'Authentication is required.', 'IZUG846W')
+
+    def _handle(self, method):
+        sim = self.server.simulator
+        parsed = urlparse(self.path)
+        query = dict((k, v[0]) for k, v in parse_qs(parsed.query, keep_blank_values=True).items())
+        body = self._read_body()
+        if parsed.path.startswith('/__sim/'):
+            self._control(sim, method, parsed.path, body)
+            return
+        if sim.fixtures is not None:
+            self._handle_fixture(sim, method, body)
+            return
+        endpoint, handler = sim.route(method, parsed.path)
+        status = 500
+        auth_type = None
+        sent = 0
+        sim.stats.begin_request()
+        try:
+            sim.delay(endpoint)
+            sim.inject_error(endpoint)
+            if endpoint not in ('auth.getAuth', 'info.get'):
+                # /zosmf/info is served without authentication
+                auth_type = self._authenticate(sim)
+            status, response, headers = handler(self, query, body)
+            if endpoint == 'auth.getAuth':
+                auth_type = response.pop('_auth_type')
+            elif auth_type == 'basic' and sim.config['basic_auth_sets_token']:
+                headers = list(headers or []) + _token_cookies(*sim.tokens.issue())
+            sent = self._send(status, response, headers)
+        except SimulatedError as ex:
+            status = ex.status
+            if status == 401:
+                auth_type = 'rejected'
+            if status == 0:
+                self.close_connection = True
+            else:
+                sent = self._send(status, ex.body)
+        except Exception as ex:
+            status = 500
+            sent = self._send(status, dict(messageText='Simulator failure: ' + repr(ex)))
+        finally:
+            sim.stats.end_request()
+        sim.stats.add_request(endpoint, status, len(body) + len(self.path), sent, auth_type)
+
+    def _handle_fixture(self, sim, method, body):
+        """
+        Answer the request from the recorded fixtures, or forward it to the
+        upstream z/OSMF and record it.
+        """
+        zmf_fixture = sim.fixtures
+        endpoint = sim.route(method, urlparse(self.path).path)[0]
+        try:
+            if sim.upstream is None:
+                response = zmf_fixture.replay_request(sim.fixture_dir, method, self.path,
+                                                      sim.config['latency_scale'])
+            else:
+                headers = dict((k, v) for k, v in self.headers.items()
+                               if k.lower() not in _HOP_HEADERS)
+                response = zmf_fixture.record_request(sim.fixture_dir, sim.upstream_session, method,
+                                                      sim.upstream + self.path, body or None, headers, 60)
+            status, content, headers = response.status, response.read(), response.headers.items()
+        except zmf_fixture.HTTPError as ex:
+            status, content, headers = ex.code, ex.read(), ex.headers.items()
+        except Exception as ex:
+            status, content, headers = 502, json.dumps(dict(messageText=repr(ex))).encode('utf-8'), []
+        headers = [(k, v) for k, v in headers if k.lower() not in _HOP_HEADERS + ('content-type', 'server', 'date')]
+        sent = self._send(status, content, headers)
+        sim.stats.add_request(endpoint, status, len(body) + len(self.path), sent, None)
+
+    def _control(self, sim, method, path, body):
+        if path == '/__sim/stats':
+            self._send(200, sim.get_stats())
+        elif path == '/__sim/reset' and method == 'post':
+            sim.reset_stats()
+            self._send(204)
+        elif path == '/__sim/config' and method == 'post':
+            sim.configure(json.loads(body.decode('utf-8') or '{}'))
+            self._send(200, sim.config)
+        else:
+            self._send(404, dict(messageText='Unknown control endpoint.'))
+
+
+_HOP_HEADERS = ('host', 'connection', 'content-length', 'transfer-encoding', 'accept-encoding', 'keep-alive')
+
+
+class _ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    # the default backlog of 5 drops the connections of concurrent clients,
+    # which then wait for the SYN retransmission
+    request_queue_size = 128
+
+
+class ZmfSimulator(object):
+    """
+    The simulated z/OSMF server.
+
+    :param dict config: overrides of DEFAULT_CONFIG
+    :param str host: the interface to listen on
+    :param int port: the port to listen on, 0 picks a free port
+    :param str certfile: the PEM server certificate, a self-signed
+        certificate is generated when omitted
+    :param str keyfile: the PEM private key of certfile
+    :param str client_ca: the CA bundle used to verify optional client
+        certificates, which enables client certificate authentication
+    :param bool tls: serve HTTPS, set to False only for debugging
+    :param str fixture_dir: answer the requests from the fixtures recorded
+        in this directory instead of the simulated services
+    :param str upstream: the URL of a real z/OSMF, the requests are
+        forwarded to it and recorded in fixture_dir
+    """
+
+    def __init__(self, config=None, host='127.0.0.1', port=0, certfile=None,
+                 keyfile=None, client_ca=None, tls=True, verbose=False,
+                 fixture_dir=None, upstream=None):
+        self.config = copy.deepcopy(DEFAULT_CONFIG)
+        self.config.update(config or {})
+        self.verbose = verbose
+        self.fixture_dir = fixture_dir
+        self.upstream = upstream.rstrip('/') if upstream else None
+        self.fixtures = None
+        self.upstream_session = None
+        if fixture_dir is not None:
+            # the fixture format is owned by the collection
+            from perf_utils import import_collection
+            import_collection()
+            from ansible.module_utils.urls import Request
+            from ansible_collections.ibm.ibm_zosmf.plugins.module_utils import zmf_fixture
+            self.fixtures = zmf_fixture
+            self.upstream_session = Request()
+        self.stats = RequestStats()
+        self.workflows = WorkflowStore(self.config)
+        self.cpm = CpmStore(self.config)
+        self.tokens = TokenStore(self.config)
+        self._random = random.Random()
+        self._tmpdir = None
+        self._thread = None
+        self.server = _ThreadingServer((host, port), ZmfRequestHandler)
+        self.server.simulator = self
+        if tls:
+            if certfile is None:
+                certfile, keyfile = self._self_signed_certificate()
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            if client_ca is not None:
+                context.load_verify_locations(client_ca)
+                context.verify_mode = ssl.CERT_OPTIONAL
+            # the handshake is done by the request thread on its first read,
+            # not by the accepting thread, so concurrent clients are not serialized
+            self.server.socket = context.wrap_socket(self.server.socket, server_side=True,
+                                                     do_handshake_on_connect=False)
+        self.host, self.port = self.server.server_address[:2]
+
+    def _self_signed_certificate(self):
+        self._tmpdir = tempfile.mkdtemp(prefix='zmf_simulator_')
+        certfile = os.path.join(self._tmpdir, 'server.crt')
+        keyfile = os.path.join(self._tmpdir, 'server.key')
+        subprocess.check_call(
+            ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '2',
+             '-subj', '/CN=localhost', '-keyout', keyfile, '-out', certfile],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        return certfile, keyfile
+
+    def start(self):
+        """
+        Serve requests in a daemon thread.
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    def configure(self, config):
+        self.config.update(config)
+
+    def get_stats(self):
+        return self.stats.snapshot()
+
+    def reset_stats(self):
+        self.stats.reset()
+
+    def delay(self, endpoint):
+        latency = self.config['endpoint_latency_ms'].get(endpoint, self.config['latency_ms'])
+        jitter = self.config['latency_jitter_ms']
+        seconds = (latency + self._random.uniform(-jitter, jitter)) / 1000.0
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def inject_error(self, endpoint):
+        rule = self.config['endpoint_errors'].get(endpoint)
+        if rule is None:
+            rule = dict(rate=self.config['error_rate'], status=self.config['error_status'])
+        if rule.get('rate', 0) > 0 and self._random.random() < rule['rate']:
+            raise SimulatedError(rule.get('status', 500), 'Simulated failure of ' + endpoint + '.', 'IZUG999E')
+
+    def route(self, method, path):
+        """
+        Return the endpoint name and the handler of a request.
+        """
+        for (m, pattern, endpoint, handler) in _ROUTES:
+            if m == method:
+                match = re.match(pattern + '$', path)
+                if match is not None:
+                    return endpoint, _bind(handler, self, match.groups())
+        return 'unknown', _not_found
+
+
+def _bind(handler, sim, groups):
+    def bound(request, query, body):
+        return handler(sim, request, query, body, *groups)
+    return bound
+
+
+def _not_found(request, query, body):
+    raise SimulatedError(404, 'The requested resource is not available.', 'IZUG404E')
+
+
+def _json_body(body):
+    if not body:
+        return {}
+    try:
+        return json.loads(body.decode('utf-8'))
+    except ValueError:
+        raise SimulatedError(400, 'The request body is not valid JSON.', 'IZUG400E')
+
+
+def _workflow_list(sim, request, query, body):
+    return 200, sim.workflows.list(query), None
+
+
+def _workflow_create(sim, request, query, body):
+    return 201, sim.workflows.create(_json_body(body)), None
+
+
+def _workflow_definition(sim, request, query, body):
+    path = query.get('definitionFilePath')
+    if not path:
+        raise SimulatedError(400, 'Required parameter definitionFilePath is missing.', 'IZUWF0101E')
+    response = dict(
+        workflowDefaultName=os.path.basename(path),
+        workflowDescription='Simulated definition ' + path,
+        workflowID='SIMWF',
+        workflowVersion='1.0',
+        vendor='IBM',
+        workflowDefinitionFileMD5Value=sim.workflows.definition_md5(path)
+    )
+    if 'variables' in (query.get('returnData') or ''):
+        response['variables'] = sim.workflows.definition_variables(path)
+    return 200, response, None
+
+
+def _workflow_properties(sim, request, query, body, key):
+    return 200, sim.workflows.properties(key, query.get('returnData')), None
+
+
+def _workflow_start(sim, request, query, body, key):
+    return 202, sim.workflows.start(key, _json_body(body)), None
+
+
+def _workflow_delete(sim, request, query, body, key):
+    sim.workflows.delete(key)
+    return 204, None, None
+
+
+def _sca_items(sim, body, provision):
+    items = []
+    supplied = _json_body(body).get('resourceItems') if body else None
+    count = len(supplied) if supplied else int(sim.config['sca_item_count'])
+    for i in range(count):
+        item = dict(
+            itemId=str(i + 1),
+            resourceClass='FACILITY',
+            resourceProfile='SIM.PROFILE.%d' % i,
+            access='READ',
+            whoNeedsAccess='IBMUSER',
+            status=sim.config['sca_item_status'],
+            itemDescription='x' * int(sim.config['payload_padding'])
+        )
+        if supplied:
+            item.update(supplied[i])
+            item['status'] = sim.config['sca_item_status']
+        if provision:
+            item['action'] = 'provision' if i % 2 == 0 else 'none'
+        items.append(item)
+    return items
+
+
+def _sca_validate(sim, request, query, body):
+    return 200, dict(resourceItems=_sca_items(sim, body, False)), None
+
+
+def _sca_provision(sim, request, query, body):
+    return 200, dict(resourceItems=_sca_items(sim, body, True)), None
+
+
+def _sca_descriptor(provision):
+    def handler(sim, request, query, body):
+        path = _json_body(body).get('path')
+        if not path:
+            raise SimulatedError(400, 'The path of security requirements not found.', 'IZUSC0001E')
+        return 200, dict(resourceItems=_sca_items(sim, b'', provision)), None
+    return handler
+
+
+def _zosmf_info(sim, request, query, body):
+    version = int(sim.config['zosmf_version'])
+    plugins = [
+        dict(pluginVersion='HSMA%d0' % version, pluginDefaultName='z/OS Operator Consoles', pluginStatus='ACTIVE'),
+        dict(pluginVersion='HSMA%d0' % version, pluginDefaultName='Workflow', pluginStatus='ACTIVE'),
+        dict(pluginVersion='HSMA%d0' % version, pluginDefaultName='Cloud Provisioning', pluginStatus='ACTIVE')
+    ]
+    if sim.config['sca_plugin_status'] is not None:
+        plugins.append(dict(pluginVersion='HSMA%d0' % version, pluginDefaultName='Security Configuration Assistant',
+                            pluginStatus=sim.config['sca_plugin_status']))
+    return 200, dict(
+        zos_version='04.%d.00' % version,
+        zosmf_port=str(request.server.server_address[1]),
+        zosmf_version=str(version),
+        zosmf_hostname=request.server.server_address[0],
+        zosmf_saf_realm='SAFRealm',
+        zosmf_full_version='%d.0' % version,
+        api_version='1',
+        plugins=plugins
+    ), None
+
+
+def _auth_login(sim, request, query, body):
+    authorization = request.headers.get('Authorization') or ''
+    if authorization.lower().startswith('basic '):
+        auth_type = 'basic'
+    elif hasattr(request.connection, 'getpeercert') and request.connection.getpeercert():
+        auth_type = 'cert'
+    else:
+        raise SimulatedError(401, 'Authentication is required.', 'IZUG846W')
+    return 200, dict(_auth_type=auth_type), _token_cookies(*sim.tokens.issue())
+
+
+def _token_cookies(ltpa, jwt):
+    return [
+        ('Set-Cookie', 'LtpaToken2=' + ltpa + '; Path=/; Secure; HttpOnly'),
+        ('Set-Cookie', 'jwtToken=' + jwt + '; Path=/; Secure; HttpOnly')
+    ]
+
+
+def _auth_logout(sim, request, query, body):
+    cookies = request._cookies()
+    for name in ('LtpaToken2', 'jwtToken'):
+        if name in cookies:
+            sim.tokens.revoke(cookies[name])
+    return 204, None, None
+
+
+def _cpm_templates(sim, request, query, body):
+    return 200, sim.cpm.list_templates(), None
+
+
+def _cpm_run(sim, request, query, body, name):
+    return 200, sim.cpm.run_template(name, _json_body(body)), None
+
+
+def _cpm_instances(sim, request, query, body):
+    return 200, sim.cpm.list_instances(query), None
+
+
+def _cpm_create(sim, request, query, body):
+    return 201, sim.cpm.create_instance(_json_body(body)), None
+
+
+def _cpm_instance(sim, request, query, body, object_id):
+    return 200, sim.cpm.get_instance(object_id), None
+
+
+def _cpm_action(sim, request, query, body, object_id, action):
+    return 200, sim.cpm.run_action(object_id, action), None
+
+
+def _cpm_action_status(sim, request, query, body, object_id, action_id):
+    return 200, sim.cpm.get_action(object_id, action_id), None
+
+
+def _cpm_delete(sim, request, query, body, object_id):
+    sim.cpm.delete_instance(object_id)
+    return 204, None, None
+
+
+_ROUTES = [
+    ('get', WORKFLOW_PATH + 'workflows', 'workflow.list', _workflow_list),
+    ('post', WORKFLOW_PATH + 'workflows', 'workflow.create', _workflow_create),
+    ('get', WORKFLOW_PATH + 'workflowDefinition', 'workflow.retrieveDefinition', _workflow_definition),
+    ('get', WORKFLOW_PATH + 'workflows/([^/]+)', 'workflow.retrieveProperties', _workflow_properties),
+    ('put', WORKFLOW_PATH + 'workflows/([^/]+)/operations/start', 'workflow.start', _workflow_start),
+    ('delete', WORKFLOW_PATH + 'workflows/([^/]+)', 'workflow.delete', _workflow_delete),
+    ('post', SCA_PATH + 'validate/descriptor', 'sca.validateDescriptor', _sca_descriptor(False)),
+    ('post', SCA_PATH + 'validate', 'sca.validateResource', _sca_validate),
+    ('post', SCA_PATH + 'provision/descriptor', 'sca.provisionDescriptor', _sca_descriptor(True)),
+    ('post', SCA_PATH + 'provision', 'sca.provisionResource', _sca_provision),
+    ('get', INFO_PATH, 'info.get', _zosmf_info),
+    ('post', AUTH_PATH, 'auth.getAuth', _auth_login),
+    ('delete', AUTH_PATH, 'auth.logout', _auth_logout),
+    ('get', CPM_PATH + 'psc/?', 'cpm.listTemplates', _cpm_templates),
+    ('post', CPM_PATH + 'psc/([^/]+)/actions/run', 'cpm.runTemplate', _cpm_run),
+    ('get', CPM_PATH + 'scr/?', 'cpm.listInstances', _cpm_instances),
+    ('post', CPM_PATH + 'scr/?', 'cpm.createInstance', _cpm_create),
+    ('get', CPM_PATH + 'scr/([^/]+)', 'cpm.getInstance', _cpm_instance),
+    ('post', CPM_PATH + 'scr/([^/]+)/actions/([^/]+)', 'cpm.runAction', _cpm_action),
+    ('get', CPM_PATH + 'scr/([^/]+)/actions/([^/]+)', 'cpm.getAction', _cpm_action_status),
+    ('delete', CPM_PATH + 'scr/([^/]+)', 'cpm.deleteInstance', _cpm_delete)
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate the z/OSMF REST services used by ibm_zosmf.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=10443)
+    parser.add_argument('--certfile', help='PEM server certificate, self-signed when omitted')
+    parser.add_argument('--keyfile', help='PEM private key of --certfile')
+    parser.add_argument('--client-ca', help='CA bundle to verify optional client certificates')
+    parser.add_argument('--config', help='JSON file with configuration overrides')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='override one configuration value, the value is parsed as JSON when possible')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    parser.add_argument('--replay', metavar='DIR', help='answer the requests from the fixtures recorded in DIR')
+    parser.add_argument('--record', metavar='DIR', help='record the requests forwarded to --upstream in DIR')
+    parser.add_argument('--upstream', metavar='URL', help='the z/OSMF the requests are forwarded to with --record')
+    args = parser.parse_args(argv)
+    if args.replay and args.record or bool(args.record) != bool(args.upstream):
+        parser.error('use either --replay DIR, or --record DIR together with --upstream URL')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {}
+    if args.config:
+        with open(args.config) as f:
+            config.update(json.load(f))
+    for item in args.set:
+        k, v = item.split('=', 1)
+        try:
+            config[k] = json.loads(v)
+        except ValueError:
+            config[k] = v
+    unknown = set(config) - set(DEFAULT_CONFIG)
+    if unknown:
+        sys.exit('Unknown configuration: ' + ', '.join(sorted(unknown)))
+    sim = ZmfSimulator(config, args.host, args.port, args.certfile, args.keyfile,
+                       args.client_ca, verbose=args.verbose,
+                       fixture_dir=args.replay or args.record, upstream=args.upstream)
+    print('z/OSMF simulator listening on https://%s:%d' % (sim.host, sim.port))
+    try:
+        sim.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(sim.get_stats(), indent=2))
+        sim.stop()
+
+
+if __name__ == '__main__':
+    main()